@@ -1,41 +1,149 @@
+import heapq
 import json
+import os
+from array import array
+from collections import Counter, defaultdict
 from difflib import SequenceMatcher
 
-# === JSON fayldan variantlarni yuklash ===
-with open("ML/eco_roots.json", "r", encoding="utf-8") as f:
-    variants = json.load(f)
+# === Sozlamalar ===
+DEFAULT_VARIANTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eco_roots.json")
+
+# Trigram indeksidan olinadigan nomzodlar soni: faqat shular aniq
+# (SequenceMatcher bilan) qayta baholanadi
+TOP_K = 50
+
+# Shuncha variantgacha indeks ishlatilmaydi - barchasi aniq baholanadi
+EXACT_LIMIT = 1000
+
+# Variantlarning shuncha qismidan ko'pida uchraydigan trigramlar
+# (" ed", "edi" kabi) nomzod tanlashda hisobga olinmaydi
+COMMON_TRIGRAM_SHARE = 0.1
+
+# O‘zbekcha tutuq belgisining barcha yozilishlari: o‘ oʻ o' o` o’ ...
+APOSTROPHES = "‘’ʻʼ`´ʹ′"
+_APOSTROPHE_TABLE = str.maketrans({ch: "'" for ch in APOSTROPHES})
+
 
 # === Matnni normallashtirish ===
 def normalize(text: str):
-    return text.lower().strip()
+    """Kichik harf va tutuq belgilari bitta ko'rinishda (o‘ oʻ o` -> o')"""
+    return text.translate(_APOSTROPHE_TABLE).lower().strip()
+
+
+def trigrams(text: str):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
 
 # === O‘xshashlikni % hisoblash ===
 def similarity(a, b):
     return SequenceMatcher(None, a, b).ratio()
 
-# === Asosiy funksiya ===
-def check_answer(user_answer: str):
-    user_norm = normalize(user_answer)
 
-    scores = []
-    for variant in variants:
-        score = similarity(user_norm, normalize(variant))
-        scores.append((variant, score))
+class AnswerMatcher:
+    """Javob variantlari bo'yicha trigram indeksli noaniq qidiruv.
+
+    Baholash avvalgidek: match_percent = SequenceMatcher.ratio() * 100,
+    teng bo'lsa ro'yxatda oldin turgan variant. Kichik ro'yxatlar
+    (`exact_limit` gacha) to'liq ko'rib chiqiladi - natija eski
+    versiya bilan aynan bir xil. Kattalarida aniq baholash faqat
+    trigramlari eng ko'p mos keladigan `top_k` ta nomzod uchun.
+    """
+
+    def __init__(self, variants, top_k=TOP_K, exact_limit=EXACT_LIMIT):
+        self.variants = list(variants)
+        self.top_k = top_k
+        self.exact_limit = exact_limit
+        self.normalized = [normalize(variant) for variant in self.variants]
+        self._sizes = array("I")
+
+        postings = defaultdict(lambda: array("I"))
+        for index, text in enumerate(self.normalized):
+            grams = trigrams(text)
+            self._sizes.append(len(grams))
+            for gram in grams:
+                postings[gram].append(index)
 
-    # eng yaxshi mos kelgan javob
-    best_match, best_score = max(scores, key=lambda x: x[1])
+        # Juda ko'p uchraydigan trigramlar alohida: faqat nomzodlar yetmasa
+        limit = max(self.top_k, int(len(self.variants) * COMMON_TRIGRAM_SHARE))
+        self._postings = {gram: ids for gram, ids in postings.items() if len(ids) <= limit}
+        self._common_postings = {gram: ids for gram, ids in postings.items() if len(ids) > limit}
+
+    @classmethod
+    def from_json(cls, path=DEFAULT_VARIANTS_PATH, **kwargs):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f), **kwargs)
+
+    def __len__(self):
+        return len(self.variants)
+
+    def candidates(self, user_norm):
+        """Trigram o'xshashligi (Dice) bo'yicha eng yaxshi `top_k` ta variant indeksi"""
+        grams = trigrams(user_norm)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+        if len(shared) < self.top_k:
+            for gram in grams:
+                shared.update(self._common_postings.get(gram, ()))
+        if not shared:
+            return []
+
+        # Avval umumiy trigramlar soni, keyin uzunlikka normallashtirilgan Dice
+        size = len(grams)
+        sizes = self._sizes
+        pool = shared.most_common(self.top_k * 4)
+        best = heapq.nlargest(
+            self.top_k, pool,
+            key=lambda pair: (2 * pair[1] / (size + sizes[pair[0]]), -pair[0]),
+        )
+        return [index for index, _ in best]
+
+    def match(self, user_answer: str):
+        user_norm = normalize(user_answer)
+        indices = None
+        if len(self.variants) > self.exact_limit:
+            indices = self.candidates(user_norm)
+        if not indices:
+            # Kichik ro'yxat yoki umumiy trigram yo'q - butun ro'yxat
+            indices = range(len(self.variants))
+
+        matcher = SequenceMatcher(None, user_norm)
+        best_index, best_score = None, -1.0
+        for index in sorted(indices):
+            matcher.set_seq2(self.normalized[index])
+            # Yuqori chegaralar arzon: ular ham yutolmasa, ratio() hisoblanmaydi
+            if matcher.real_quick_ratio() <= best_score or matcher.quick_ratio() <= best_score:
+                continue
+            score = matcher.ratio()
+            if score > best_score:
+                best_index, best_score = index, score
+
+        return {
+            "user_answer": user_answer,
+            "best_match": self.variants[best_index] if best_index is not None else None,
+            "match_percent": round(max(best_score, 0.0) * 100, 2)
+        }
+
+
+_default_matcher = None
+
+
+# === Asosiy funksiya ===
+def check_answer(user_answer: str):
+    """eco_roots.json variantlari bo'yicha eng yaqin javob"""
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = AnswerMatcher.from_json()
+    return _default_matcher.match(user_answer)
 
-    return {
-        "user_answer": user_answer,
-        "best_match": best_match,
-        "match_percent": round(best_score * 100, 2)
-    }
 
 # ======= TEST ========
-user_input = input("Javobni kiriting: ")
-result = check_answer(user_input)
+if __name__ == "__main__":
+    user_input = input("Javobni kiriting: ")
+    result = check_answer(user_input)
 
-print("\nNatija:")
-print("Sizning javob:", result["user_answer"])
-print("Eng yaqin javob:", result["best_match"])
-print("O‘xshashlik foizi:", result["match_percent"], "%")
+    print("\nNatija:")
+    print("Sizning javob:", result["user_answer"])
+    print("Eng yaqin javob:", result["best_match"])
+    print("O‘xshashlik foizi:", result["match_percent"], "%")
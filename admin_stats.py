@@ -0,0 +1,123 @@
+# admin_stats.py - ADMIN PANELI UCHUN MATERIALLASHTIRILGAN STATISTIKA
+#
+# admin_dashboard() har safar sakkizta COUNT va bugungi barcha
+# DailyProgress qatorlarini yuklash o'rniga `admin_stats` jadvalidan
+# o'qiydi: (scope, name) -> value. scope = 'total' umumiy hisoblagichlar
+# uchun, kunlik yig'indilar uchun esa sana ('2024-01-01').
+#
+# Hisoblagichlar ORM flush'i ichida, shu tranzaksiyada oshiriladi
+# (app.py dagi after_flush va after_bulk_delete hodisalari):
+#   user           -> users, <role>_users        (ro'yxatdan o'tish)
+#   task           -> tasks                      (topshiriq qo'shish/o'chirish)
+#   quiz_result    -> quiz_results               (test topshirish)
+#   news           -> posts                      (yangilik qo'shish/o'chirish)
+#   daily_progress -> <sana>: tasks_completed, quizzes_completed
+# rebuild() barcha qiymatlarni asosiy jadvallardan qayta hisoblaydi
+# (migratsiya va `flask rebuild-admin-stats` uchun).
+from collections import Counter
+
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy import text
+
+TOTAL = 'total'
+
+TOTAL_STATS = ('users', 'child_users', 'adult_users', 'admin_users', 'tasks', 'quiz_results', 'posts')
+DAILY_STATS = ('tasks_completed', 'quizzes_completed')
+
+_COUNTED_TABLES = {
+    'task': 'tasks',
+    'quiz_result': 'quiz_results',
+    'news': 'posts',
+}
+
+
+def _history_delta(obj, attr):
+    """Flush qilinayotgan atributning (yangi - eski) farqi"""
+    history = sa_inspect(obj).attrs[attr].history
+    new = sum(value or 0 for value in history.added)
+    old = sum(value or 0 for value in history.deleted)
+    return new - old
+
+
+def _user_deltas(deltas, role, sign):
+    deltas[(TOTAL, 'users')] += sign
+    deltas[(TOTAL, f'{role}_users')] += sign
+
+
+def collect_deltas(session):
+    """after_flush ichida: new/dirty/deleted obyektlardan hisoblagich farqlari"""
+    deltas = Counter()
+    for sign, objects in ((1, session.new), (-1, session.deleted)):
+        for obj in objects:
+            table = getattr(obj, '__tablename__', None)
+            if table == 'user':
+                _user_deltas(deltas, obj.role, sign)
+            elif table in _COUNTED_TABLES:
+                deltas[(TOTAL, _COUNTED_TABLES[table])] += sign
+            elif table == 'daily_progress' and obj.date is not None:
+                scope = obj.date.isoformat()
+                deltas[(scope, 'tasks_completed')] += sign * (obj.tasks_completed or 0)
+                deltas[(scope, 'quizzes_completed')] += sign * (obj.quizzes_completed or 0)
+
+    for obj in session.dirty:
+        table = getattr(obj, '__tablename__', None)
+        if table == 'user':
+            history = sa_inspect(obj).attrs['role'].history
+            if history.deleted and history.added:
+                _user_deltas(deltas, history.deleted[0], -1)
+                _user_deltas(deltas, history.added[0], 1)
+        elif table == 'daily_progress' and obj.date is not None:
+            scope = obj.date.isoformat()
+            for name in DAILY_STATS:
+                deltas[(scope, name)] += _history_delta(obj, name)
+
+    return {key: value for key, value in deltas.items() if value}
+
+
+def bulk_delete_deltas(table, rowcount):
+    """Query.delete() bilan o'chirilgan qatorlar uchun (after_bulk_delete)"""
+    if table in _COUNTED_TABLES and rowcount:
+        return {(TOTAL, _COUNTED_TABLES[table]): -rowcount}
+    return {}
+
+
+def apply_deltas(conn, deltas):
+    if not deltas:
+        return
+    conn.execute(text("""
+        INSERT INTO admin_stats (scope, name, value) VALUES (:scope, :name, :value)
+        ON CONFLICT(scope, name) DO UPDATE SET value = value + excluded.value
+    """), [{'scope': scope, 'name': name, 'value': value} for (scope, name), value in sorted(deltas.items())])
+
+
+def read(conn, day):
+    """Umumiy va `day` kungi hisoblagichlar (bitta PK so'rovi)"""
+    rows = conn.execute(text(
+        'SELECT scope, name, value FROM admin_stats WHERE scope IN (:total, :day)'
+    ), {'total': TOTAL, 'day': day.isoformat()}).fetchall()
+
+    stats = {name: 0 for name in TOTAL_STATS}
+    stats.update({f'{name}_today': 0 for name in DAILY_STATS})
+    for scope, name, value in rows:
+        key = name if scope == TOTAL else f'{name}_today'
+        stats[key] = value
+    return stats
+
+
+def rebuild(conn):
+    """Barcha hisoblagichlarni asosiy jadvallardan qayta hisoblash"""
+    conn.execute(text('DELETE FROM admin_stats'))
+    conn.execute(text("""
+        INSERT INTO admin_stats (scope, name, value)
+        SELECT :total, 'users', COUNT(*) FROM user
+        UNION ALL SELECT :total, role || '_users', COUNT(*) FROM user GROUP BY role
+        UNION ALL SELECT :total, 'tasks', COUNT(*) FROM task
+        UNION ALL SELECT :total, 'quiz_results', COUNT(*) FROM quiz_result
+        UNION ALL SELECT :total, 'posts', COUNT(*) FROM news
+    """), {'total': TOTAL})
+    conn.execute(text("""
+        INSERT INTO admin_stats (scope, name, value)
+        SELECT date, 'tasks_completed', SUM(COALESCE(tasks_completed, 0)) FROM daily_progress GROUP BY date
+        UNION ALL
+        SELECT date, 'quizzes_completed', SUM(COALESCE(quizzes_completed, 0)) FROM daily_progress GROUP BY date
+    """))
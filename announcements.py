@@ -0,0 +1,83 @@
+# announcements.py - E'LONLAR JADVALI: FAOL TO'PLAM VA KEYINGI O'TISH VAQTI
+#
+# dashboard(), news() va admin_announcements() har so'rovda
+# `start_date <= now <= end_date` bo'yicha Announcement jadvalini qayta
+# so'rardi. Faol to'plam esa faqat e'lon boshlanganda, tugaganda yoki
+# admin uni o'zgartirganda o'zgaradi.
+#
+# AnnouncementSchedule tugamagan barcha e'lonlarni bir marta yuklab
+# snapshot quradi: hozir faol e'lonlar, kutilayotganlar va eng yaqin
+# o'tish vaqti (birinchi start_date > now yoki faol e'lonning end_date'i).
+# Snapshot shu vaqtgacha xotiradan beriladi; admin yozuvlaridan keyin
+# announcement_version.bump() chaqiriladi va barcha worker'lar keyingi
+# so'rovda qayta yuklaydi.
+import threading
+from datetime import datetime, timedelta
+
+from cache import freeze
+
+# end_date o'zi hali faol (end_date >= now), undan keyingi mikrosekund emas
+_END_EPSILON = timedelta(microseconds=1)
+
+
+def _newest_first(announcements):
+    return tuple(sorted(announcements, key=lambda a: (a.created_at or datetime.min, a.id), reverse=True))
+
+
+class ScheduleSnapshot:
+    """Bir vaqt oralig'idagi e'lonlar holati. Yaratilgandan keyin o'zgarmaydi."""
+
+    def __init__(self, version, now, pending, total):
+        # pending - end_date >= now bo'lgan barcha e'lonlar (faol/nofaol)
+        self.version = version
+        self.built_at = now
+        self.total = total
+        self.expired_count = total - len(pending)
+
+        self.active = _newest_first(a for a in pending if a.is_active and a.start_date <= now)
+        self.upcoming = _newest_first(a for a in pending if a.start_date > now)
+
+        transitions = [a.start_date for a in self.upcoming]
+        transitions += [a.end_date + _END_EPSILON for a in pending]
+        self.next_transition = min(transitions) if transitions else None
+
+    @property
+    def active_count(self):
+        return len(self.active)
+
+    def is_current(self, version, now):
+        if version != self.version or now < self.built_at:
+            return False
+        return self.next_transition is None or now < self.next_transition
+
+
+class AnnouncementSchedule:
+    """Versiya belgisi yoki keyingi o'tish vaqti bo'yicha qayta quriladigan jadval"""
+
+    def __init__(self, stamp, loader):
+        # loader(now) -> (end_date >= now bo'lgan e'lonlar, jami e'lonlar soni)
+        self.stamp = stamp
+        self.loader = loader
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+
+    def snapshot(self, now=None):
+        now = now or datetime.utcnow()
+        version = self.stamp.get()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.is_current(version, now):
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or not snapshot.is_current(version, now):
+                pending, total = self.loader(now)
+                snapshot = ScheduleSnapshot(version, now, [freeze(a) for a in pending], total)
+                self._snapshot = snapshot
+                self.rebuilds += 1
+            return snapshot
+
+    def active(self, now=None):
+        """Hozir faol e'lonlar (yangilari birinchi)"""
+        return self.snapshot(now).active
@@ -1,24 +1,113 @@
 # app.py - TO'LIQ ECOVERSE BACKEND TIZIMI
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session, abort, Response, send_file
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
+import click
 import os
+import sys
 import json
-import random
-from sqlalchemy import func
-import threading
-import time
+from itertools import chain
+from sqlalchemy import bindparam, event, text
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+
+import admin_stats
+import announcements
+import cache
+import catalog
+import daily_plan
+import daily_reset
+import grading
+import db_engine
+import energy_regen
+import exposure
+import http_cache
+import inventory
+import ledger
+import live
+import ranking
+import scheduler
+import migrations
+import notifications
+import pagination
+import perf
+import question_bank
+import view_counter
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'eco-verse-2024-secret-key'
 
 basedir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(basedir, "ecoverse.db")}'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+    'ECOVERSE_DATABASE_URI', f'sqlite:///{os.path.join(basedir, "ecoverse.db")}'
+)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Kunlik topshiriqlar shuncha kun oldindan rejalanadi (daily_plan.py)
+app.config['DAILY_TASK_PLAN_DAYS'] = 7
+
+# SQLite parallel ishlash sozlamalari (db_engine.py)
+app.config['SQLITE_JOURNAL_MODE'] = 'WAL'
+app.config['SQLITE_SYNCHRONOUS'] = 'NORMAL'
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = 5000
+app.config['SQLITE_MMAP_SIZE'] = 256 * 1024 * 1024
+app.config['SQLITE_CACHE_SIZE_KB'] = 64 * 1024
+app.config['WRITE_RETRY_ATTEMPTS'] = 5
+app.config['WRITE_RETRY_BASE_DELAY'] = 0.05
+
+# Energiyaning vaqt bo'yicha tiklanishi (energy_regen.py): 1728 s - kuniga 50
+app.config['MAX_ENERGY'] = 100
+app.config['ENERGY_REGEN_SECONDS'] = 1728
+
+# Kesh sozlamalari (cache.py)
+app.config['CACHE_VERSION_DIR'] = app.instance_path
+app.config['DASHBOARD_CACHE_TTL'] = 60
+
+# Bildirishnomalar dispatcher'i (notifications.py)
+app.config['NOTIFICATION_BATCH_SIZE'] = 100
+app.config['NOTIFICATION_FLUSH_INTERVAL'] = 1.0
+app.config['NOTIFICATION_SPOOL_DIR'] = app.instance_path
+
+# Yangiliklar ko'rishlari hisoblagichi (view_counter.py)
+app.config['VIEW_COUNTER_FLUSH_INTERVAL'] = 5.0
+app.config['VIEW_COUNTER_MAX_PENDING'] = 500
+app.config['NEWS_FEED_PER_PAGE'] = 20
+
+# Erkin javoblarni to'plab baholash (grading.py); None - CPU soni
+app.config['GRADING_WORKERS'] = None
+app.config['GRADING_MAX_WORKERS'] = os.cpu_count() or 1
+app.config['GRADING_CHUNK_SIZE'] = 200
+# Admin API yuklamalari diskka yoziladi va `flask grade-answers` fon jarayonida baholanadi
+app.config['GRADING_JOB_DIR'] = os.path.join(app.instance_path, 'grading')
+app.config['GRADING_MAX_UPLOAD_BYTES'] = 50 * 1024 * 1024
+app.config['GRADING_MAX_RUNNING_JOBS'] = 2
+
+# So'rovlar unumdorligi: vaqt, SQL, shablon, hajm (perf.py)
+app.config['PERF_ENABLED'] = True
+app.config['PERF_SLOW_REQUEST_MS'] = 500
+app.config['PERF_SLOW_LOG_SIZE'] = 50
+
+# Jonli oqim (live.py): faqat gevent/gthread worker'lari bilan yoqiladi
+app.config['LIVE_STREAM_ENABLED'] = os.environ.get('ECOVERSE_LIVE_STREAM') == '1'
+app.config['LIVE_POLL_INTERVAL'] = 1.0
+app.config['LIVE_HEARTBEAT_SECONDS'] = 10
+app.config['LIVE_MAX_STREAM_SECONDS'] = 25
 
 db = SQLAlchemy(app)
+write_queue = db_engine.WriteQueue(app, db)
+notifier = notifications.NotificationDispatcher(app, db)
+live_hub = live.LiveHub(app, db)
+news_views = view_counter.ViewCounter(app, db, table='news', column='views_count')
+perf_monitor = perf.PerfMonitor(app, db)
+
+# Admin yozuvlaridan keyin oshiriladigan versiyalar:
+# content - yangilik, kunlik topshiriqlar; announcement - e'lonlar; catalog - Task, Item, EnergyPack
+content_version = cache.VersionStamp(app.config['CACHE_VERSION_DIR'], 'content')
+catalog_version = cache.VersionStamp(app.config['CACHE_VERSION_DIR'], 'catalog')
+leaderboard_version = cache.VersionStamp(app.config['CACHE_VERSION_DIR'], 'leaderboard')
+announcement_version = cache.VersionStamp(app.config['CACHE_VERSION_DIR'], 'announcement')
+dashboard_cache = cache.TTLCache(app.config['DASHBOARD_CACHE_TTL'], content_version, catalog_version)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
@@ -32,6 +121,10 @@ class User(UserMixin, db.Model):
     role = db.Column(db.String(20), nullable=False, default='child')
     coins = db.Column(db.Integer, default=0)
     energy = db.Column(db.Integer, default=100)
+    # `energy` shu paytdagi qiymat; joriy energiya o'qilganda hisoblanadi (energy_regen.py)
+    last_energy_update = db.Column(db.DateTime, default=datetime.utcnow)
+    # Kunlik topshiriq qatorlari (user_task) shu sana uchun tayyorlangan (reset_daily_tasks)
+    daily_tasks_date = db.Column(db.Date)
     streak = db.Column(db.Integer, default=0)
     last_login = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -40,6 +133,13 @@ class User(UserMixin, db.Model):
     last_daily_reset = db.Column(db.DateTime, default=datetime.utcnow)
     level = db.Column(db.Integer, default=1)
     experience = db.Column(db.Integer, default=0)
+    # Statistika, progress yoki bildirishnomalar o'zgarganda oshadi (http_cache.py)
+    state_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    __table_args__ = (
+        db.Index('ix_user_role_coins', 'role', 'coins'),
+        db.Index('ix_user_role_id', 'role', 'id'),
+    )
 
 class Task(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -96,6 +196,10 @@ class Inventory(db.Model):
     user = db.relationship('User', backref='inventory_items')
     item = db.relationship('Item', backref='inventory_items')
 
+    __table_args__ = (
+        db.Index('uq_inventory_user_item', 'user_id', 'item_id', unique=True),
+    )
+
 class News(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -109,6 +213,11 @@ class News(db.Model):
     views_count = db.Column(db.Integer, default=0)
     author = db.relationship('User', backref=db.backref('news_posts', lazy=True))
 
+    __table_args__ = (
+        db.Index('ix_news_status_created', 'status', 'created_at'),
+        db.Index('ix_news_created', 'created_at'),
+    )
+
 class Announcement(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -121,6 +230,10 @@ class Announcement(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     author = db.relationship('User', backref=db.backref('announcements', lazy=True))
 
+    __table_args__ = (
+        db.Index('ix_announcement_created', 'created_at'),
+    )
+
 class QuizResult(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -134,6 +247,10 @@ class QuizResult(db.Model):
     user = db.relationship('User', backref='quiz_results')
     task = db.relationship('Task', backref='quiz_results')
 
+    __table_args__ = (
+        db.Index('ix_quiz_result_user', 'user_id'),
+    )
+
 class UserTask(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -144,6 +261,10 @@ class UserTask(db.Model):
     user = db.relationship('User', backref='user_tasks')
     task = db.relationship('Task', backref='user_tasks')
 
+    __table_args__ = (
+        db.Index('uq_user_task_user_task', 'user_id', 'task_id', unique=True),
+    )
+
 class DailyProgress(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -154,6 +275,11 @@ class DailyProgress(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     user = db.relationship('User', backref='daily_progress')
 
+    __table_args__ = (
+        db.Index('uq_daily_progress_user_date', 'user_id', 'date', unique=True),
+        db.Index('ix_daily_progress_date', 'date'),
+    )
+
 class UserAchievement(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -174,26 +300,365 @@ class Notification(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     user = db.relationship('User', backref='notifications')
 
+    __table_args__ = (
+        db.Index('ix_notification_user_read_created', 'user_id', 'is_read', 'created_at'),
+    )
+
+# Foydalanuvchi holati versiyasi (ETag uchun, http_cache.py).
+# ORM orqali User, DailyProgress yoki Notification o'zgarsa, shu flush
+# ichida egasining state_version'i oshiriladi. Xom SQL yozuvchilar
+# (ledger, daily_reset, notifications) buni o'zlari qiladi.
+_BUMP_STATE_SQL = text(
+    'UPDATE user SET state_version = COALESCE(state_version, 0) + 1 WHERE id IN :user_ids'
+).bindparams(bindparam('user_ids', expanding=True))
+
+@event.listens_for(db.session, 'after_flush')
+def bump_user_state_versions(session, flush_context):
+    user_ids = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, User):
+            user_ids.add(obj.id)
+        elif isinstance(obj, (DailyProgress, Notification)):
+            user_ids.add(obj.user_id)
+    user_ids.discard(None)
+    if user_ids:
+        session.connection().execute(_BUMP_STATE_SQL, {'user_ids': sorted(user_ids)})
+
+# Joriy energiya (energy_regen.py): User yuklanganda yoki commit'dan keyin qayta
+# o'qilganda `energy` vaqt bo'yicha tiklangan qiymatga tenglanadi. Bazaga bu
+# yozilmaydi - faqat foydalanuvchi harakat qilganda (change_balance).
+@event.listens_for(User, 'load')
+def materialize_energy(user, context):
+    if 'energy' not in user.__dict__ or 'last_energy_update' not in user.__dict__:
+        return
+    energy, updated_at = energy_regen.materialize(
+        user.energy, user.last_energy_update, datetime.utcnow(),
+        app.config['MAX_ENERGY'], app.config['ENERGY_REGEN_SECONDS'])
+    set_committed_value(user, 'energy', energy)
+    set_committed_value(user, 'last_energy_update', updated_at)
+
+@event.listens_for(User, 'refresh')
+def materialize_energy_on_refresh(user, context, attrs):
+    materialize_energy(user, context)
+
+# Admin paneli hisoblagichlari (admin_stats.py): ro'yxatdan o'tish, topshiriq,
+# test va yangilik hodisalari shu flush ichida admin_stats jadvaliga yoziladi
+class AdminStat(db.Model):
+    __tablename__ = 'admin_stats'
+    scope = db.Column(db.String(10), primary_key=True)
+    name = db.Column(db.String(40), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+@event.listens_for(db.session, 'after_flush')
+def track_admin_stats(session, flush_context):
+    admin_stats.apply_deltas(session.connection(), admin_stats.collect_deltas(session))
+
+@event.listens_for(db.session, 'after_bulk_delete')
+def track_admin_stats_bulk_delete(delete_context):
+    deltas = admin_stats.bulk_delete_deltas(delete_context.mapper.local_table.name,
+                                            delete_context.result.rowcount)
+    admin_stats.apply_deltas(delete_context.session.connection(), deltas)
+
+# Coin va energiya jurnali (ledger.py); reyting ham shu lentadan sinxronlanadi
+class BalanceLedger(db.Model):
+    __tablename__ = 'balance_ledger'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    coins_delta = db.Column(db.Integer, nullable=False, default=0)
+    energy_delta = db.Column(db.Integer, nullable=False, default=0)
+    coins = db.Column(db.Integer, nullable=False)
+    energy = db.Column(db.Integer, nullable=False)
+    role = db.Column(db.String(20), nullable=False)
+    reason = db.Column(db.String(50), nullable=False, default='')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_balance_ledger_user', 'user_id'),
+        {'sqlite_autoincrement': True},
+    )
+
+# ledger.compact() yig'gan eski jurnal qatorlarining foydalanuvchi bo'yicha yig'indisi
+class BalanceSummary(db.Model):
+    __tablename__ = 'balance_summary'
+    user_id = db.Column(db.Integer, primary_key=True)
+    coins_delta = db.Column(db.Integer, nullable=False, default=0)
+    energy_delta = db.Column(db.Integer, nullable=False, default=0)
+    entries = db.Column(db.Integer, nullable=False, default=0)
+    last_ledger_id = db.Column(db.Integer, nullable=False, default=0)
+    compacted_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Kunlik scheduler (scheduler.py): ijara egasi va har bir kun uchun bajarilish yozuvi
+class SchedulerLease(db.Model):
+    __tablename__ = 'scheduler_lease'
+    name = db.Column(db.String(50), primary_key=True)
+    owner = db.Column(db.String(120), nullable=False)
+    acquired_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+class SchedulerRun(db.Model):
+    __tablename__ = 'scheduler_run'
+    job = db.Column(db.String(50), primary_key=True)
+    day = db.Column(db.String(10), primary_key=True)
+    owner = db.Column(db.String(120), nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=1)
+    started_at = db.Column(db.DateTime, nullable=False)
+    finished_at = db.Column(db.DateTime)
+    stats = db.Column(db.Text)
+    error = db.Column(db.Text)
+
+# Foydalanuvchi ko'rgan / to'g'ri javob bergan savollar bitset'lari (exposure.py)
+class QuestionExposure(db.Model):
+    __tablename__ = 'question_exposure'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    seen = db.Column(db.LargeBinary, nullable=False, default=b'')
+    correct = db.Column(db.LargeBinary, nullable=False, default=b'')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+def load_exposure(user_id):
+    row = db.session.get(QuestionExposure, user_id)
+    return exposure.Exposure(row.seen, row.correct) if row else exposure.Exposure()
+
+def record_exposure(user_id, results, index):
+    """submit_quiz natijalarini bitset'larga yozish (commit chaqiruvchida)"""
+    row = db.session.get(QuestionExposure, user_id)
+    user_exposure = exposure.Exposure(row.seen, row.correct) if row else exposure.Exposure()
+    recorded = 0
+    for result in results:
+        if not isinstance(result, dict):
+            continue
+        question_id = result.get('question_id')
+        if not isinstance(question_id, int):
+            question_id = index.id_by_text.get(result.get('question'))
+        question = index.by_id.get(question_id)
+        if question is None:
+            continue
+        # To'g'rilik bank bo'yicha tekshiriladi, klientning is_correct'iga ishonilmaydi
+        user_exposure.record(question_id, result.get('user_answer') == question.get('correct_answer'))
+        recorded += 1
+    if not recorded:
+        return 0
+    
+    seen, correct = user_exposure.blobs()
+    if row is None:
+        db.session.add(QuestionExposure(user_id=user_id, seen=seen, correct=correct))
+    else:
+        row.seen, row.correct = seen, correct
+    return recorded
+
+def change_balance(user, coins=0, energy=0, reason=''):
+    """Coin/energiyani bitta shartli UPDATE bilan o'zgartirish (commit'dan oldin).
+
+    Balans yetmasa None qaytaradi va hech narsa o'zgarmaydi. Muvaffaqiyatda
+    `user` obyektidagi coins/energy bazadagi yangi qiymatlarga tenglanadi.
+    """
+    result = ledger.apply(db.session, user.id, coins=coins, energy=energy, reason=reason,
+                          max_energy=app.config['MAX_ENERGY'],
+                          regen_seconds=app.config['ENERGY_REGEN_SECONDS'])
+    if result is not None:
+        set_committed_value(user, 'coins', result.coins)
+        set_committed_value(user, 'energy', result.energy)
+        set_committed_value(user, 'last_energy_update', result.energy_updated_at)
+    return result
+
+def next_energy_at(user):
+    at = energy_regen.next_regen_at(user.energy, user.last_energy_update, datetime.utcnow(),
+                                    app.config['MAX_ENERGY'], app.config['ENERGY_REGEN_SECONDS'])
+    return at.isoformat() if at is not None else None
+
+def open_balance(user, reason='opening'):
+    """Yangi foydalanuvchining boshlang'ich balansini jurnalga yozish (flush'dan keyin)"""
+    ledger.record(db.session, user.id, user.coins, user.energy, user.role,
+                  coins_delta=user.coins or 0, reason=reason)
+
+child_leaderboard = ranking.Leaderboard(leaderboard_version)
+
+@app.cli.command('rebuild-leaderboard')
+def rebuild_leaderboard_command():
+    """Reytingni bazadan qayta qurish: barcha worker'lar keyingi so'rovda qayta quradi"""
+    child_leaderboard.rebuild(db.session)
+    leaderboard_version.bump()
+    print(f"🏆 Reyting qayta qurildi: {len(child_leaderboard)} ta ishtirokchi")
+    for rank, user_id, coins in child_leaderboard.top(5):
+        print(f"   #{rank} user_id={user_id} coins={coins}")
+
+@app.cli.command('rebuild-admin-stats')
+def rebuild_admin_stats_command():
+    """admin_stats jadvalini asosiy jadvallardan qayta hisoblash"""
+    with db.engine.begin() as conn:
+        admin_stats.rebuild(conn)
+        stats = admin_stats.read(conn, datetime.utcnow().date())
+    print("📊 Admin statistikasi qayta hisoblandi:")
+    for name, value in stats.items():
+        print(f"   {name}: {value}")
+
+@app.cli.command('compact-ledger')
+def compact_ledger_command():
+    """Eski jurnal qatorlarini balance_summary ga yig'ish va balanslarni tekshirish"""
+    with db.engine.begin() as conn:
+        stats = ledger.compact(conn)
+    print(f"📒 Jurnal yig'ildi: {stats['rows']} qator, {stats['users']} foydalanuvchi, {stats['seconds']} s")
+    with db.engine.connect() as conn:
+        mismatches = ledger.verify(conn)
+    if mismatches:
+        print(f"⚠️  Jurnal bilan mos kelmagan balanslar: {len(mismatches)}")
+        for user_id, coins, ledger_coins in mismatches:
+            print(f"   user_id={user_id} coins={coins} jurnal={ledger_coins}")
+    else:
+        print("✅ Barcha balanslar jurnal bilan mos")
+
+@app.cli.command('grade-answers')
+@click.argument('input_file', type=click.File('r', encoding='utf-8'))
+@click.option('-o', '--output', type=click.File('w', encoding='utf-8'), default='-',
+              help="natijalar (JSONL), standart - stdout")
+@click.option('--workers', type=int, default=None, help="jarayonlar soni (standart - CPU soni)")
+@click.option('--chunk-size', type=int, default=None, help="bir worker'ga yuboriladigan javoblar soni")
+@click.option('--summary', 'summary_path', default=None,
+              help="yakuniy statistikani (yoki xatoni) JSON faylga yozish")
+def grade_answers_command(input_file, output, workers, chunk_size, summary_path):
+    """JSONL fayldagi (user_id, answer) juftlarini eco_roots.json bo'yicha baholash"""
+    stats = grading.GradingStats(0, 0)
+    try:
+        for result in grading.grade_stream(
+            input_file,
+            workers=grading_workers(workers),
+            chunk_size=chunk_size or app.config['GRADING_CHUNK_SIZE'],
+            stats=stats,
+        ):
+            output.write(json.dumps(result, ensure_ascii=False) + '\n')
+        output.flush()
+    except Exception as e:
+        if summary_path:
+            write_grading_summary(summary_path, {'error': str(e)})
+        raise
+    summary = stats.as_dict()
+    if summary_path:
+        write_grading_summary(summary_path, summary)
+    click.echo(
+        f"📝 {summary['answers']} ta javob baholandi ({summary['errors']} xato qator): "
+        f"{summary['seconds']} s, {summary['answers_per_second']} javob/s, "
+        f"{summary['workers']} worker, bo'lak {summary['chunk_size']}",
+        err=True,
+    )
+
+def grading_workers(requested=None):
+    """Jarayonlar soni: 1 .. GRADING_MAX_WORKERS oralig'ida"""
+    workers = requested or app.config['GRADING_WORKERS'] or app.config['GRADING_MAX_WORKERS']
+    return max(1, min(workers, app.config['GRADING_MAX_WORKERS']))
+
+def write_grading_summary(path, summary):
+    # Status endpoint'i chala faylni o'qimasligi uchun atomar almashtiramiz
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+grading_jobs = grading.GradingJobs(app.config['GRADING_JOB_DIR'], app.config['GRADING_MAX_RUNNING_JOBS'])
+
+# KATALOG KESHI (catalog.py)
+def load_catalog_rows():
+    return Task.query.all(), Item.query.all(), EnergyPack.query.all()
+
+catalog_cache = catalog.Catalog(catalog_version, load_catalog_rows)
+
+# E'LONLAR JADVALI (announcements.py)
+def load_pending_announcements(now):
+    pending = Announcement.query.filter(Announcement.end_date >= now).all()
+    return pending, Announcement.query.count()
+
+announcement_schedule = announcements.AnnouncementSchedule(announcement_version, load_pending_announcements)
+
 @login_manager.user_loader
 def load_user(user_id):
     return db.session.get(User, int(user_id))
 
+
+# NOTIFICATION VA COIN BOSHQARUV API'LARI
+@app.route('/admin/add_coins_to_user/<int:user_id>', methods=['POST'])
+@login_required
+def add_coins_to_user(user_id):
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'error': 'Admin huquqi yo\'q'})
+    
+    try:
+        data = request.get_json()
+        coins_amount = data.get('coins', 0)
+        reason = data.get('reason', 'Admin tomonidan qo\'shildi')
+        
+        if coins_amount <= 0 or coins_amount > 10000:
+            return jsonify({'success': False, 'error': 'Coin miqdori 1 dan 10000 gacha bo\'lishi kerak'})
+        
+        user = User.query.get_or_404(user_id)
+        change_balance(user, coins=coins_amount, reason='admin')
+        
+        db.session.commit()
+        
+        # Bildirishnoma commit'dan keyin navbatga qo'yiladi
+        notifier.emit(
+            user_id=user_id,
+            title='💰 Coin olindi!',
+            message=f'Sizga {coins_amount} coin qo\'shildi! Sabab: {reason}',
+            notification_type='coin'
+        )
+        
+        return jsonify({
+            'success': True, 
+            'message': f'{user.username}ga {coins_amount} coin qo\'shildi',
+            'new_balance': user.coins
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/get_notifications')
+@http_cache.user_etag(db, 'notifications')
+@login_required
+def get_notifications():
+    try:
+        notifications = Notification.query.filter_by(
+            user_id=current_user.id,
+            is_read=False
+        ).order_by(Notification.created_at.desc()).limit(10).all()
+        
+        return jsonify({
+            'success': True,
+            'notifications': [{
+                'id': n.id,
+                'title': n.title,
+                'message': n.message,
+                'type': n.notification_type,
+                'created_at': n.created_at.isoformat()
+            } for n in notifications]
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/mark_notification_read/<int:notification_id>', methods=['POST'])
+@login_required
+def mark_notification_read(notification_id):
+    try:
+        notification = Notification.query.get_or_404(notification_id)
+        if notification.user_id == current_user.id:
+            notification.is_read = True
+            db.session.commit()
+            live_hub.publish([current_user.id], activity=False)
+            return jsonify({'success': True})
+        return jsonify({'success': False, 'error': 'Ruxsat berilmagan'})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
 def init_database():
+    """Bazani joyida yangilash: yo'q jadvallarni yaratish va migratsiyalarni qo'llash"""
     with app.app_context():
-        try:
-            db.drop_all()
-            db.create_all()
-            create_demo_data()
-            print("✅ Database yangilandi!")
-            
-            create_daily_tasks()
-            
-        except Exception as e:
-            print(f"❌ Database yangilashda xatolik: {e}")
-            db.create_all()
+        db.create_all()
+        migrations.upgrade(db.engine)
+
+        if User.query.first() is None:
             create_demo_data()
             print("✅ Database yaratildi!")
-            create_daily_tasks()
+        else:
+            print("✅ Database yangilandi!")
+
+        create_daily_tasks()
 
 def create_demo_data():
     demo_tasks = [
@@ -291,65 +756,59 @@ def create_demo_data():
     for announcement in demo_announcements:
         db.session.add(announcement)
     
+    db.session.flush()
+    for user in demo_users:
+        open_balance(user)
+    
     db.session.commit()
 
-def create_daily_tasks():
-    today = datetime.utcnow().date()
-    
-    existing_daily = DailyTask.query.filter_by(date=today).first()
-    if existing_daily:
-        return existing_daily
-    
-    daily_tasks = Task.query.filter_by(task_type='daily', is_active=True).all()
-    quiz_tasks = Task.query.filter_by(task_type='quiz', is_active=True).all()
-    
-    if len(daily_tasks) >= 3 and len(quiz_tasks) >= 1:
-        selected_daily = random.sample(daily_tasks, 3)
-        selected_quiz = random.choice(quiz_tasks)
-        
-        new_daily = DailyTask(
-            date=today,
-            task_1_id=selected_daily[0].id,
-            task_2_id=selected_daily[1].id,
-            task_3_id=selected_daily[2].id,
-            quiz_1_id=selected_quiz.id
-        )
-        
-        db.session.add(new_daily)
-        db.session.commit()
-        print(f"✅ Kunlik topshiriqlar yaratildi: {today}")
-        return new_daily
-    
-    return None
+def load_daily_plan(day):
+    """Kun rejasi va to'rtta topshirig'i - bitta JOIN so'rov (daily_plan.py).
+
+    Topshiriqlaridan biri o'chirilgan, nofaol yoki turi o'zgargan bo'lsa
+    reja yo'q deb hisoblanadi - planner uni qayta yaratadi.
+    """
+    daily_task = DailyTask.query.options(
+        joinedload(DailyTask.task_1), joinedload(DailyTask.task_2),
+        joinedload(DailyTask.task_3), joinedload(DailyTask.quiz_1),
+    ).filter_by(date=day).first()
+    if daily_task is None:
+        return None
+    planned = ((daily_task.task_1, 'daily'), (daily_task.task_2, 'daily'),
+               (daily_task.task_3, 'daily'), (daily_task.quiz_1, 'quiz'))
+    if any(task is None or not task.is_active or task.task_type != task_type for task, task_type in planned):
+        return None
+    return {
+        'daily_tasks': tuple(cache.freeze(task) for task in (daily_task.task_1, daily_task.task_2, daily_task.task_3)),
+        'daily_quiz': cache.freeze(daily_task.quiz_1)
+    }
+
+task_planner = daily_plan.DailyTaskPlanner(app, db, loader=load_daily_plan, stamp=catalog_version)
+
+def create_daily_tasks(days=None):
+    """Bugundan boshlab `days` kunlik reja (yo'q kunlar uchun). Yaratilgan sanalarni qaytaradi."""
+    created = task_planner.generate(datetime.utcnow().date(), days)
+    if created:
+        print(f"✅ Kunlik topshiriqlar rejalandi: {created[0]} .. {created[-1]} ({len(created)} kun)")
+    return created
 
 def get_todays_tasks():
-    today = datetime.utcnow().date()
-    daily_task = DailyTask.query.filter_by(date=today).first()
-    
-    if not daily_task:
-        daily_task = create_daily_tasks()
-    
-    if daily_task:
-        return {
-            'daily_tasks': [daily_task.task_1, daily_task.task_2, daily_task.task_3],
-            'daily_quiz': daily_task.quiz_1
-        }
-    return None
+    return task_planner.get(datetime.utcnow().date())
 
-def load_questions_from_json():
-    try:
-        with open('ml_questions.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return data
-    except FileNotFoundError:
-        print("⚠️  ml_questions.json fayli topilmadi! Demo savollar ishlatiladi.")
-        return create_demo_questions()
-    except json.JSONDecodeError as e:
-        print(f"⚠️  JSON faylini o'qishda xatolik: {e}")
-        return create_demo_questions()
-    except Exception as e:
-        print(f"⚠️  Xatolik: {e}")
-        return create_demo_questions()
+def replan_daily_tasks():
+    """Topshiriq o'zgargandan keyin: yaroqsiz rejalarni o'chirib, qayta rejalash"""
+    today = datetime.utcnow().date()
+    pruned = task_planner.prune(today)
+    if not pruned:
+        return []
+    if today.isoformat() in pruned:
+        # Bugungi reja almashdi: foydalanuvchilar user_task qatorlarini qayta tayyorlaydi
+        db.session.execute(db.text('UPDATE user SET daily_tasks_date = NULL WHERE daily_tasks_date = :today'),
+                           {'today': today})
+        db.session.commit()
+    create_daily_tasks()
+    content_version.bump()
+    return pruned
 
 def create_demo_questions():
     return {
@@ -402,82 +861,105 @@ def create_demo_questions():
         ]
     }
 
-def daily_reset_system():
+questions = question_bank.QuestionBank(os.path.join(basedir, 'ml_questions.json'), create_demo_questions)
+
+def daily_reset_system(day=None):
+    """Kunlik yangilanish: reja va jurnal; foydalanuvchilar jadvaliga tegmaydi (daily_reset.py)"""
     with app.app_context():
         today = datetime.utcnow().date()
-        print(f"🔄 Kunlik yangilanish boshlandi: {today}")
+        day = day or today
+        print(f"🔄 Kunlik yangilanish boshlandi: {day}")
         
-        create_daily_tasks()
+        if day == today:
+            create_daily_tasks()
         
-        users = User.query.all()
-        for user in users:
-            daily_progress = DailyProgress(
-                user_id=user.id,
-                date=today,
-                tasks_completed=0,
-                quizzes_completed=0,
-                coins_earned=0
-            )
-            db.session.add(daily_progress)
-            
-            user.energy = min(100, user.energy + 50)
-            user.last_daily_reset = datetime.utcnow()
+        stats = daily_reset.run_daily_reset(db.engine, day)
         
-        db.session.commit()
-        print(f"✅ Kunlik yangilanish bajarildi: {today}")
+        with db.engine.begin() as conn:
+            ledger.compact(conn)
+        
+        if stats['already_finished']:
+            print(f"ℹ️  Kunlik yangilanish bugun allaqachon bajarilgan: {day}")
+        else:
+            print(f"✅ Kunlik yangilanish bajarildi: {day} - {stats['seconds']} s")
+        return stats
 
-def start_daily_scheduler():
-    def scheduler():
-        while True:
-            now = datetime.utcnow()
-            if now.hour == 0 and now.minute == 0:
-                daily_reset_system()
-                time.sleep(60)
-            time.sleep(30)
-    
-    thread = threading.Thread(target=scheduler, daemon=True)
-    thread.start()
-    print("🕒 Kunlik yangilanish scheduler'i ishga tushdi")
+# Kunlik yangilanish scheduler'i (scheduler.py): ijara bilan bitta jarayonda
+daily_scheduler = scheduler.DailyScheduler(app, db, job=daily_reset_system, name='daily_reset')
+
+@app.cli.command('run-scheduler')
+def run_scheduler_command():
+    """Kunlik scheduler'ni alohida jarayon sifatida ishga tushirish (Ctrl+C - to'xtatish)"""
+    for row in daily_scheduler.history(7):
+        status = 'xato: ' + row.error if row.error else ('tugagan' if row.finished_at else 'jarayonda')
+        print(f"   {row.day} {status} ({row.attempts} urinish, {row.owner})")
+    daily_scheduler.start().join()
 
 def check_level_up(user):
     required_exp = user.level * 100
     if user.experience >= required_exp:
         user.level += 1
         user.experience = 0
-        user.coins += user.level * 50
+        change_balance(user, coins=user.level * 50, reason='level_up')
         return True
     return False
 
-def reset_daily_tasks(user_id):
+def reset_daily_tasks(user, todays_tasks=None):
+    """Foydalanuvchi uchun bugungi kunlik topshiriq qatorlarini tayyorlash.
+
+    Kuniga bir marta ishlaydi: `user.daily_tasks_date` bugun bo'lsa hech
+    qanday so'rov yo'q. Birinchi chaqiruvda barcha qatorlar bitta UPSERT
+    bilan yaratiladi yoki kechagi bajarilish belgisi tozalanadi. Bugungi
+    reja hali yo'q bo'lsa belgi qo'yilmaydi - keyingi so'rov qayta urinadi.
+    """
     today = datetime.utcnow().date()
-    
-    todays_tasks = get_todays_tasks()
-    if todays_tasks:
-        daily_task_ids = [task.id for task in todays_tasks['daily_tasks']] + [todays_tasks['daily_quiz'].id]
-        
-        for task_id in daily_task_ids:
-            user_task = UserTask.query.filter_by(user_id=user_id, task_id=task_id).first()
-            if user_task:
-                if user_task.completed_at and user_task.completed_at.date() != today:
-                    user_task.completed = False
-                    user_task.completed_at = None
-            else:
-                new_user_task = UserTask(user_id=user_id, task_id=task_id)
-                db.session.add(new_user_task)
-    
+    if user.daily_tasks_date == today:
+        return False
+
+    if todays_tasks is None:
+        todays_tasks = get_todays_tasks()
+    if not todays_tasks:
+        return False
+
+    daily_task_ids = [task.id for task in todays_tasks['daily_tasks']] + [todays_tasks['daily_quiz'].id]
+    db.session.execute(db.text("""
+        INSERT INTO user_task (user_id, task_id, completed, created_at)
+        VALUES (:user_id, :task_id, 0, :now)
+        ON CONFLICT(user_id, task_id) DO UPDATE SET completed = 0, completed_at = NULL
+        WHERE user_task.completed_at IS NOT NULL AND date(user_task.completed_at) != :today
+    """), [{'user_id': user.id, 'task_id': task_id, 'now': datetime.utcnow(), 'today': today.isoformat()}
+           for task_id in daily_task_ids])
+
+    user.daily_tasks_date = today
     db.session.commit()
+    return True
+
+def add_daily_progress(user_id, tasks=0, quizzes=0, coins=0):
+    """Bugungi DailyProgress'ga qo'shish - bitta UPSERT.
+
+    Qator yarim tunda oldindan yaratilmaydi; kunning birinchi harakatida
+    ikki worker bir vaqtda yozsa ham unikal indeks bo'yicha qo'shiladi.
+    """
+    db.session.execute(db.text("""
+        INSERT INTO daily_progress (user_id, date, tasks_completed, quizzes_completed, coins_earned, created_at)
+        VALUES (:user_id, :date, :tasks, :quizzes, :coins, :now)
+        ON CONFLICT(user_id, date) DO UPDATE SET
+            tasks_completed = COALESCE(tasks_completed, 0) + excluded.tasks_completed,
+            quizzes_completed = COALESCE(quizzes_completed, 0) + excluded.quizzes_completed,
+            coins_earned = COALESCE(coins_earned, 0) + excluded.coins_earned
+    """), {'user_id': user_id, 'date': datetime.utcnow().date(), 'tasks': tasks,
+           'quizzes': quizzes, 'coins': coins, 'now': datetime.utcnow()})
 
 # YANGI: TOPSHIRIQ VA DO'KON FUNKSIYALARI
 @app.route('/complete_task/<int:task_id>', methods=['POST'])
 @login_required
+@write_queue.serialized
 def complete_task(task_id):
     """Topshiriqni bajarilgan deb belgilash"""
     try:
-        task = Task.query.get_or_404(task_id)
-        
-        # Energiya tekshirish
-        if current_user.energy < task.energy_cost:
-            return jsonify({'success': False, 'error': f'Energiya yetarli emas! Kerak: {task.energy_cost}, Sizda: {current_user.energy}'})
+        task = catalog_cache.snapshot().task(task_id)
+        if task is None:
+            abort(404)
         
         # Topshiriq allaqachon bajarilganligini tekshirish
         user_task = UserTask.query.filter_by(
@@ -488,11 +970,10 @@ def complete_task(task_id):
         if user_task and user_task.completed:
             return jsonify({'success': False, 'error': 'Bu topshiriq allaqachon bajarilgan!'})
         
-        # Energiya olib tashlash
-        current_user.energy -= task.energy_cost
-        
-        # Coinlarni qo'shish
-        current_user.coins += task.reward_coins
+        # Energiya olib tashlash va coin qo'shish - energiya yetarliligi bazada tekshiriladi
+        if change_balance(current_user, coins=task.reward_coins, energy=-task.energy_cost,
+                          reason=f'task:{task.id}') is None:
+            return jsonify({'success': False, 'error': f'Energiya yetarli emas! Kerak: {task.energy_cost}, Sizda: {current_user.energy}'})
         
         # Tajriba qo'shish
         exp_gained = task.reward_coins // 2
@@ -517,36 +998,17 @@ def complete_task(task_id):
             db.session.add(new_user_task)
         
         # Kunlik progressni yangilash
-        today = datetime.utcnow().date()
-        daily_progress = DailyProgress.query.filter_by(
-            user_id=current_user.id, 
-            date=today
-        ).first()
+        add_daily_progress(current_user.id, tasks=1, coins=task.reward_coins)
         
-        if daily_progress:
-            daily_progress.tasks_completed += 1
-            daily_progress.coins_earned += task.reward_coins
-        else:
-            new_daily_progress = DailyProgress(
-                user_id=current_user.id,
-                date=today,
-                tasks_completed=1,
-                quizzes_completed=0,
-                coins_earned=task.reward_coins
-            )
-            db.session.add(new_daily_progress)
+        db.session.commit()
         
-        # Notification yaratish
-        notification = Notification(
+        # Bildirishnoma commit'dan keyin navbatga qo'yiladi
+        notifier.emit(
             user_id=current_user.id,
             title='✅ Topshiriq Bajarildi!',
             message=f'"{task.title}" topshirig\'i bajarildi! +{task.reward_coins} coin, +{exp_gained} tajriba',
-            notification_type='task',
-            is_read=False
+            notification_type='task'
         )
-        db.session.add(notification)
-        
-        db.session.commit()
         
         return jsonify({
             'success': True,
@@ -564,8 +1026,12 @@ def complete_task(task_id):
 # app.py ga quyidagi funksiyalarni qo'shing
 # app.py ga quyidagi route'larni qo'shing yoki yangilang
 
+# Do'kon sahifasidagi energiya takliflari (shop.html): energiya -> narx
+SHOP_ENERGY_OFFERS = {50: 25, 100: 45, 200: 80, 500: 150}
+
 @app.route('/buy_energy', methods=['POST'])
 @login_required
+@write_queue.serialized
 def buy_energy():
     """Energiya sotib olish - YANGILANGAN VERSIYA"""
     try:
@@ -573,34 +1039,37 @@ def buy_energy():
         if not data:
             return jsonify({'success': False, 'error': 'Ma\'lumotlar yetarli emas!'})
         
-        energy_amount = data.get('energy', 0)
-        price = data.get('price', 0)
+        # Narx va miqdor faqat serverdagi ma'lumotdan olinadi: katalogdagi
+        # EnergyPack (pack_id) yoki do'kon sahifasidagi qat'iy takliflar
+        pack_id = data.get('pack_id')
+        if pack_id is not None:
+            pack = catalog_cache.snapshot().energy_pack(pack_id) if isinstance(pack_id, int) else None
+            if pack is None or not pack.is_active:
+                return jsonify({'success': False, 'error': 'Energiya paketi topilmadi!'})
+            energy_amount, price = pack.energy_amount, pack.price
+        else:
+            energy_amount = data.get('energy')
+            price = SHOP_ENERGY_OFFERS.get(energy_amount) if isinstance(energy_amount, int) else None
+            if price is None or data.get('price') != price:
+                return jsonify({'success': False, 'error': 'Energiya miqdori yoki narx noto\'g\'ri!'})
         
-        if not energy_amount or not price:
-            return jsonify({'success': False, 'error': 'Energiya miqdori yoki narx ko\'rsatilmagan!'})
+        if energy_amount <= 0 or price <= 0:
+            return jsonify({'success': False, 'error': 'Energiya miqdori yoki narx noto\'g\'ri!'})
         
-        # Coinlarni tekshirish
-        if current_user.coins < price:
+        # Coinlarni olib tashlash va energiyani qo'shish (maksimum 100) -
+        # coin yetarliligi bazada, bitta UPDATE ichida tekshiriladi
+        if change_balance(current_user, coins=-price, energy=energy_amount, reason='energy') is None:
             return jsonify({'success': False, 'error': f'Coin yetarli emas! Sizda {current_user.coins} coin bor, kerak: {price}'})
         
-        # Coinlarni olib tashlash
-        current_user.coins -= price
-        
-        # Energiyani qo'shish (maksimum 100)
-        new_energy = min(100, current_user.energy + energy_amount)
-        current_user.energy = new_energy
+        db.session.commit()
         
-        # Notification yaratish
-        notification = Notification(
+        # Bildirishnoma commit'dan keyin navbatga qo'yiladi
+        notifier.emit(
             user_id=current_user.id,
             title='⚡ Energiya to\'ldirildi!',
             message=f'Siz {energy_amount} energiya sotib oldingiz! -{price} coin',
-            notification_type='energy',
-            is_read=False
+            notification_type='energy'
         )
-        db.session.add(notification)
-        
-        db.session.commit()
         
         return jsonify({
             'success': True,
@@ -616,19 +1085,18 @@ def buy_energy():
 
 @app.route('/buy_item/<int:item_id>', methods=['POST'])
 @login_required
+@write_queue.serialized
 def buy_item(item_id):
     """Mahsulot sotib olish - YANGILANGAN VERSIYA"""
     try:
-        item = Item.query.get_or_404(item_id)
+        item = catalog_cache.snapshot().item(item_id)
+        if item is None:
+            abort(404)
         
         # Mahsulot faol emasligini tekshirish
         if not item.is_active:
             return jsonify({'success': False, 'error': 'Bu mahsulot hozir mavjud emas!'})
         
-        # Coinlarni tekshirish
-        if current_user.coins < item.price:
-            return jsonify({'success': False, 'error': f'Coin yetarli emas! Sizda {current_user.coins} coin bor, kerak: {item.price}'})
-        
         # Inventarda borligini tekshirish
         existing_item = Inventory.query.filter_by(
             user_id=current_user.id, 
@@ -638,14 +1106,10 @@ def buy_item(item_id):
         if existing_item:
             return jsonify({'success': False, 'error': 'Sizda bu mahsulot allaqachon bor!'})
         
-        # Coinlarni olib tashlash
-        current_user.coins -= item.price
-        
-        # Energiya boost qo'shish
-        new_energy = current_user.energy
-        if item.energy_boost > 0:
-            new_energy = min(100, current_user.energy + item.energy_boost)
-            current_user.energy = new_energy
+        # Coinlarni olib tashlash va energiya boost qo'shish (maksimum 100)
+        if change_balance(current_user, coins=-item.price, energy=max(0, item.energy_boost or 0),
+                          reason=f'item:{item.id}') is None:
+            return jsonify({'success': False, 'error': f'Coin yetarli emas! Sizda {current_user.coins} coin bor, kerak: {item.price}'})
         
         # Inventarga qo'shish
         new_inventory = Inventory(
@@ -655,17 +1119,15 @@ def buy_item(item_id):
         )
         db.session.add(new_inventory)
         
-        # Notification yaratish
-        notification = Notification(
+        db.session.commit()
+        
+        # Bildirishnoma commit'dan keyin navbatga qo'yiladi
+        notifier.emit(
             user_id=current_user.id,
             title='🛍️ Yangi mahsulot!',
             message=f'Siz {item.name} ni {item.price} coinga sotib oldingiz!',
-            notification_type='shop',
-            is_read=False
+            notification_type='shop'
         )
-        db.session.add(notification)
-        
-        db.session.commit()
         
         return jsonify({
             'success': True,
@@ -685,7 +1147,7 @@ def buy_item(item_id):
 def shop():
     """Do'kon sahifasi - YANGILANGAN VERSIYA"""
     try:
-        items = Item.query.filter_by(is_active=True).all()
+        items = catalog_cache.snapshot().active_items
         
         return render_template('shop.html', 
                              user=current_user, 
@@ -726,7 +1188,7 @@ def login():
                     if (today - last_login_date).days == 1:
                         user.streak += 1
                         if user.streak % 7 == 0:
-                            user.coins += 100
+                            change_balance(user, coins=100, reason='streak')
                             flash('7 kunlik ketma-ket tizimga kirish uchun 100 coin mukofoti!', 'success')
                     else:
                         user.streak = 1
@@ -780,12 +1242,53 @@ def register():
         )
         
         db.session.add(new_user)
+        db.session.flush()
+        open_balance(new_user)
         db.session.commit()
         flash('Hisob muvaffaqiyatli yaratildi! Iltimos, tizimga kiring.', 'success')
         return redirect(url_for('login'))
     
     return render_template('register.html')
 
+def load_dashboard_globals():
+    """Dashboard'ning barcha foydalanuvchilar uchun bir xil qismi (keshlanadi)"""
+    snapshot = catalog_cache.snapshot()
+    news_list = News.query.filter_by(status='active').order_by(News.created_at.desc()).limit(3).all()
+
+    all_tasks = snapshot.active_tasks
+    
+    return {
+        'todays_tasks': get_todays_tasks(),
+        'all_tasks': all_tasks,
+        'daily_tasks': tuple(task for task in all_tasks if task.daily_reset),
+        'regular_tasks': snapshot.tasks_of_type('regular'),
+        'quiz_tasks': snapshot.tasks_of_type('quiz'),
+        'news_list': tuple(cache.freeze(news) for news in news_list),
+        'items': snapshot.active_items[:6],
+        'energy_packs': snapshot.active_energy_packs
+    }
+
+def load_dashboard_user_state(user_id, today):
+    """Dashboard'ning foydalanuvchiga xos qismi - bitta so'rov bilan"""
+    rows = db.session.execute(db.text("""
+        SELECT 'task', task_id, NULL, NULL, NULL FROM user_task
+        WHERE user_id = :user_id AND completed = 1
+        UNION ALL
+        SELECT 'progress', NULL, tasks_completed, quizzes_completed, coins_earned FROM daily_progress
+        WHERE user_id = :user_id AND date = :date
+    """), {'user_id': user_id, 'date': today}).fetchall()
+    
+    completed_task_ids = [row[1] for row in rows if row[0] == 'task']
+    daily_progress = None
+    for row in rows:
+        if row[0] == 'progress':
+            daily_progress = {
+                'tasks_completed': row[2] or 0,
+                'quizzes_completed': row[3] or 0,
+                'coins_earned': row[4] or 0
+            }
+    return completed_task_ids, daily_progress
+
 @app.route('/dashboard')
 @login_required
 def dashboard():
@@ -794,48 +1297,19 @@ def dashboard():
     if current_user.role == 'adult':
         return redirect(url_for('dashboard_adult'))
     
-    reset_daily_tasks(current_user.id)
-    
-    todays_tasks = get_todays_tasks()
-    
-    all_tasks = Task.query.filter_by(is_active=True).all()
-    
-    daily_tasks = [task for task in all_tasks if task.daily_reset]
-    regular_tasks = [task for task in all_tasks if task.task_type == 'regular']
-    quiz_tasks = [task for task in all_tasks if task.task_type == 'quiz']
-    
-    news_list = News.query.filter_by(status='active').order_by(News.created_at.desc()).limit(3).all()
-    
-    now = datetime.utcnow()
-    announcements = Announcement.query.filter(
-        Announcement.is_active == True,
-        Announcement.start_date <= now,
-        Announcement.end_date >= now
-    ).order_by(Announcement.created_at.desc()).all()
-    
-    completed_tasks = UserTask.query.filter_by(user_id=current_user.id, completed=True).all()
-    completed_task_ids = [ut.task_id for ut in completed_tasks]
-    
     today = datetime.utcnow().date()
-    daily_progress = DailyProgress.query.filter_by(user_id=current_user.id, date=today).first()
+    shared = dashboard_cache.get(today, load_dashboard_globals)
     
-    items = Item.query.filter_by(is_active=True).limit(6).all()
-    energy_packs = EnergyPack.query.filter_by(is_active=True).all()
+    reset_daily_tasks(current_user, shared['todays_tasks'])
+    completed_task_ids, daily_progress = load_dashboard_user_state(current_user.id, today)
     
     return render_template('dashboard_child.html', 
                          user=current_user, 
-                         todays_tasks=todays_tasks,
-                         daily_tasks=daily_tasks,
-                         regular_tasks=regular_tasks,
-                         quiz_tasks=quiz_tasks,
-                         all_tasks=all_tasks,
-                         news_list=news_list,
-                         announcements=announcements,
-                         items=items, 
-                         energy_packs=energy_packs,
                          completed_task_ids=completed_task_ids,
                          daily_progress=daily_progress,
-                         now=datetime.utcnow())
+                         announcements=announcement_schedule.active(),
+                         now=datetime.utcnow(),
+                         **shared)
 
 # QUIZ ROUTE'LARI
 @app.route('/ml_quiz')
@@ -846,7 +1320,7 @@ def ml_quiz():
     task = None
     
     if task_id:
-        task = Task.query.get(task_id)
+        task = catalog_cache.snapshot().task(task_id)
         if task:
             difficulty = task.difficulty
     
@@ -859,14 +1333,9 @@ def ml_quiz():
 @login_required
 def get_questions():
     try:
-        data = load_questions_from_json()
-        
-        if 'eco_questions' not in data:
-            return jsonify({'success': False, 'error': 'JSON faylda eco_questions topilmadi!'})
+        index = questions.index()
         
-        all_questions = data['eco_questions']
-        
-        if len(all_questions) == 0:
+        if len(index.questions) == 0:
             return jsonify({'success': False, 'error': 'JSON faylda savollar topilmadi!'})
         
         difficulty_filter = request.args.get('difficulty', '').lower()
@@ -882,54 +1351,12 @@ def get_questions():
                 difficulty_filter = 'hard'
         
         if task_id:
-            task = Task.query.get(task_id)
+            task = catalog_cache.snapshot().task(task_id)
             if task:
                 difficulty_filter = task.difficulty
         
-        filtered_questions = []
-        
-        if difficulty_filter:
-            difficulty_mapping = {
-                'easy': ['easy', 'oson', 'oddiy'],
-                'medium': ['medium', 'o\'rta', 'ortacha', 'middle'],
-                'hard': ['hard', 'qiyin', 'murakkab', 'difficult']
-            }
-            
-            target_difficulties = difficulty_mapping.get(difficulty_filter, [difficulty_filter])
-            
-            main_questions = [q for q in all_questions if q.get('difficulty', '').lower() in target_difficulties]
-            
-            if len(main_questions) < 5:
-                remaining_needed = 5 - len(main_questions)
-                
-                if difficulty_filter == 'easy':
-                    additional_questions = [q for q in all_questions if q.get('difficulty', '').lower() in difficulty_mapping['medium']]
-                    additional_questions = additional_questions[:remaining_needed]
-                    main_questions.extend(additional_questions)
-                
-                elif difficulty_filter == 'medium':
-                    medium_count = min(4, len(main_questions))
-                    easy_questions = [q for q in all_questions if q.get('difficulty', '').lower() in difficulty_mapping['easy']]
-                    hard_questions = [q for q in all_questions if q.get('difficulty', '').lower() in difficulty_mapping['hard']]
-                    
-                    additional_easy = easy_questions[:1] if easy_questions else []
-                    additional_hard = hard_questions[:1] if hard_questions else []
-                    
-                    main_questions = main_questions[:medium_count]
-                    main_questions.extend(additional_easy)
-                    main_questions.extend(additional_hard)
-                
-                elif difficulty_filter == 'hard':
-                    additional_questions = [q for q in all_questions if q.get('difficulty', '').lower() in difficulty_mapping['medium']]
-                    additional_questions = additional_questions[:remaining_needed]
-                    main_questions.extend(additional_questions)
-            
-            filtered_questions = main_questions
-            
-            if len(filtered_questions) == 0:
-                filtered_questions = all_questions
-        
-        selected_questions = random.sample(filtered_questions, min(5, len(filtered_questions)))
+        user_exposure = load_exposure(current_user.id)
+        selected_questions = index.sample(difficulty_filter, exposure=user_exposure)
         
         return jsonify({
             'success': True,
@@ -937,6 +1364,7 @@ def get_questions():
             'total': len(selected_questions),
             'difficulty': difficulty_filter,
             'user_level': user_level,
+            'new_questions': sum(1 for q in selected_questions if user_exposure.is_fresh(q)),
             'source': 'ml_questions.json'
         })
         
@@ -945,6 +1373,7 @@ def get_questions():
 
 @app.route('/ml/submit_quiz', methods=['POST'])
 @login_required
+@write_queue.serialized
 def submit_quiz():
     try:
         data = request.get_json()
@@ -973,7 +1402,7 @@ def submit_quiz():
         
         task = None
         if task_id:
-            task = Task.query.get(task_id)
+            task = catalog_cache.snapshot().task(task_id)
             if task:
                 coins_earned += task.reward_coins
                 if task.difficulty == 'easy':
@@ -983,14 +1412,12 @@ def submit_quiz():
                 elif task.difficulty == 'hard':
                     coins_earned += 20
         
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, coins=coins_earned, energy=-energy_cost, reason='quiz') is None:
             return jsonify({
                 'success': False,
                 'error': f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}'
             })
         
-        current_user.coins += coins_earned
-        current_user.energy = max(0, current_user.energy - energy_cost)
         current_user.experience += exp_gained
         
         level_up = check_level_up(current_user)
@@ -1006,12 +1433,9 @@ def submit_quiz():
         )
         
         db.session.add(quiz_result)
+        record_exposure(current_user.id, results, questions.index())
         
-        today = datetime.utcnow().date()
-        daily_progress = DailyProgress.query.filter_by(user_id=current_user.id, date=today).first()
-        if daily_progress:
-            daily_progress.quizzes_completed += 1
-            daily_progress.coins_earned += coins_earned
+        add_daily_progress(current_user.id, quizzes=1, coins=coins_earned)
         
         db.session.commit()
         
@@ -1052,7 +1476,9 @@ def start_task_quiz(task_id):
         flash('Faqat bolalar uchun!', 'error')
         return redirect(url_for('dashboard'))
     
-    task = Task.query.get_or_404(task_id)
+    task = catalog_cache.snapshot().task(task_id)
+    if task is None:
+        abort(404)
     
     if current_user.energy < task.energy_cost:
         flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {task.energy_cost}', 'error')
@@ -1062,49 +1488,53 @@ def start_task_quiz(task_id):
 
 # app.py ga quyidagi hero route'ini qo'shing yoki yangilang
 
+def load_hero_inventory(user_id):
+    """Inventar + Item ma'lumotlari bitta JOIN so'rovi bilan (inventory.py)"""
+    rows = db.session.query(Inventory, Item).join(Item, Inventory.item_id == Item.id).filter(
+        Inventory.user_id == user_id
+    ).order_by(Inventory.id).all()
+    return inventory.HeroInventory.from_rows(rows)
+
+def load_user_stats(user_id):
+    """Hero va profil sahifalari uchun umumiy statistika - bitta so'rov"""
+    row = db.session.execute(db.text("""
+        SELECT
+            (SELECT COUNT(*) FROM user_task WHERE user_id = :user_id AND completed = 1),
+            COUNT(*),
+            COALESCE(SUM(coins_earned), 0)
+        FROM quiz_result WHERE user_id = :user_id
+    """), {'user_id': user_id}).first()
+    return {
+        'total_tasks': row[0],
+        'total_quizzes': row[1],
+        'total_coins_earned': row[2]
+    }
+
 @app.route('/hero')
 @login_required
 def hero():
     """Hero sahifasi - YANGILANGAN VERSIYA"""
     try:
-        # Foydalanuvchining inventaridagi barcha elementlar
-        inventory_items = Inventory.query.filter_by(user_id=current_user.id).all()
-        
-        # Kiyilgan elementlar
-        equipped_items = [item for item in inventory_items if item.equipped]
-        
-        # Turlarga qarab guruhlash
-        clothes_items = [item for item in inventory_items if item.item.item_type == 'clothes']
-        hat_items = [item for item in inventory_items if item.item.item_type == 'hat']
-        shoe_items = [item for item in inventory_items if item.item.item_type == 'shoes']
-        accessory_items = [item for item in inventory_items if item.item.item_type == 'accessory']
-        
-        # Kiyilgan elementlarni alohida guruhlash
-        equipped_clothes = [item for item in clothes_items if item.equipped]
-        equipped_hat = [item for item in hat_items if item.equipped]
-        equipped_shoes = [item for item in shoe_items if item.equipped]
-        equipped_accessory = [item for item in accessory_items if item.equipped]
-        
-        # Statistikalar
-        user_tasks_completed = UserTask.query.filter_by(user_id=current_user.id, completed=True).count()
-        quiz_results_count = QuizResult.query.filter_by(user_id=current_user.id).count()
-        total_coins_earned = db.session.query(func.sum(QuizResult.coins_earned)).filter_by(user_id=current_user.id).scalar() or 0
+        hero_inventory = load_hero_inventory(current_user.id)
+        stats = load_user_stats(current_user.id)
+        by_slot = hero_inventory.by_slot
+        equipped_by_slot = hero_inventory.equipped_by_slot
         
         return render_template('hero.html', 
                              user=current_user,
-                             inventory_items=inventory_items,
-                             equipped_items=equipped_items,
-                             clothes_items=clothes_items,
-                             hat_items=hat_items,
-                             shoe_items=shoe_items,
-                             accessory_items=accessory_items,
-                             equipped_clothes=equipped_clothes,
-                             equipped_hat=equipped_hat,
-                             equipped_shoes=equipped_shoes,
-                             equipped_accessory=equipped_accessory,
-                             user_tasks_completed=user_tasks_completed,
-                             quiz_results_count=quiz_results_count,
-                             total_coins_earned=total_coins_earned)
+                             inventory_items=hero_inventory.items,
+                             equipped_items=hero_inventory.equipped,
+                             clothes_items=by_slot['clothes'],
+                             hat_items=by_slot['hat'],
+                             shoe_items=by_slot['shoes'],
+                             accessory_items=by_slot['accessory'],
+                             equipped_clothes=equipped_by_slot['clothes'],
+                             equipped_hat=equipped_by_slot['hat'],
+                             equipped_shoes=equipped_by_slot['shoes'],
+                             equipped_accessory=equipped_by_slot['accessory'],
+                             user_tasks_completed=stats['total_tasks'],
+                             quiz_results_count=stats['total_quizzes'],
+                             total_coins_earned=stats['total_coins_earned'])
         
     except Exception as e:
         print(f"Hero route xatosi: {str(e)}")
@@ -1113,6 +1543,7 @@ def hero():
 
 @app.route('/equip_item/<int:item_id>', methods=['POST'])
 @login_required
+@write_queue.serialized
 def equip_item(item_id):
     """Elementni kiyish"""
     try:
@@ -1143,6 +1574,7 @@ def equip_item(item_id):
 
 @app.route('/unequip_item/<int:item_id>', methods=['POST'])
 @login_required
+@write_queue.serialized
 def unequip_item(item_id):
     """Elementni echish"""
     try:
@@ -1168,6 +1600,43 @@ def unequip_item(item_id):
         return jsonify({'success': False, 'error': f'Xatolik: {str(e)}'})
 
 # ADMIN ROUTE'LARI
+# ADMIN RO'YXATLARI: FILTRLAR VA KEYSET SAHIFALASH (pagination.py)
+def admin_list_page(query, columns, descending=False, search_column=None, search_ordered=False, date_column=None):
+    """?q= (prefiks qidiruv), ?from=/?to= (sana) va ?after=/?before= kursorlari bo'yicha bitta sahifa.
+
+    search_ordered=True bo'lsa (unikal, indekslangan ustun, masalan username),
+    qidiruv paytida ro'yxat shu ustun bo'yicha tartiblanadi - diapazon indeksdan o'qiladi.
+    """
+    search = request.args.get('q', '').strip()
+    if search and search_column is not None:
+        query = query.filter(pagination.prefix_filter(search_column, search))
+        if search_ordered:
+            columns, descending = [search_column], False
+    
+    if date_column is not None:
+        for arg, compare in (('from', lambda day: date_column >= day),
+                             ('to', lambda day: date_column < day + timedelta(days=1))):
+            try:
+                day = datetime.strptime(request.args.get(arg, ''), '%Y-%m-%d')
+            except ValueError:
+                continue
+            query = query.filter(compare(day))
+    
+    return pagination.paginate(
+        query, columns, descending=descending,
+        after=request.args.get('after'), before=request.args.get('before'),
+        per_page=pagination.per_page_arg(request.args.get('per_page'))
+    )
+
+@app.template_global()
+def url_with_args(**changes):
+    """Joriy sahifa URL'i: so'rov parametrlari saqlanadi, `changes` bilan almashtiriladi"""
+    args = request.args.to_dict()
+    args.pop('after', None)
+    args.pop('before', None)
+    args.update({key: value for key, value in changes.items() if value is not None})
+    return url_for(request.endpoint, **request.view_args, **args)
+
 @app.route('/admin/dashboard')
 @login_required
 def admin_dashboard():
@@ -1175,32 +1644,99 @@ def admin_dashboard():
         flash('Sizga admin huquqi berilmagan!', 'error')
         return redirect(url_for('dashboard'))
     
-    total_users = User.query.count()
-    total_tasks = Task.query.count()
-    total_quiz_results = QuizResult.query.count()
-    total_posts = News.query.count()
-    total_child_users = User.query.filter_by(role='child').count()
-    total_adult_users = User.query.filter_by(role='adult').count()
+    # Hisoblagichlar admin_stats jadvalidan (admin_stats.py)
+    stats = admin_stats.read(db.session, datetime.utcnow().date())
     recent_users = User.query.order_by(User.created_at.desc()).limit(5).all()
     recent_posts = News.query.order_by(News.created_at.desc()).limit(5).all()
     
-    today = datetime.utcnow().date()
-    daily_progress_today = DailyProgress.query.filter_by(date=today).all()
-    total_tasks_today = sum(dp.tasks_completed for dp in daily_progress_today)
-    total_quizzes_today = sum(dp.quizzes_completed for dp in daily_progress_today)
-    
     return render_template('admin_dashboard.html', 
                          user=current_user,
-                         total_users=total_users,
-                         total_tasks=total_tasks,
-                         total_quiz_results=total_quiz_results,
-                         total_posts=total_posts,
-                         total_child_users=total_child_users,
-                         total_adult_users=total_adult_users,
+                         total_users=stats['users'],
+                         total_tasks=stats['tasks'],
+                         total_quiz_results=stats['quiz_results'],
+                         total_posts=stats['posts'],
+                         total_child_users=stats['child_users'],
+                         total_adult_users=stats['adult_users'],
                          recent_users=recent_users,
                          recent_posts=recent_posts,
-                         total_tasks_today=total_tasks_today,
-                         total_quizzes_today=total_quizzes_today)
+                         total_tasks_today=stats['tasks_completed_today'],
+                         total_quizzes_today=stats['quizzes_completed_today'])
+
+@app.route('/admin/stats')
+@login_required
+def admin_stats_api():
+    """Admin paneli hisoblagichlari (JSON) - dashboard shu endpoint'ni so'raydi"""
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'error': 'Admin huquqi yo\'q'})
+    
+    today = datetime.utcnow().date()
+    stats = admin_stats.read(db.session, today)
+    return jsonify({'success': True, 'date': today.isoformat(), 'stats': stats})
+
+@app.route('/admin/grade_answers', methods=['POST'])
+@login_required
+def grade_answers_api():
+    """JSONL (fayl yoki so'rov tanasi) javoblarini fon jarayonida baholashga qo'yish"""
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'error': 'Admin huquqi yo\'q'})
+    
+    max_bytes = app.config['GRADING_MAX_UPLOAD_BYTES']
+    if request.content_length is not None and request.content_length > max_bytes:
+        return jsonify({'success': False, 'error': f'Fayl juda katta (maksimal {max_bytes} bayt)'}), 413
+    if len(grading_jobs.running()) >= grading_jobs.max_running:
+        return jsonify({'success': False, 'error': 'Baholash ishlari band, keyinroq urinib ko\'ring'}), 429
+    
+    try:
+        upload = request.files.get('file')
+        job_id, size = grading_jobs.create(upload.stream if upload else request.stream, max_bytes)
+    except grading.UploadTooLarge:
+        return jsonify({'success': False, 'error': f'Fayl juda katta (maksimal {max_bytes} bayt)'}), 413
+    if not size:
+        grading_jobs.discard(job_id)
+        return jsonify({'success': False, 'error': 'JSONL ma\'lumot yuborilmadi'})
+    
+    workers = grading_workers(request.args.get('workers', type=int))
+    chunk_size = request.args.get('chunk_size', type=int) or app.config['GRADING_CHUNK_SIZE']
+    chunk_size = max(1, min(chunk_size, 10000))
+    try:
+        grading_jobs.start(job_id, [
+            sys.executable, '-m', 'flask', '--app', os.path.join(basedir, 'app.py'), 'grade-answers',
+            grading_jobs.path(job_id, 'jsonl'),
+            '--output', grading_jobs.path(job_id, 'out.jsonl'),
+            '--summary', grading_jobs.path(job_id, 'summary.json'),
+            '--workers', str(workers), '--chunk-size', str(chunk_size),
+        ])
+    except grading.TooManyJobs:
+        grading_jobs.discard(job_id)
+        return jsonify({'success': False, 'error': 'Baholash ishlari band, keyinroq urinib ko\'ring'}), 429
+    except Exception as e:
+        grading_jobs.discard(job_id)
+        return jsonify({'success': False, 'error': str(e)})
+    
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'bytes': size,
+        'workers': workers,
+        'status_url': url_for('grade_answers_status', job_id=job_id),
+    }), 202
+
+@app.route('/admin/grade_answers/<job_id>')
+@login_required
+def grade_answers_status(job_id):
+    """Baholash ishi holati; tugagan bo'lsa ?download=1 natijalarni NDJSON sifatida beradi"""
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'error': 'Admin huquqi yo\'q'})
+    
+    try:
+        status = grading_jobs.status(job_id)
+    except KeyError:
+        return jsonify({'success': False, 'error': 'Baholash ishi topilmadi'}), 404
+    
+    if request.args.get('download') and status['status'] == 'done':
+        return send_file(grading_jobs.path(job_id, 'out.jsonl'), mimetype='application/x-ndjson',
+                         as_attachment=True, download_name=f'grading-{job_id}.jsonl')
+    return jsonify({'success': True, **status})
 
 @app.route('/admin/users')
 @login_required
@@ -1209,8 +1745,17 @@ def admin_users():
         flash('Sizga admin huquqi berilmagan!', 'error')
         return redirect(url_for('dashboard'))
     
-    users = User.query.all()
-    return render_template('admin_users.html', user=current_user, users=users)
+    query = User.query
+    role = request.args.get('role', '').strip()
+    if role:
+        query = query.filter(User.role == role)
+    
+    users = admin_list_page(query, [User.id], search_column=User.username,
+                            search_ordered=True, date_column=User.created_at)
+    stats = admin_stats.read(db.session, datetime.utcnow().date())
+    # Noma'lum rol uchun hisoblagich yo'q - ro'yxat ham bo'sh
+    total_users = stats.get(f'{role}_users', 0) if role else stats['users']
+    return render_template('admin_users.html', user=current_user, users=users, total_users=total_users)
 
 @app.route('/admin/tasks')
 @login_required
@@ -1219,8 +1764,21 @@ def admin_tasks():
         flash('Sizga admin huquqi berilmagan!', 'error')
         return redirect(url_for('dashboard'))
     
-    tasks = Task.query.all()
-    return render_template('admin_tasks.html', user=current_user, tasks=tasks)
+    query = Task.query
+    status = request.args.get('status', '').strip()
+    if status == 'active':
+        query = query.filter(Task.is_active == True)
+    elif status == 'inactive':
+        query = query.filter(Task.is_active == False)
+    
+    tasks = admin_list_page(query, [Task.id], search_column=Task.title, date_column=Task.created_at)
+    
+    # Umumiy hisoblagichlar katalog snapshot'idan (catalog.py)
+    snapshot = catalog_cache.snapshot()
+    return render_template('admin_tasks.html', user=current_user, tasks=tasks,
+                         total_tasks=len(snapshot.tasks_by_id),
+                         active_tasks_count=len(snapshot.active_tasks),
+                         daily_tasks_count=sum(1 for task in snapshot.tasks_by_id.values() if task.daily_reset))
 
 @app.route('/admin/child')
 @login_required
@@ -1229,8 +1787,10 @@ def admin_child():
         flash('Sizga admin huquqi berilmagan!', 'error')
         return redirect(url_for('dashboard'))
     
-    child_users = User.query.filter_by(role='child').all()
-    tasks = Task.query.all()
+    child_users = admin_list_page(User.query.filter(User.role == 'child'), [User.id],
+                                  search_column=User.username, search_ordered=True,
+                                  date_column=User.created_at)
+    tasks = list(catalog_cache.snapshot().tasks_by_id.values())
     return render_template('admin_child.html', user=current_user, child_users=child_users, tasks=tasks)
 
 @app.route('/admin/adult')
@@ -1240,7 +1800,9 @@ def admin_adult():
         flash('Sizga admin huquqi berilmagan!', 'error')
         return redirect(url_for('dashboard'))
     
-    adult_users = User.query.filter_by(role='adult').all()
+    adult_users = admin_list_page(User.query.filter(User.role == 'adult'), [User.id],
+                                  search_column=User.username, search_ordered=True,
+                                  date_column=User.created_at)
     return render_template('admin_adult.html', user=current_user, adult_users=adult_users)
 
 @app.route('/admin/news')
@@ -1250,8 +1812,15 @@ def admin_news():
         flash('Sizga admin huquqi berilmagan!', 'error')
         return redirect(url_for('dashboard'))
     
-    news_list = News.query.order_by(News.created_at.desc()).all()
-    return render_template('admin_news.html', user=current_user, news_list=news_list)
+    query = News.query
+    status = request.args.get('status', '').strip()
+    if status:
+        query = query.filter(News.status == status)
+    
+    news_list = admin_list_page(query, [News.created_at, News.id], descending=True,
+                                search_column=News.title, date_column=News.created_at)
+    total_posts = admin_stats.read(db.session, datetime.utcnow().date())['posts']
+    return render_template('admin_news.html', user=current_user, news_list=news_list, total_posts=total_posts)
 
 @app.route('/admin/announcements')
 @login_required
@@ -1260,24 +1829,30 @@ def admin_announcements():
         flash('Sizga admin huquqi berilmagan!', 'error')
         return redirect(url_for('dashboard'))
     
-    announcements = Announcement.query.order_by(Announcement.created_at.desc()).all()
     now = datetime.utcnow()
-    
-    active_announcements_count = Announcement.query.filter(
-        Announcement.start_date <= now,
-        Announcement.end_date >= now,
-        Announcement.is_active == True
-    ).count()
-    
-    expired_announcements_count = Announcement.query.filter(
-        Announcement.end_date < now
-    ).count()
+    query = Announcement.query
+    status = request.args.get('status', '').strip()
+    if status == 'active':
+        query = query.filter(Announcement.start_date <= now, Announcement.end_date >= now,
+                             Announcement.is_active == True)
+    elif status == 'upcoming':
+        query = query.filter(Announcement.start_date > now)
+    elif status == 'expired':
+        query = query.filter(Announcement.end_date < now)
+    elif status == 'inactive':
+        query = query.filter(Announcement.is_active == False)
+    
+    announcements = admin_list_page(query, [Announcement.created_at, Announcement.id], descending=True,
+                                    search_column=Announcement.title, date_column=Announcement.created_at)
+    
+    schedule = announcement_schedule.snapshot(now)
     
     return render_template('admin_announcements.html', 
                          user=current_user, 
                          announcements=announcements,
-                         active_announcements_count=active_announcements_count,
-                         expired_announcements_count=expired_announcements_count,
+                         total_announcements=schedule.total,
+                         active_announcements_count=schedule.active_count,
+                         expired_announcements_count=schedule.expired_count,
                          datetime=datetime)
 
 @app.route('/admin/daily_tasks')
@@ -1334,6 +1909,7 @@ def add_task():
         )
         db.session.add(new_task)
         db.session.commit()
+        catalog_version.bump()
         return jsonify({'success': True, 'message': 'Topshiriq muvaffaqiyatli qo\'shildi', 'task_id': new_task.id})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
@@ -1387,6 +1963,8 @@ def update_task(task_id):
         task.updated_at = datetime.utcnow()
         
         db.session.commit()
+        replan_daily_tasks()
+        catalog_version.bump()
         return jsonify({'success': True, 'message': 'Topshiriq muvaffaqiyatli yangilandi'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
@@ -1403,6 +1981,8 @@ def delete_task(task_id):
         QuizResult.query.filter_by(task_id=task_id).delete()
         db.session.delete(task)
         db.session.commit()
+        replan_daily_tasks()
+        catalog_version.bump()
         return jsonify({'success': True, 'message': 'Topshiriq muvaffaqiyatli o\'chirildi'})
     
     return jsonify({'success': False, 'error': 'Topshiriq topilmadi'})
@@ -1417,6 +1997,8 @@ def toggle_task(task_id):
     if task:
         task.is_active = not task.is_active
         db.session.commit()
+        replan_daily_tasks()
+        catalog_version.bump()
         status = "faol" if task.is_active else "nofaol"
         return jsonify({'success': True, 'message': f'Topshiriq {status} holatga o\'zgartirildi', 'is_active': task.is_active})
     
@@ -1429,11 +2011,15 @@ def generate_daily_tasks():
         return jsonify({'success': False, 'error': 'Admin huquqi yo\'q'})
     
     try:
-        daily_task = create_daily_tasks()
-        if daily_task:
-            return jsonify({'success': True, 'message': 'Kunlik topshiriqlar yaratildi'})
-        else:
+        data = request.get_json(silent=True) or request.form
+        days = min(max(int(data.get('days') or app.config['DAILY_TASK_PLAN_DAYS']), 1), 365)
+        created = create_daily_tasks(days)
+        if get_todays_tasks() is None:
             return jsonify({'success': False, 'error': 'Yetarli topshiriqlar mavjud emas'})
+        if created:
+            content_version.bump()
+        return jsonify({'success': True, 'message': f'Kunlik topshiriqlar rejalandi: {len(created)} kun',
+                        'created': created})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -1444,11 +2030,39 @@ def manual_daily_reset():
         return jsonify({'success': False, 'error': 'Admin huquqi yo\'q'})
     
     try:
-        daily_reset_system()
-        return jsonify({'success': True, 'message': 'Kunlik yangilanish bajarildi'})
+        stats = daily_reset_system()
+        if stats['already_finished']:
+            return jsonify({'success': True, 'message': 'Kunlik yangilanish bugun allaqachon bajarilgan', 'stats': stats})
+        return jsonify({'success': True, 'message': 'Kunlik yangilanish bajarildi', 'stats': stats})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/admin/perf')
+@login_required
+def admin_perf():
+    """Endpoint'lar bo'yicha p50/p95/p99, SQL va sekin so'rovlar (perf.py)"""
+    if not current_user.is_admin:
+        flash('Sizga admin huquqi berilmagan!', 'error')
+        return redirect(url_for('dashboard'))
+    
+    sort = request.args.get('sort', 'p95_ms')
+    if sort not in ('p50_ms', 'p95_ms', 'p99_ms', 'count', 'errors', 'sql_per_request', 'mean_ms'):
+        sort = 'p95_ms'
+    report = perf_monitor.report(sort=sort)
+    if request.args.get('format') == 'json':
+        return jsonify({'success': True, **report})
+    
+    return render_template('admin_perf.html', user=current_user, report=report, sort=sort)
+
+@app.route('/admin/perf/reset', methods=['POST'])
+@login_required
+def admin_perf_reset():
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'error': 'Admin huquqi yo\'q'})
+    
+    perf_monitor.reset()
+    return jsonify({'success': True, 'message': 'Unumdorlik statistikasi tozalandi'})
+
 # YANGILIK VA E'LON FUNKSIYALARI
 @app.route('/admin/add_news', methods=['POST'])
 @login_required
@@ -1467,6 +2081,7 @@ def add_news():
         )
         db.session.add(new_news)
         db.session.commit()
+        content_version.bump()
         return jsonify({'success': True, 'message': 'Yangilik muvaffaqiyatli qo\'shildi', 'news_id': new_news.id})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
@@ -1493,6 +2108,7 @@ def add_announcement():
         )
         db.session.add(new_announcement)
         db.session.commit()
+        announcement_version.bump()
         return jsonify({'success': True, 'message': 'E\'lon muvaffaqiyatli qo\'shildi', 'announcement_id': new_announcement.id})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
@@ -1507,6 +2123,7 @@ def delete_news(news_id):
     if news:
         db.session.delete(news)
         db.session.commit()
+        content_version.bump()
         return jsonify({'success': True, 'message': 'Yangilik muvaffaqiyatli o\'chirildi'})
     
     return jsonify({'success': False, 'error': 'Yangilik topilmadi'})
@@ -1521,6 +2138,7 @@ def delete_announcement(announcement_id):
     if announcement:
         db.session.delete(announcement)
         db.session.commit()
+        announcement_version.bump()
         return jsonify({'success': True, 'message': 'E\'lon muvaffaqiyatli o\'chirildi'})
     
     return jsonify({'success': False, 'error': 'E\'lon topilmadi'})
@@ -1535,6 +2153,7 @@ def toggle_news(news_id):
     if news:
         news.status = 'archived' if news.status == 'active' else 'active'
         db.session.commit()
+        content_version.bump()
         status = "faol" if news.status == 'active' else "arxiv"
         return jsonify({'success': True, 'message': f'Yangilik {status} holatga o\'zgartirildi', 'status': news.status})
     
@@ -1550,6 +2169,7 @@ def toggle_announcement(announcement_id):
     if announcement:
         announcement.is_active = not announcement.is_active
         db.session.commit()
+        announcement_version.bump()
         status = "faol" if announcement.is_active else "nofaol"
         return jsonify({'success': True, 'message': f'E\'lon {status} holatga o\'zgartirildi', 'is_active': announcement.is_active})
     
@@ -1616,6 +2236,7 @@ def update_news(news_id):
         news.updated_at = datetime.utcnow()
         
         db.session.commit()
+        content_version.bump()
         return jsonify({'success': True, 'message': 'Yangilik muvaffaqiyatli yangilandi'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
@@ -1638,6 +2259,7 @@ def update_announcement(announcement_id):
         announcement.is_active = data.get('is_active', announcement.is_active)
         
         db.session.commit()
+        announcement_version.bump()
         return jsonify({'success': True, 'message': 'E\'lon muvaffaqiyatli yangilandi'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
@@ -1661,6 +2283,7 @@ def add_item():
         )
         db.session.add(new_item)
         db.session.commit()
+        catalog_version.bump()
         return jsonify({'success': True, 'message': 'Mahsulot muvaffaqiyatli qo\'shildi', 'item_id': new_item.id})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
@@ -1683,6 +2306,7 @@ def update_item(item_id):
         item.is_active = data.get('is_active', item.is_active)
         
         db.session.commit()
+        catalog_version.bump()
         return jsonify({'success': True, 'message': 'Mahsulot muvaffaqiyatli yangilandi'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
@@ -1698,6 +2322,7 @@ def delete_item(item_id):
         Inventory.query.filter_by(item_id=item_id).delete()
         db.session.delete(item)
         db.session.commit()
+        catalog_version.bump()
         return jsonify({'success': True, 'message': 'Mahsulot muvaffaqiyatli o\'chirildi'})
     
     return jsonify({'success': False, 'error': 'Mahsulot topilmadi'})
@@ -1719,6 +2344,7 @@ def add_energy_pack():
         )
         db.session.add(new_energy_pack)
         db.session.commit()
+        catalog_version.bump()
         return jsonify({'success': True, 'message': 'Energiya paketi muvaffaqiyatli qo\'shildi'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
@@ -1743,17 +2369,15 @@ def games():
 
 @app.route('/recycle_game')
 @login_required
+@write_queue.serialized
 def recycle_game():
     """Qayta ishlash o'yini"""
     try:
-        # Energiya tekshirish
+        # Energiya tekshirish va olib tashlash - yetarliligi bazada tekshiriladi
         energy_cost = 20
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, energy=-energy_cost, reason='game:recycle_game') is None:
             flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}', 'error')
             return redirect(url_for('games'))
-        
-        # Energiya olib tashlash
-        current_user.energy -= energy_cost
         db.session.commit()
         
         return render_template('recycle_game.html', user=current_user)
@@ -1764,17 +2388,15 @@ def recycle_game():
 
 @app.route('/energy_game')
 @login_required
+@write_queue.serialized
 def energy_game():
     """Energiya tejash o'yini"""
     try:
-        # Energiya tekshirish
+        # Energiya tekshirish va olib tashlash - yetarliligi bazada tekshiriladi
         energy_cost = 10
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, energy=-energy_cost, reason='game:energy_game') is None:
             flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}', 'error')
             return redirect(url_for('games'))
-        
-        # Energiya olib tashlash
-        current_user.energy -= energy_cost
         db.session.commit()
         
         return render_template('energy_game.html', user=current_user)
@@ -1826,15 +2448,14 @@ def eco_puzzle():
 # 1. Hayvonlarni Himoya Qilish
 @app.route('/hayvonlar_himoya')
 @login_required
+@write_queue.serialized
 def hayvonlar_himoya():
     """Hayvonlarni Himoya Qilish o'yini"""
     try:
         energy_cost = 18
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, energy=-energy_cost, reason='game:hayvonlar_himoya') is None:
             flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}', 'error')
             return redirect(url_for('games'))
-        
-        current_user.energy -= energy_cost
         db.session.commit()
         
         return render_template('hayvonlar_himoya.html', user=current_user)
@@ -1846,15 +2467,14 @@ def hayvonlar_himoya():
 # 2. Iqlim O'zgarishi Jasorati
 @app.route('/iqlim_ozgarishi')
 @login_required
+@write_queue.serialized
 def iqlim_ozgarishi():
     """Iqlim O'zgarishi Jasorati o'yini"""
     try:
         energy_cost = 25
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, energy=-energy_cost, reason='game:iqlim_ozgarishi') is None:
             flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}', 'error')
             return redirect(url_for('games'))
-        
-        current_user.energy -= energy_cost
         db.session.commit()
         
         return render_template('iqlim_ozgarishi.html', user=current_user)
@@ -1866,15 +2486,14 @@ def iqlim_ozgarishi():
 # 3. Okean Tozalash
 @app.route('/okean_tozalash')
 @login_required
+@write_queue.serialized
 def okean_tozalash():
     """Okean Tozalash o'yini"""
     try:
         energy_cost = 16
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, energy=-energy_cost, reason='game:okean_tozalash') is None:
             flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}', 'error')
             return redirect(url_for('games'))
-        
-        current_user.energy -= energy_cost
         db.session.commit()
         
         return render_template('okean_tozalash.html', user=current_user)
@@ -1886,15 +2505,14 @@ def okean_tozalash():
 # 4. O'rmon Muhofizchisi
 @app.route('/ormon_muhofizchisi')
 @login_required
+@write_queue.serialized
 def ormon_muhofizchisi():
     """O'rmon Muhofizchisi o'yini"""
     try:
         energy_cost = 20
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, energy=-energy_cost, reason='game:ormon_muhofizchisi') is None:
             flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}', 'error')
             return redirect(url_for('games'))
-        
-        current_user.energy -= energy_cost
         db.session.commit()
         
         return render_template('ormon_muhofizchisi.html', user=current_user)
@@ -1906,15 +2524,14 @@ def ormon_muhofizchisi():
 # 5. Ekologik Shahar Qurish
 @app.route('/ekologik_shahar')
 @login_required
+@write_queue.serialized
 def ekologik_shahar():
     """Ekologik Shahar Qurish o'yini"""
     try:
         energy_cost = 30
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, energy=-energy_cost, reason='game:ekologik_shahar') is None:
             flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}', 'error')
             return redirect(url_for('games'))
-        
-        current_user.energy -= energy_cost
         db.session.commit()
         
         return render_template('ekologik_shahar.html', user=current_user)
@@ -1926,15 +2543,14 @@ def ekologik_shahar():
 # 6. Biodiversitet Sarguzashti
 @app.route('/biodiversitet')
 @login_required
+@write_queue.serialized
 def biodiversitet():
     """Biodiversitet Sarguzashti o'yini"""
     try:
         energy_cost = 14
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, energy=-energy_cost, reason='game:biodiversitet') is None:
             flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}', 'error')
             return redirect(url_for('games'))
-        
-        current_user.energy -= energy_cost
         db.session.commit()
         
         return render_template('biodiversitet.html', user=current_user)
@@ -1946,15 +2562,14 @@ def biodiversitet():
 # 7. Kompost Ustasi
 @app.route('/kompost_ustasi')
 @login_required
+@write_queue.serialized
 def kompost_ustasi():
     """Kompost Ustasi o'yini"""
     try:
         energy_cost = 12
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, energy=-energy_cost, reason='game:kompost_ustasi') is None:
             flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}', 'error')
             return redirect(url_for('games'))
-        
-        current_user.energy -= energy_cost
         db.session.commit()
         
         return render_template('kompost_ustasi.html', user=current_user)
@@ -1966,15 +2581,14 @@ def kompost_ustasi():
 # 8. Solar Energiya Ferma
 @app.route('/solar_energiya')
 @login_required
+@write_queue.serialized
 def solar_energiya():
     """Solar Energiya Ferma o'yini"""
     try:
         energy_cost = 22
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, energy=-energy_cost, reason='game:solar_energiya') is None:
             flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}', 'error')
             return redirect(url_for('games'))
-        
-        current_user.energy -= energy_cost
         db.session.commit()
         
         return render_template('solar_energiya.html', user=current_user)
@@ -1986,15 +2600,14 @@ def solar_energiya():
 # 9. Karbon Izini Kamaytirish
 @app.route('/karbon_kamaytirish')
 @login_required
+@write_queue.serialized
 def karbon_kamaytirish():
     """Karbon Izini Kamaytirish o'yini"""
     try:
         energy_cost = 15
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, energy=-energy_cost, reason='game:karbon_kamaytirish') is None:
             flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}', 'error')
             return redirect(url_for('games'))
-        
-        current_user.energy -= energy_cost
         db.session.commit()
         
         return render_template('karbon_kamaytirish.html', user=current_user)
@@ -2006,15 +2619,14 @@ def karbon_kamaytirish():
 # 10. Havo Sifati Monitor
 @app.route('/havo_sifati')
 @login_required
+@write_queue.serialized
 def havo_sifati():
     """Havo Sifati Monitor o'yini"""
     try:
         energy_cost = 17
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, energy=-energy_cost, reason='game:havo_sifati') is None:
             flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}', 'error')
             return redirect(url_for('games'))
-        
-        current_user.energy -= energy_cost
         db.session.commit()
         
         return render_template('havo_sifati.html', user=current_user)
@@ -2026,15 +2638,14 @@ def havo_sifati():
 # 11. Ekologik Bog'bon
 @app.route('/ekologik_bogbon')
 @login_required
+@write_queue.serialized
 def ekologik_bogbon():
     """Ekologik Bog'bon o'yini"""
     try:
         energy_cost = 19
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, energy=-energy_cost, reason='game:ekologik_bogbon') is None:
             flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}', 'error')
             return redirect(url_for('games'))
-        
-        current_user.energy -= energy_cost
         db.session.commit()
         
         return render_template('ekologik_bogbon.html', user=current_user)
@@ -2046,15 +2657,14 @@ def ekologik_bogbon():
 # 12. Asalari Qutqarish
 @app.route('/asalari_qutqarish')
 @login_required
+@write_queue.serialized
 def asalari_qutqarish():
     """Asalari Qutqarish o'yini"""
     try:
         energy_cost = 21
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, energy=-energy_cost, reason='game:asalari_qutqarish') is None:
             flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}', 'error')
             return redirect(url_for('games'))
-        
-        current_user.energy -= energy_cost
         db.session.commit()
         
         return render_template('asalari_qutqarish.html', user=current_user)
@@ -2066,15 +2676,14 @@ def asalari_qutqarish():
 # 13. Dengiz Korallari Tiklanishi
 @app.route('/korall_tiklanishi')
 @login_required
+@write_queue.serialized
 def korall_tiklanishi():
     """Dengiz Korallari Tiklanishi o'yini"""
     try:
         energy_cost = 23
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, energy=-energy_cost, reason='game:korall_tiklanishi') is None:
             flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}', 'error')
             return redirect(url_for('games'))
-        
-        current_user.energy -= energy_cost
         db.session.commit()
         
         return render_template('korall_tiklanishi.html', user=current_user)
@@ -2086,15 +2695,14 @@ def korall_tiklanishi():
 # 14. Plastikdan Qochish
 @app.route('/plastikdan_qochish')
 @login_required
+@write_queue.serialized
 def plastikdan_qochish():
     """Plastikdan Qochish o'yini"""
     try:
         energy_cost = 11
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, energy=-energy_cost, reason='game:plastikdan_qochish') is None:
             flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}', 'error')
             return redirect(url_for('games'))
-        
-        current_user.energy -= energy_cost
         db.session.commit()
         
         return render_template('plastikdan_qochish.html', user=current_user)
@@ -2106,15 +2714,14 @@ def plastikdan_qochish():
 # 15. Shamol Energiyasi Qo'rg'on
 @app.route('/shamol_energiyasi')
 @login_required
+@write_queue.serialized
 def shamol_energiyasi():
     """Shamol Energiyasi Qo'rg'on o'yini"""
     try:
         energy_cost = 24
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, energy=-energy_cost, reason='game:shamol_energiyasi') is None:
             flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}', 'error')
             return redirect(url_for('games'))
-        
-        current_user.energy -= energy_cost
         db.session.commit()
         
         return render_template('shamol_energiyasi.html', user=current_user)
@@ -2126,15 +2733,14 @@ def shamol_energiyasi():
 # 16. Tropik O'rmonlarni Asrash
 @app.route('/tropik_ormonlar')
 @login_required
+@write_queue.serialized
 def tropik_ormonlar():
     """Tropik O'rmonlarni Asrash o'yini"""
     try:
         energy_cost = 28
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, energy=-energy_cost, reason='game:tropik_ormonlar') is None:
             flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}', 'error')
             return redirect(url_for('games'))
-        
-        current_user.energy -= energy_cost
         db.session.commit()
         
         return render_template('tropik_ormonlar.html', user=current_user)
@@ -2146,15 +2752,14 @@ def tropik_ormonlar():
 # 17. Suv Zaxiralarini Boshqarish
 @app.route('/suv_boshqarish')
 @login_required
+@write_queue.serialized
 def suv_boshqarish():
     """Suv Zaxiralarini Boshqarish o'yini"""
     try:
         energy_cost = 20
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, energy=-energy_cost, reason='game:suv_boshqarish') is None:
             flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}', 'error')
             return redirect(url_for('games'))
-        
-        current_user.energy -= energy_cost
         db.session.commit()
         
         return render_template('suv_boshqarish.html', user=current_user)
@@ -2166,15 +2771,14 @@ def suv_boshqarish():
 # 18. Elektromobilga O'tish
 @app.route('/elektromobil')
 @login_required
+@write_queue.serialized
 def elektromobil():
     """Elektromobilga O'tish o'yini"""
     try:
         energy_cost = 22
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, energy=-energy_cost, reason='game:elektromobil') is None:
             flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}', 'error')
             return redirect(url_for('games'))
-        
-        current_user.energy -= energy_cost
         db.session.commit()
         
         return render_template('elektromobil.html', user=current_user)
@@ -2186,15 +2790,14 @@ def elektromobil():
 # 19. Ekologik Tadbirkor
 @app.route('/ekologik_tadbirkor')
 @login_required
+@write_queue.serialized
 def ekologik_tadbirkor():
     """Ekologik Tadbirkor o'yini"""
     try:
         energy_cost = 35
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, energy=-energy_cost, reason='game:ekologik_tadbirkor') is None:
             flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}', 'error')
             return redirect(url_for('games'))
-        
-        current_user.energy -= energy_cost
         db.session.commit()
         
         return render_template('ekologik_tadbirkor.html', user=current_user)
@@ -2206,15 +2809,14 @@ def ekologik_tadbirkor():
 # 20. Tabiat Fotografchisi
 @app.route('/tabiat_fotografchisi')
 @login_required
+@write_queue.serialized
 def tabiat_fotografchisi():
     """Tabiat Fotografchisi o'yini"""
     try:
         energy_cost = 13
-        if current_user.energy < energy_cost:
+        if change_balance(current_user, energy=-energy_cost, reason='game:tabiat_fotografchisi') is None:
             flash(f'Energiya yetarli emas! Sizda {current_user.energy} energiya bor, kerak: {energy_cost}', 'error')
             return redirect(url_for('games'))
-        
-        current_user.energy -= energy_cost
         db.session.commit()
         
         return render_template('tabiat_fotografchisi.html', user=current_user)
@@ -2235,6 +2837,7 @@ def tabiat_fotografchisi():
 # O'yin natijalarini saqlash API'lari
 @app.route('/game/complete', methods=['POST'])
 @login_required
+@write_queue.serialized
 def complete_game():
     """O'yinni tugatish va mukofotlarni berish"""
     try:
@@ -2244,7 +2847,8 @@ def complete_game():
         coins_earned = data.get('coins_earned', 0)
         
         # Mukofotlarni berish
-        current_user.coins += coins_earned
+        if change_balance(current_user, coins=coins_earned, reason=f'game:{game_type}') is None:
+            return jsonify({'success': False, 'error': 'Coin yetarli emas!'})
         
         # Tajriba qo'shish
         exp_gained = coins_earned // 2
@@ -2265,16 +2869,15 @@ def complete_game():
         
         game_name = game_names.get(game_type, 'O\'yin')
         
-        notification = Notification(
+        db.session.commit()
+        
+        # Bildirishnoma commit'dan keyin navbatga qo'yiladi
+        notifier.emit(
             user_id=current_user.id,
             title='🎮 O\'yin Tugadi!',
             message=f'{game_name}da {score} ball to\'pladingiz! +{coins_earned} coin',
-            notification_type='game',
-            is_read=False
+            notification_type='game'
         )
-        db.session.add(notification)
-        
-        db.session.commit()
         
         return jsonify({
             'success': True,
@@ -2289,41 +2892,135 @@ def complete_game():
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)})
     
+def news_feed_page(after=None, per_page=None, category=None):
+    """Faol yangiliklar lentasi: (created_at, id) bo'yicha keyset sahifa"""
+    query = News.query.filter(News.status == 'active')
+    if category:
+        query = query.filter(News.category == category)
+    return pagination.paginate(
+        query, [News.created_at, News.id], descending=True, after=after,
+        per_page=per_page or app.config['NEWS_FEED_PER_PAGE'],
+    )
+
+def news_views_count(news):
+    """Bazadagi qiymat + worker xotirasida hali yozilmagan ko'rishlar"""
+    return (news.views_count or 0) + news_views.pending(news.id)
+
 @app.route('/news')
 @login_required
 def news():
-    news_list = News.query.filter_by(status='active').order_by(News.created_at.desc()).all()
-    now = datetime.utcnow()
-    active_announcements = Announcement.query.filter(
-        Announcement.start_date <= now,
-        Announcement.end_date >= now,
-        Announcement.is_active == True
-    ).order_by(Announcement.created_at.desc()).all()
-    
+    news_page = news_feed_page(after=request.args.get('after'))
     return render_template('news.html', 
                          user=current_user, 
-                         news_list=news_list, 
-                         announcements=active_announcements)
+                         news_list=news_page.items,
+                         news_page=news_page,
+                         announcements=announcement_schedule.active())
+
+@app.route('/get_news_feed')
+@login_required
+def get_news_feed():
+    try:
+        news_page = news_feed_page(
+            after=request.args.get('after'),
+            per_page=pagination.per_page_arg(request.args.get('per_page'), app.config['NEWS_FEED_PER_PAGE']),
+            category=request.args.get('category') or None,
+        )
+        return jsonify({
+            'success': True,
+            'news': [{
+                'id': n.id,
+                'title': n.title,
+                'summary': n.content[:200],
+                'category': n.category,
+                'image_path': n.image_path,
+                'views_count': news_views_count(n),
+                'created_at': n.created_at.isoformat() if n.created_at else None
+            } for n in news_page],
+            'next_cursor': news_page.next_cursor,
+            'has_next': news_page.has_next
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/news/<int:news_id>')
 @login_required
 def news_detail(news_id):
     news = News.query.get_or_404(news_id)
-    news.views_count += 1
-    db.session.commit()
+    # Yozuv yo'q: ko'rish xotirada yig'iladi va fon oqimida to'plab yoziladi
+    news_views.hit(news.id)
     
-    return render_template('news_detail.html', user=current_user, news=news)
+    return render_template('news_detail.html', user=current_user, news=news,
+                           views_count=news_views_count(news))
+
+def load_ranked_users(entries):
+    """[(rank, user_id, coins)] -> [(rank, User)] bitta IN so'rovi bilan"""
+    user_ids = [user_id for _, user_id, _ in entries]
+    users = {u.id: u for u in User.query.filter(User.id.in_(user_ids)).all()} if user_ids else {}
+    return [(rank, users[user_id]) for rank, user_id, _ in entries if user_id in users]
 
 @app.route('/leaderboard')
 @login_required
 def leaderboard():
-    users = User.query.filter_by(role='child').order_by(User.coins.desc()).limit(20).all()
-    return render_template('leaderboard.html', user=current_user, users=users)
+    page_size = 20
+    page = max(1, request.args.get('page', 1, type=int))
+    
+    child_leaderboard.sync(db.session)
+    total = len(child_leaderboard)
+    my_rank = child_leaderboard.rank(current_user.id)
+    
+    entries = child_leaderboard.page((page - 1) * page_size, page_size)
+    shown_ids = {user_id for _, user_id, _ in entries}
+    neighbour_entries = []
+    if my_rank and current_user.id not in shown_ids:
+        neighbour_entries = child_leaderboard.around(my_rank, 5)
+    
+    ranked_users = load_ranked_users(entries + neighbour_entries)
+    neighbours = ranked_users[len(entries):]
+    ranked_users = ranked_users[:len(entries)]
+    
+    return render_template('leaderboard.html',
+                         user=current_user,
+                         ranked_users=ranked_users,
+                         users=[u for _, u in ranked_users],
+                         neighbours=neighbours,
+                         my_rank=my_rank,
+                         page=page,
+                         total_pages=max(1, (total + page_size - 1) // page_size))
+
+@app.route('/get_leaderboard')
+@login_required
+def get_leaderboard():
+    """Reyting API: ?limit=N (top-N), ?rank=r&radius=k (r-o'rin atrofi)"""
+    try:
+        child_leaderboard.sync(db.session)
+        limit = min(100, max(1, request.args.get('limit', 20, type=int)))
+        radius = min(50, max(0, request.args.get('radius', 5, type=int)))
+        rank = request.args.get('rank', type=int)
+        my_rank = child_leaderboard.rank(current_user.id)
+        
+        if rank:
+            entries = child_leaderboard.around(rank, radius)
+        else:
+            entries = child_leaderboard.top(limit)
+        
+        return jsonify({
+            'success': True,
+            'total': len(child_leaderboard),
+            'my_rank': my_rank,
+            'entries': [{
+                'rank': rank,
+                'user_id': user.id,
+                'username': user.username,
+                'coins': user.coins
+            } for rank, user in load_ranked_users(entries)]
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/missions')
 @login_required
 def missions():
-    regular_tasks = Task.query.filter_by(task_type='regular', is_active=True).all()
+    regular_tasks = catalog_cache.snapshot().tasks_of_type('regular')
     completed_tasks = UserTask.query.filter_by(user_id=current_user.id, completed=True).all()
     completed_task_ids = [ut.task_id for ut in completed_tasks]
     
@@ -2342,12 +3039,8 @@ def stories():
 @app.route('/profile')
 @login_required
 def profile():
-    user_stats = {
-        'total_tasks': UserTask.query.filter_by(user_id=current_user.id, completed=True).count(),
-        'total_quizzes': QuizResult.query.filter_by(user_id=current_user.id).count(),
-        'total_coins_earned': db.session.query(func.sum(QuizResult.coins_earned)).filter_by(user_id=current_user.id).scalar() or 0,
-        'streak_days': current_user.streak
-    }
+    user_stats = load_user_stats(current_user.id)
+    user_stats['streak_days'] = current_user.streak
     
     return render_template('profile.html', user=current_user, user_stats=user_stats)
 
@@ -2404,18 +3097,34 @@ def logout():
 
 # API ROUTE'LARI
 @app.route('/get_user_stats')
+@http_cache.user_etag(db, 'stats')
 @login_required
 def get_user_stats():
     return jsonify({
         'success': True,
         'coins': current_user.coins,
         'energy': current_user.energy,
+        'max_energy': app.config['MAX_ENERGY'],
+        'next_energy_at': next_energy_at(current_user),
         'streak': current_user.streak,
         'level': current_user.level,
         'experience': current_user.experience
     })
 
+@app.route('/stream')
+@login_required
+def stream():
+    """Coin, energiya, daraja va o'qilmagan bildirishnomalar uchun SSE oqimi"""
+    if not live_hub.enabled:
+        abort(404)
+    return Response(
+        live_hub.stream(current_user.id, is_admin=current_user.is_admin),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/get_daily_progress')
+@http_cache.user_etag(db, 'progress')
 @login_required
 def get_daily_progress():
     today = datetime.utcnow().date()
@@ -2438,10 +3147,9 @@ def get_daily_progress():
 
 if __name__ == '__main__':
     init_database()
-    start_daily_scheduler()
+    daily_scheduler.start()
     
-    questions_data = load_questions_from_json()
-    question_count = len(questions_data.get('eco_questions', []))
+    question_count = len(questions.index().questions)
     print(f"📚 ML savollari yuklandi: {question_count} ta savol")
     
     print("\n🎉 EcoVerse tizimi ishga tushdi!")
@@ -0,0 +1,70 @@
+# bench_etag.py - SO'RALADIGAN JSON ENDPOINT'LAR: TO'LIQ JAVOB VA 304 TEZLIGI
+#
+# /get_user_stats, /get_daily_progress va /get_notifications uchun soniyasiga
+# so'rovlar sonini (rps) o'lchaydi:
+#   oldin  - If-None-Match'siz: User yuklanadi, JSON qaytariladi (200)
+#   keyin  - ETag bilan: bitta `SELECT state_version`, tanasiz 304
+# Vaqtinchalik bazada, Flask test client orqali (tarmoqsiz) ishlaydi.
+#
+# Ishga tushirish:
+#   python bench_etag.py
+#   python bench_etag.py --requests 5000 --users 10000 --json
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ENDPOINTS = ['/get_user_stats', '/get_daily_progress', '/get_notifications']
+
+
+def measure(client, path, requests, headers=None, expected=200):
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(path, headers=headers)
+        if response.status_code != expected:
+            raise RuntimeError(f'{path}: kutilgan {expected}, olindi {response.status_code}')
+    seconds = time.perf_counter() - started
+    return round(requests / seconds, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ETag / 304 benchmark')
+    parser.add_argument('--requests', type=int, default=2000, help="har bir o'lchov uchun so'rovlar soni")
+    parser.add_argument('--users', type=int, default=0, help="bazaga qo'shimcha foydalanuvchilar")
+    parser.add_argument('--json', action='store_true', help='natijani JSON ko\'rinishida chiqarish')
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix='ecoverse-bench-')
+    os.environ['ECOVERSE_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+
+    from app import app, db, init_database
+    from query_plans import seed_users
+
+    init_database()
+    if args.users:
+        with app.app_context(), db.engine.begin() as conn:
+            seed_users(conn, args.users)
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'eco_bola', 'password': 'bola123'})
+
+    results = {}
+    for path in ENDPOINTS:
+        etag = client.get(path).headers['ETag']
+        before = measure(client, path, args.requests)
+        after = measure(client, path, args.requests, headers={'If-None-Match': etag}, expected=304)
+        results[path] = {'before_rps': before, 'after_rps': after, 'speedup': round(after / before, 2)}
+
+    if args.json:
+        print(json.dumps({'requests': args.requests, 'users': args.users, 'results': results}, indent=2))
+        return
+
+    print(f"\n{'endpoint':<22}{'oldin (200)':>14}{'keyin (304)':>14}{'tezlashish':>12}")
+    for path, result in results.items():
+        print(f"{path:<22}{result['before_rps']:>14}{result['after_rps']:>14}{result['speedup']:>11}x")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,373 @@
+# bench_load.py - TO'LIQ FOYDALANUVCHI YO'LI BO'YICHA YUKLAMA BENCHMARKI
+#
+# Vaqtinchalik SQLite bazasini yaratadi va `--concurrency` ta parallel
+# oqimda real foydalanuvchi yo'lini (journey) takrorlaydi:
+#
+#   login -> /dashboard -> /ml/get_questions -> /ml/submit_quiz
+#         -> /complete_task -> /buy_item -> /leaderboard
+#
+# Har bir oqimning o'z foydalanuvchisi bor; har bir yo'l yangi sessiya
+# (login) bilan boshlanadi va alohida topshiriq/buyumdan foydalanadi,
+# shuning uchun "allaqachon bajarilgan" kabi mantiqiy rad javoblari
+# o'lchovni buzmaydi. Qadam muvaffaqiyatsiz deb hisoblanadi, agar status
+# kutilganidek bo'lmasa yoki JSON'da {"success": false} bo'lsa.
+#
+# Rejimlar:
+#   (standart)   Flask test client - tarmoqsiz, bitta jarayon;
+#   --gunicorn N gunicorn'ni N worker bilan shu bazada ishga tushirib,
+#                HTTP orqali yuklaydi.
+#
+# Natija JSON: umumiy o'tkazuvchanlik va har bir qadam uchun
+# p50/p95/p99 (ms). `--compare` avvalgi natija bilan p95 farqini chiqaradi.
+#
+# Ishga tushirish:
+#   python bench_load.py --concurrency 4 --journeys 25
+#   python bench_load.py --gunicorn 2 --concurrency 8 --output after.json --compare before.json
+import argparse
+import contextlib
+import http.cookiejar
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+
+STEPS = ['login', 'dashboard', 'get_questions', 'submit_quiz', 'complete_task', 'buy_item', 'leaderboard']
+BENCH_PASSWORD = 'bench123'
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# === Klientlar ===
+class TestClient:
+    """Flask test client (tarmoqsiz)"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, form=None, json_body=None):
+        response = self.client.open(path, method=method, data=form, json=json_body)
+        return response.status_code, response.get_json(silent=True)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpClient:
+    """Cookie'li oddiy HTTP klient (redirect'ga ergashmaydi)"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect())
+
+    def request(self, method, path, form=None, json_body=None):
+        headers, body = {}, None
+        if json_body is not None:
+            body = json.dumps(json_body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        elif form is not None:
+            body = urllib.parse.urlencode(form).encode('utf-8')
+        req = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with self.opener.open(req, timeout=60) as response:
+                status, data = response.status, response.read()
+                content_type = response.headers.get('Content-Type', '')
+        except urllib.error.HTTPError as e:
+            status, data, content_type = e.code, e.read(), e.headers.get('Content-Type', '')
+        if 'json' not in content_type:
+            return status, None
+        try:
+            return status, json.loads(data)
+        except ValueError:
+            return status, None
+
+
+# === Baza ===
+def seed(app, db, users, journeys, extra_users=0):
+    """Benchmark foydalanuvchilari va har bir yo'l uchun alohida topshiriq/buyum"""
+    from sqlalchemy import text
+    from werkzeug.security import generate_password_hash
+
+    import ledger
+    from app import catalog_version, leaderboard_version
+    from query_plans import seed_users
+
+    now = datetime.utcnow()
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+    usernames = [f'load_{i}' for i in range(users)]
+    with app.app_context(), db.engine.begin() as conn:
+        if extra_users:
+            seed_users(conn, extra_users)
+        for username in usernames:
+            user_id = conn.execute(text("""
+                INSERT INTO user (username, email, password_hash, role, coins, energy, streak,
+                                  created_at, is_admin, level, experience, last_energy_update, state_version)
+                VALUES (:username, :email, :password_hash, 'child', :coins, :energy, 0,
+                        :now, 0, 1, 0, :now, 0)
+                RETURNING id
+            """), {'username': username, 'email': f'{username}@ecoverse.com', 'password_hash': password_hash,
+                   'coins': 10 ** 7, 'energy': 10 ** 6, 'now': now}).scalar()
+            ledger.record(conn, user_id, 10 ** 7, 10 ** 6, 'child', coins_delta=10 ** 7, reason='bench')
+
+        task_ids = [conn.execute(text("""
+            INSERT INTO task (title, description, reward_coins, energy_cost, difficulty, quiz_required,
+                              is_active, created_at, updated_at, daily_reset, task_type, category)
+            VALUES (:title, 'benchmark', 1, 1, 'easy', 0, 1, :now, :now, 0, 'regular', 'eco')
+            RETURNING id
+        """), {'title': f'Yuklama topshirig\'i {j}', 'now': now}).scalar() for j in range(journeys)]
+        item_ids = [conn.execute(text("""
+            INSERT INTO item (name, price, item_type, image_path, energy_boost, is_active)
+            VALUES (:name, 1, 'accessory', 'images/hat_green.png', 0, 1)
+            RETURNING id
+        """), {'name': f'Yuklama buyumi {j}'}).scalar() for j in range(journeys)]
+        conn.execute(text('ANALYZE'))
+
+    # Katalog va reyting keshlari yangi qatorlarni ko'rishi uchun
+    catalog_version.bump()
+    leaderboard_version.bump()
+    return usernames, task_ids, item_ids
+
+
+# === Yo'l ===
+class Recorder:
+    def __init__(self):
+        self.samples = {step: [] for step in STEPS}
+        self.errors = {step: 0 for step in STEPS}
+        self.failures = []
+        self._lock = threading.Lock()
+
+    def add(self, step, ms, ok, detail=None):
+        with self._lock:
+            self.samples[step].append(ms)
+            if not ok:
+                self.errors[step] += 1
+                if len(self.failures) < 20:
+                    self.failures.append({'step': step, 'detail': detail})
+
+
+def timed(recorder, step, client, method, path, expected=200, **kwargs):
+    started = time.perf_counter()
+    status, data = client.request(method, path, **kwargs)
+    ms = (time.perf_counter() - started) * 1000
+    ok = status == expected and not (isinstance(data, dict) and data.get('success') is False)
+    detail = None if ok else {'status': status, 'error': (data or {}).get('error') if isinstance(data, dict) else None}
+    recorder.add(step, ms, ok, detail)
+    return data
+
+
+def journey(client, recorder, username, task_id, item_id, rng):
+    timed(recorder, 'login', client, 'POST', '/login', expected=302,
+          form={'username': username, 'password': BENCH_PASSWORD})
+    timed(recorder, 'dashboard', client, 'GET', '/dashboard')
+
+    data = timed(recorder, 'get_questions', client, 'GET', '/ml/get_questions') or {}
+    questions = data.get('questions') or []
+    results = []
+    for question in questions:
+        answer = rng.choice(question.get('options') or [None])
+        results.append({'question_id': question.get('id'), 'question': question.get('question'),
+                        'user_answer': answer, 'is_correct': answer == question.get('correct_answer')})
+    correct = sum(1 for result in results if result['is_correct'])
+    timed(recorder, 'submit_quiz', client, 'POST', '/ml/submit_quiz', json_body={
+        'results': results, 'score': round(100 * correct / len(results)) if results else 0,
+        'correct_count': correct, 'total_questions': len(results), 'difficulty': data.get('difficulty', 'easy'),
+    })
+
+    timed(recorder, 'complete_task', client, 'POST', f'/complete_task/{task_id}')
+    timed(recorder, 'buy_item', client, 'POST', f'/buy_item/{item_id}')
+    timed(recorder, 'leaderboard', client, 'GET', '/leaderboard')
+
+
+def run_load(make_client, usernames, journeys, task_ids, item_ids, seed_value=0):
+    """Har bir foydalanuvchi uchun bitta oqim, har birida `journeys` ta yo'l"""
+    recorder = Recorder()
+    start = threading.Barrier(len(usernames) + 1)
+
+    def worker(index, username):
+        rng = random.Random(seed_value + index)
+        start.wait()
+        for j in range(journeys):
+            journey(make_client(), recorder, username, task_ids[j], item_ids[j], rng)
+
+    threads = [threading.Thread(target=worker, args=(i, username), daemon=True)
+               for i, username in enumerate(usernames)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return recorder, time.perf_counter() - started
+
+
+# === Hisobot ===
+def percentile(sorted_values, q):
+    """Eng yaqin rang (nearest-rank) usulida kvantil"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return round(sorted_values[rank - 1], 2)
+
+
+def summarize(recorder, seconds, args, mode):
+    steps = {}
+    for step in STEPS:
+        values = sorted(recorder.samples[step])
+        steps[step] = {
+            'count': len(values),
+            'errors': recorder.errors[step],
+            'p50_ms': percentile(values, 0.50),
+            'p95_ms': percentile(values, 0.95),
+            'p99_ms': percentile(values, 0.99),
+            'mean_ms': round(sum(values) / len(values), 2) if values else 0.0,
+            'max_ms': round(values[-1], 2) if values else 0.0,
+        }
+    requests = sum(step['count'] for step in steps.values())
+    journeys = args.concurrency * args.journeys
+    return {
+        'commit': git_commit(),
+        'started_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'mode': mode,
+        'concurrency': args.concurrency,
+        'journeys': journeys,
+        'extra_users': args.extra_users,
+        'seconds': round(seconds, 3),
+        'journeys_per_second': round(journeys / seconds, 2) if seconds else 0.0,
+        'requests_per_second': round(requests / seconds, 1) if seconds else 0.0,
+        'errors': sum(step['errors'] for step in steps.values()),
+        'steps': steps,
+        'failures': recorder.failures,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def print_table(result, baseline=None):
+    print(f"\n{result['mode']}: {result['concurrency']} oqim, {result['journeys']} yo'l, "
+          f"{result['seconds']} s - {result['journeys_per_second']} yo'l/s, "
+          f"{result['requests_per_second']} so'rov/s, xatolar: {result['errors']}")
+    header = f"{'qadam':<16}{'soni':>7}{'xato':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header + (f"{'p95 oldin':>11}{'farq':>9}" if baseline else ''))
+    for step, stats in result['steps'].items():
+        line = (f"{step:<16}{stats['count']:>7}{stats['errors']:>6}"
+                f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+        before = (baseline or {}).get('steps', {}).get(step)
+        if before and before['p95_ms']:
+            change = (stats['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+            line += f"{before['p95_ms']:>11}{change:>+8.1f}%"
+        print(line)
+
+
+# === Server ===
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(workers, threads, database_uri):
+    port = free_port()
+    env = dict(os.environ, ECOVERSE_DATABASE_URI=database_uri)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--threads', str(threads),
+         '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'app:app'],
+        cwd=BASE_DIR, env=env)
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn ishga tushmadi (kod {process.returncode})')
+        try:
+            urllib.request.urlopen(url + '/login', timeout=2).close()
+            return process, url
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn 60 soniyada javob bermadi')
+
+
+def run(args):
+    """Bazani tayyorlash, yuklash va natijani qaytarish"""
+    tmp_dir = tempfile.mkdtemp(prefix='ecoverse-load-')
+    database_uri = f"sqlite:///{os.path.join(tmp_dir, 'load.db')}"
+    os.environ['ECOVERSE_DATABASE_URI'] = database_uri
+
+    from app import app, db, init_database
+
+    journeys_total = args.warmup + args.journeys
+    init_database()
+    usernames, task_ids, item_ids = seed(app, db, args.concurrency, journeys_total, args.extra_users)
+
+    server = url = None
+    mode = 'test_client'
+    if args.gunicorn:
+        server, url = start_gunicorn(args.gunicorn, args.threads, database_uri)
+        mode = f'gunicorn x{args.gunicorn} ({args.threads} oqim)'
+
+    def make_client():
+        return HttpClient(url) if url else TestClient(app)
+
+    try:
+        if args.warmup:
+            run_load(make_client, usernames, args.warmup, task_ids, item_ids, args.seed)
+        recorder, seconds = run_load(make_client, usernames, args.journeys,
+                                     task_ids[args.warmup:], item_ids[args.warmup:], args.seed)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    return summarize(recorder, seconds, args, mode)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="To'liq foydalanuvchi yo'li bo'yicha yuklama benchmarki")
+    parser.add_argument('--concurrency', type=int, default=4, help="parallel oqimlar (foydalanuvchilar) soni")
+    parser.add_argument('--journeys', type=int, default=20, help="har bir oqimdagi yo'llar soni")
+    parser.add_argument('--warmup', type=int, default=1, help="o'lchovdan oldingi yo'llar (har bir oqimda)")
+    parser.add_argument('--extra-users', type=int, default=0, help="bazaga qo'shimcha fon foydalanuvchilari")
+    parser.add_argument('--gunicorn', type=int, metavar='WORKERS', help='gunicorn bilan HTTP orqali yuklash')
+    parser.add_argument('--threads', type=int, default=4, help="gunicorn worker'idagi oqimlar")
+    parser.add_argument('--seed', type=int, default=0, help='tasodifiy javoblar uchun seed')
+    parser.add_argument('--output', help='JSON natijani faylga yozish')
+    parser.add_argument('--compare', help="avvalgi JSON natija bilan p95 ni solishtirish")
+    parser.add_argument('--json', action='store_true', help="JSON'ni stdout'ga chiqarish")
+    args = parser.parse_args()
+
+    # --json rejimida stdout faqat natija uchun: ilova xabarlari stderr'ga
+    with contextlib.redirect_stdout(sys.stderr if args.json else sys.stdout):
+        result = run(args)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    else:
+        baseline = None
+        if args.compare:
+            with open(args.compare, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        print_table(result, baseline)
+    return 1 if result['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
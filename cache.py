@@ -0,0 +1,107 @@
+# cache.py - JARAYON ICHIDAGI KESH VA WORKER'LARARO VERSIYA BELGILARI
+#
+# VersionStamp - instance/ papkasidagi kichik fayl ichidagi hisoblagich.
+#   Admin yozuvi commit qilingandan keyin bump() chaqiriladi; barcha
+#   gunicorn worker'lari keyingi so'rovda yangi versiyani ko'radi va
+#   keshni qayta yuklaydi. SQL so'rovi talab qilinmaydi. bump() o'qish va
+#   yozishni `.lock` fayli ustidagi flock bilan o'raydi - parallel admin
+#   yozuvlari bir xil versiyani chiqarib, invalidatsiyani yo'qotmaydi.
+# TTLCache     - versiya + muddat (TTL) bo'yicha eskiradigan kesh.
+# freeze()     - ORM obyektidan o'zgarmas (namedtuple) nusxa; session
+#   yopilgandan keyin ham xavfsiz o'qiladi.
+import fcntl
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+from sqlalchemy import inspect as sa_inspect
+
+
+class VersionStamp:
+    """Worker'lar o'rtasida bo'lishiladigan versiya hisoblagichi"""
+
+    def __init__(self, directory, name):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f'{name}.version')
+        self.lock_path = self.path + '.lock'
+
+    def get(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return int(f.read() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def bump(self):
+        """Versiyani oshirish. Commit'dan KEYIN chaqirilishi kerak."""
+        # Versiya fayli os.replace bilan almashtiriladi, shuning uchun
+        # qulf alohida (o'zgarmas) faylda turadi
+        with open(self.lock_path, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                version = self.get() + 1
+                directory = os.path.dirname(self.path)
+                fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.version-')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(str(version))
+                os.replace(tmp_path, self.path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        return version
+
+
+class TTLCache:
+    """Kalit bo'yicha kesh: TTL tugasa yoki versiya belgilari o'zgarsa eskiradi"""
+
+    def __init__(self, ttl, *stamps):
+        self.ttl = ttl
+        self.stamps = stamps
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def versions(self):
+        return tuple(stamp.get() for stamp in self.stamps)
+
+    def get(self, key, loader):
+        versions = self.versions()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == versions and entry[1] > time.monotonic():
+            self.hits += 1
+            return entry[2]
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == versions and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+            value = loader()
+            now = time.monotonic()
+            entries = {k: e for k, e in self._entries.items() if e[0] == versions and e[1] > now}
+            entries[key] = (versions, now + self.ttl, value)
+            self._entries = entries
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+
+_record_types = {}
+
+
+def freeze(instance):
+    """ORM obyektining ustunlaridan o'zgarmas nusxa (namedtuple)"""
+    if instance is None:
+        return None
+    mapper = sa_inspect(instance).mapper
+    record_type = _record_types.get(mapper.class_)
+    if record_type is None:
+        fields = [attr.key for attr in mapper.column_attrs]
+        record_type = namedtuple(f'{mapper.class_.__name__}Record', fields)
+        _record_types[mapper.class_] = record_type
+    return record_type(*(getattr(instance, field) for field in record_type._fields))
@@ -0,0 +1,85 @@
+# catalog.py - TASK, ITEM VA ENERGYPACK UCHUN VERSIYALANGAN KATALOG KESHI
+#
+# Bu jadvallar faqat admin route'lari orqali o'zgaradi, lekin har bir
+# so'rovda o'qiladi. Catalog butun katalogni o'zgarmas snapshot sifatida
+# xotirada saqlaydi: id, tur (type) va kategoriya bo'yicha qidiruv O(1).
+# Admin yozuvi commit qilingandan keyin catalog_version.bump() chaqiriladi;
+# har bir worker keyingi so'rovda versiya o'zgarganini ko'rib, snapshot'ni
+# qayta yuklaydi.
+import threading
+from collections import defaultdict
+from types import MappingProxyType
+
+from cache import freeze
+
+
+def _group(records, key):
+    groups = defaultdict(list)
+    for record in records:
+        groups[getattr(record, key)].append(record)
+    return MappingProxyType({name: tuple(group) for name, group in groups.items()})
+
+
+class CatalogSnapshot:
+    """Katalogning bir versiyasi. Yaratilgandan keyin o'zgarmaydi."""
+
+    def __init__(self, version, tasks, items, energy_packs):
+        self.version = version
+        tasks = tuple(sorted((freeze(task) for task in tasks), key=lambda t: t.id))
+        items = tuple(sorted((freeze(item) for item in items), key=lambda i: i.id))
+        energy_packs = tuple(sorted((freeze(pack) for pack in energy_packs), key=lambda p: p.id))
+
+        self.tasks_by_id = MappingProxyType({task.id: task for task in tasks})
+        self.items_by_id = MappingProxyType({item.id: item for item in items})
+        self.energy_packs_by_id = MappingProxyType({pack.id: pack for pack in energy_packs})
+
+        self.active_tasks = tuple(task for task in tasks if task.is_active)
+        self.active_items = tuple(item for item in items if item.is_active)
+        self.active_energy_packs = tuple(pack for pack in energy_packs if pack.is_active)
+
+        self.active_tasks_by_type = _group(self.active_tasks, 'task_type')
+        self.active_tasks_by_category = _group(self.active_tasks, 'category')
+        self.active_items_by_type = _group(self.active_items, 'item_type')
+
+    def task(self, task_id):
+        return self.tasks_by_id.get(task_id)
+
+    def item(self, item_id):
+        return self.items_by_id.get(item_id)
+
+    def energy_pack(self, pack_id):
+        return self.energy_packs_by_id.get(pack_id)
+
+    def tasks_of_type(self, task_type):
+        return self.active_tasks_by_type.get(task_type, ())
+
+    def tasks_in_category(self, category):
+        return self.active_tasks_by_category.get(category, ())
+
+    def items_of_type(self, item_type):
+        return self.active_items_by_type.get(item_type, ())
+
+
+class Catalog:
+    """Versiya belgisi o'zgarganda snapshot'ni qayta yuklovchi kesh"""
+
+    def __init__(self, stamp, loader):
+        # loader() -> (tasks, items, energy_packs) ORM obyektlari ro'yxatlari
+        self.stamp = stamp
+        self.loader = loader
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        version = self.stamp.get()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version:
+                tasks, items, energy_packs = self.loader()
+                snapshot = CatalogSnapshot(version, tasks, items, energy_packs)
+                self._snapshot = snapshot
+            return snapshot
@@ -0,0 +1,154 @@
+# daily_plan.py - KUNLIK TOPSHIRIQLAR JADVALI: OLDINDAN REJALASH VA KESH
+#
+# Avval har bir dashboard so'rovi `daily_task` jadvalini o'qib, task_1 ..
+# quiz_1 ni birma-bir (lazy) yuklardi. Yarim tunda esa har bir worker
+# create_daily_tasks() ni chaqirib, unikal `date` ustunida to'qnashardi.
+#
+# DailyTaskPlanner:
+#   - generate(start, days) - `days` kunlik jadvalni bitta tranzaksiyada
+#     yaratadi. Faol daily/quiz topshiriqlar bitta so'rov bilan olinadi,
+#     mavjud kunlar o'tkaziladi, qolganlari bitta INSERT OR IGNORE
+#     (executemany) bilan yoziladi. Parallel chaqiruvlar xavfsiz: birinchi
+#     yozilgan reja qoladi, hamma uni o'qiydi;
+#   - get(day) - kun rejasini to'rtta topshirig'i bilan `loader(day)`
+#     orqali (bitta JOIN so'rov) yuklab, jarayon ichidagi keshda sana
+#     bo'yicha saqlaydi. Reja yo'q bo'lsa avval generate() chaqiriladi.
+#   - prune(start, end) - topshirig'i o'chirilgan, nofaol qilingan yoki
+#     turi o'zgargan rejalarni o'chiradi; ular keyingi generate()/get() da
+#     qayta rejalanadi. Admin topshiriqni o'zgartirgandan keyin va loader
+#     yaroqsiz rejani rad etganda chaqiriladi.
+# Topshiriqlar matni o'zgarsa, kesh versiya belgisi (catalog_version)
+# bilan eskiradi.
+import random
+import threading
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+
+DEFAULT_CONFIG = {
+    'DAILY_TASK_PLAN_DAYS': 7,
+}
+
+DAILY_TASKS_PER_DAY = 3
+
+# Rejadagi ustun -> kerakli topshiriq turi
+_PLAN_COLUMNS = (('task_1_id', 'daily'), ('task_2_id', 'daily'), ('task_3_id', 'daily'), ('quiz_1_id', 'quiz'))
+
+_PRUNE_SQL = text("""
+    DELETE FROM daily_task
+    WHERE date BETWEEN :start AND :end AND ({})
+    RETURNING date
+""".format(' OR '.join(
+    f"NOT EXISTS (SELECT 1 FROM task WHERE task.id = daily_task.{column} "
+    f"AND task.is_active = 1 AND task.task_type = '{task_type}')"
+    for column, task_type in _PLAN_COLUMNS
+)))
+
+
+class DailyTaskPlanner:
+    """Kunlik topshiriqlarni oldindan rejalash va kunlik rejani keshlash"""
+
+    def __init__(self, app=None, db=None, loader=None, stamp=None):
+        # loader(day) -> {'daily_tasks': (...), 'daily_quiz': ...} yoki None
+        self.loader = loader
+        self.stamp = stamp
+        self.engine = None
+        self._entries = {}
+        self._lock = threading.Lock()
+        if app is not None and db is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        for key, value in DEFAULT_CONFIG.items():
+            app.config.setdefault(key, value)
+        self.plan_days = app.config['DAILY_TASK_PLAN_DAYS']
+        with app.app_context():
+            self.engine = db.engine
+
+    # --- Rejalash ---
+    def generate(self, start, days=None, rng=random):
+        """`start` dan boshlab `days` kun uchun yo'q rejalarni yaratish.
+
+        Yaratilgan sanalar ro'yxatini qaytaradi (topshiriqlar yetmasa bo'sh).
+        """
+        days = days or self.plan_days
+        end = start + timedelta(days=days - 1)
+        with self.engine.begin() as conn:
+            rows = conn.execute(text("""
+                SELECT id, task_type FROM task
+                WHERE is_active = 1 AND task_type IN ('daily', 'quiz')
+                ORDER BY id
+            """)).fetchall()
+            daily_ids = [row.id for row in rows if row.task_type == 'daily']
+            quiz_ids = [row.id for row in rows if row.task_type == 'quiz']
+            if len(daily_ids) < DAILY_TASKS_PER_DAY or not quiz_ids:
+                return []
+
+            existing = {row[0] for row in conn.execute(text(
+                'SELECT date FROM daily_task WHERE date BETWEEN :start AND :end'
+            ), {'start': start.isoformat(), 'end': end.isoformat()})}
+            now = datetime.utcnow()
+            plans = []
+            for offset in range(days):
+                day = (start + timedelta(days=offset)).isoformat()
+                if day in existing:
+                    continue
+                task_ids = rng.sample(daily_ids, DAILY_TASKS_PER_DAY)
+                plans.append({'date': day, 'task_1_id': task_ids[0], 'task_2_id': task_ids[1],
+                              'task_3_id': task_ids[2], 'quiz_1_id': rng.choice(quiz_ids),
+                              'created_at': now})
+            if plans:
+                conn.execute(text("""
+                    INSERT OR IGNORE INTO daily_task
+                        (date, task_1_id, task_2_id, task_3_id, quiz_1_id, created_at)
+                    VALUES (:date, :task_1_id, :task_2_id, :task_3_id, :quiz_1_id, :created_at)
+                """), plans)
+        return [plan['date'] for plan in plans]
+
+    def prune(self, start, end=None):
+        """`start` .. `end` (standart - cheksiz) oralig'idagi yaroqsiz rejalarni o'chirish.
+
+        O'chirilgan sanalar ro'yxatini qaytaradi.
+        """
+        pruned = self._prune(start, end or date.max)
+        if pruned:
+            self.clear()
+        return pruned
+
+    def _prune(self, start, end):
+        with self.engine.begin() as conn:
+            return sorted(str(row[0]) for row in conn.execute(
+                _PRUNE_SQL, {'start': start.isoformat(), 'end': end.isoformat()}
+            ))
+
+    # --- Kunlik reja ---
+    def get(self, day):
+        """`day` rejasi (keshdan); rejalashning iloji bo'lmasa None"""
+        version = self.stamp.get() if self.stamp is not None else 0
+        entry = self._entries.get(day)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        with self._lock:
+            entry = self._entries.get(day)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+            plan = self.loader(day)
+            if plan is None:
+                # Reja tugagan yoki yaroqsiz: qayta yaratish (yoki boshqa
+                # jarayon yaratganini o'qish)
+                self._prune(day, day)
+                self.generate(day)
+                plan = self.loader(day)
+            # Reja tuzib bo'lmasa (topshiriqlar yetmaydi) None ham keshlanadi:
+            # aks holda har bir dashboard so'rovi DELETE/INSERT bajarardi.
+            # Katalog o'zgarsa (catalog_version) qayta uriniladi.
+            # Faqat kechagi va keyingi kunlar qoladi
+            entries = {d: e for d, e in self._entries.items() if d >= day - timedelta(days=1)}
+            entries[day] = (version, plan)
+            self._entries = entries
+            return plan
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
@@ -0,0 +1,48 @@
+# daily_reset.py - KUNLIK YANGILANISH: FAQAT KUNGA BOG'LIQ ISHLAR
+#
+# Yarim tunda foydalanuvchilar jadvali umuman ko'rib chiqilmaydi, shuning
+# uchun ishning narxi foydalanuvchilar soniga bog'liq emas:
+#   - energiya vaqt bo'yicha tiklanadi va faqat foydalanuvchi harakat
+#     qilganda yoziladi (energy_regen.py);
+#   - user_task qatorlari foydalanuvchining o'sha kungi birinchi
+#     so'rovida yangilanadi (reset_daily_tasks);
+#   - DailyProgress qatori topshiriq yoki test bajarilganda yaratiladi;
+#     qator yo'q bo'lsa o'qiydigan joylar nol progress ko'rsatadi.
+# `daily_reset_run` jadvalida kun bajarilgani belgilanadi, shuning uchun
+# qo'lda qayta chaqirish hech narsa qilmaydi.
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+
+
+def run_daily_reset(engine, day):
+    """`day` sanasi uchun kunlik yangilanishni belgilash.
+
+    Statistikani qaytaradi: sana, allaqachon bajarilganmi va vaqt.
+    """
+    started = time.perf_counter()
+    stats = {'date': day.isoformat(), 'already_finished': False}
+
+    with engine.begin() as conn:
+        run = conn.execute(
+            text('SELECT finished_at FROM daily_reset_run WHERE date = :date'),
+            {'date': day}
+        ).first()
+        now = datetime.utcnow()
+        if run is None:
+            conn.execute(text("""
+                INSERT INTO daily_reset_run (date, started_at, finished_at)
+                VALUES (:date, :now, :now)
+            """), {'date': day, 'now': now})
+        elif run.finished_at is not None:
+            stats['already_finished'] = True
+        else:
+            # Eski (bo'laklab ishlaydigan) versiyadan chala qolgan yozuv
+            conn.execute(
+                text('UPDATE daily_reset_run SET finished_at = :now WHERE date = :date'),
+                {'now': now, 'date': day}
+            )
+
+    stats['seconds'] = round(time.perf_counter() - started, 3)
+    return stats
@@ -0,0 +1,133 @@
+# db_engine.py - SQLITE PARALLEL ISHLASH REJIMI
+#
+# 1. Har bir yangi ulanishda app.config dagi PRAGMA'lar o'rnatiladi
+#    (WAL, synchronous=NORMAL, busy_timeout, mmap, cache_size).
+# 2. WriteQueue - yozuvchi route'lar uchun jarayon ichidagi navbat:
+#    bitta worker ichidagi yozuvlar ketma-ket bajariladi, SQLite
+#    "database is locked" qaytarsa, route orqaga qaytarilib, kutish
+#    vaqti oshib boruvchi (backoff) qayta urinish bilan bajariladi.
+#    Navbat faqat birinchi commit'gacha ushlanadi: commit'dan keyin qulf
+#    bo'shatiladi (shablon render qilinishi navbatni to'xtatmaydi) va
+#    keyingi qulf xatolari route'ni qayta ishga tushirmaydi - aks holda
+#    commit qilingan yozuvlar (energiya, bildirishnomalar) takrorlanardi.
+import random
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from flask import g, has_request_context
+from sqlalchemy import event
+
+DEFAULT_CONFIG = {
+    'SQLITE_JOURNAL_MODE': 'WAL',
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    'SQLITE_BUSY_TIMEOUT_MS': 5000,
+    'SQLITE_MMAP_SIZE': 256 * 1024 * 1024,
+    'SQLITE_CACHE_SIZE_KB': 64 * 1024,
+    'WRITE_RETRY_ATTEMPTS': 5,
+    'WRITE_RETRY_BASE_DELAY': 0.05,
+}
+
+
+def is_locked_error(exc):
+    """SQLite yozish qulfi bilan bog'liq xatolikmi"""
+    message = str(exc).lower()
+    return isinstance(exc, sqlite3.OperationalError) and ('locked' in message or 'busy' in message)
+
+
+def sqlite_pragmas(config):
+    """Har bir ulanishda bajariladigan PRAGMA'lar ro'yxati"""
+    return [
+        f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+        f"PRAGMA cache_size={-int(config['SQLITE_CACHE_SIZE_KB'])}",
+    ]
+
+
+class WriteQueue:
+    """Yozuvchi route'larni ketma-ketlashtirish va qulf xatosida qayta urinish"""
+
+    def __init__(self, app=None, db=None):
+        self.db = None
+        self._lock = threading.Lock()
+        self.retries = 0
+        if app is not None and db is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        for key, value in DEFAULT_CONFIG.items():
+            app.config.setdefault(key, value)
+        self.db = db
+        self.attempts = app.config['WRITE_RETRY_ATTEMPTS']
+        self.base_delay = app.config['WRITE_RETRY_BASE_DELAY']
+
+        with app.app_context():
+            engine = db.engine
+
+        if engine.dialect.name != 'sqlite':
+            return
+
+        pragmas = sqlite_pragmas(app.config)
+        in_memory = engine.url.database in (None, '', ':memory:')
+
+        @event.listens_for(engine, 'connect')
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                if in_memory and ('journal_mode' in pragma or 'mmap_size' in pragma):
+                    continue
+                cursor.execute(pragma)
+            cursor.close()
+
+        @event.listens_for(engine, 'handle_error')
+        def mark_locked(context):
+            if (has_request_context() and not g.get('sqlite_committed')
+                    and is_locked_error(context.original_exception)):
+                g.sqlite_locked = True
+
+        @event.listens_for(db.session, 'after_commit')
+        def release_after_commit(session):
+            if has_request_context() and g.get('write_lock_held'):
+                g.sqlite_committed = True
+                g.sqlite_locked = False
+                self._release()
+
+    def _release(self):
+        g.write_lock_held = False
+        self._lock.release()
+
+    def serialized(self, view):
+        """Route'ni yozish navbati orqali bajarish.
+
+        Route o'zi xatolikni ushlab `success: False` qaytargan bo'lsa ham,
+        commit'dan OLDINGI qulf xatosi `handle_error` hodisasi orqali
+        aniqlanadi va route qaytadan ishga tushiriladi. Navbat qulfi
+        birinchi commit'da (after_commit) bo'shatiladi.
+        """
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            response = None
+            for attempt in range(self.attempts):
+                self._lock.acquire()
+                g.write_lock_held = True
+                g.sqlite_committed = False
+                g.sqlite_locked = False
+                try:
+                    response = view(*args, **kwargs)
+                    if not g.sqlite_locked:
+                        return response
+                    self.db.session.rollback()
+                finally:
+                    if g.get('write_lock_held'):
+                        self._release()
+
+                self.retries += 1
+                delay = self.base_delay * (2 ** attempt)
+                time.sleep(delay + random.uniform(0, delay))
+                print(f"⏳ {view.__name__}: baza band, qayta urinish {attempt + 1}/{self.attempts}")
+            return response
+
+        return wrapper
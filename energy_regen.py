@@ -0,0 +1,75 @@
+# energy_regen.py - ENERGIYANING VAQT BO'YICHA TIKLANISHI (LAZY REGEN)
+#
+# Energiya endi yarim tunda barcha foydalanuvchilarga qo'shilmaydi.
+# Bazada saqlangan qiymat (user.energy) va u oxirgi marta hisoblangan
+# vaqt (user.last_energy_update) turadi; joriy energiya o'qilganda
+# hisoblanadi:
+#
+#     energy + (now - last_energy_update) // regen_seconds   (<= max_energy)
+#
+# Bazaga faqat foydalanuvchi harakat qilganda yoziladi (ledger.apply):
+# o'sha shartli UPDATE ichida tiklangan energiya qo'shiladi va vaqt
+# belgisi to'liq tiklangan birliklar soniga suriladi - qisman to'plangan
+# vaqt yo'qolmaydi. Energiya to'la bo'lsa soat to'xtaydi: belgi sarflash
+# paytiga qo'yiladi.
+#
+# Hisob ikki ko'rinishda bir xil: Python (current, materialize) va SQL
+# ifodasi (CURRENT_SQL) - ETag, SSE holati va atomar sarflash qiymatni
+# bazaning o'zida hisoblaydi.
+from datetime import timedelta
+
+MAX_ENERGY = 100
+# 1728 soniya = kuniga 50 energiya (avvalgi kunlik to'ldirish bilan teng)
+REGEN_SECONDS = 1728
+
+_ELAPSED_SQL = 'ROUND((julianday(:now) - julianday(last_energy_update)) * 86400.0, 3)'
+_UNITS_SQL = f'MAX(0, CAST({_ELAPSED_SQL} / :regen_seconds AS INTEGER))'
+
+# `user` qatoridagi joriy energiya; parametrlar: :now, :max_energy, :regen_seconds
+CURRENT_SQL = f"""(CASE
+    WHEN last_energy_update IS NULL OR COALESCE(energy, 0) >= :max_energy THEN COALESCE(energy, 0)
+    ELSE MIN(:max_energy, COALESCE(energy, 0) + {_UNITS_SQL})
+END)"""
+
+
+def anchor_sql(new_energy_sql):
+    """Yangi energiya yozilganda last_energy_update uchun SQL ifoda"""
+    return f"""(CASE
+    WHEN last_energy_update IS NULL OR {CURRENT_SQL} >= :max_energy
+         OR {new_energy_sql} >= :max_energy THEN :now
+    ELSE strftime('%Y-%m-%d %H:%M:%f',
+                  julianday(last_energy_update) + {_UNITS_SQL} * :regen_seconds / 86400.0)
+END)"""
+
+
+def params(now, max_energy=MAX_ENERGY, regen_seconds=REGEN_SECONDS):
+    return {'now': now, 'max_energy': max_energy, 'regen_seconds': regen_seconds}
+
+
+def _units(last_update, now, regen_seconds):
+    elapsed = round((now - last_update).total_seconds(), 3)
+    return max(0, int(elapsed // regen_seconds))
+
+
+def current(energy, last_update, now, max_energy=MAX_ENERGY, regen_seconds=REGEN_SECONDS):
+    """Saqlangan qiymat va vaqt belgisidan joriy energiya"""
+    return materialize(energy, last_update, now, max_energy, regen_seconds)[0]
+
+
+def materialize(energy, last_update, now, max_energy=MAX_ENERGY, regen_seconds=REGEN_SECONDS):
+    """(joriy energiya, yangi vaqt belgisi) - ledger.apply dagi UPDATE bilan bir xil"""
+    energy = energy or 0
+    if last_update is None or energy >= max_energy:
+        return energy, now
+    units = _units(last_update, now, regen_seconds)
+    if energy + units >= max_energy:
+        return max_energy, now
+    return energy + units, last_update + timedelta(seconds=units * regen_seconds)
+
+
+def next_regen_at(energy, last_update, now, max_energy=MAX_ENERGY, regen_seconds=REGEN_SECONDS):
+    """Keyingi energiya birligi qo'shiladigan vaqt (to'la bo'lsa None)"""
+    energy, anchor = materialize(energy, last_update, now, max_energy, regen_seconds)
+    if energy >= max_energy:
+        return None
+    return anchor + timedelta(seconds=regen_seconds)
@@ -0,0 +1,104 @@
+# exposure.py - FOYDALANUVCHI KO'RGAN VA TO'G'RI JAVOB BERGAN SAVOLLAR (BITSET)
+#
+# Har bir foydalanuvchi uchun ikkita bit to'plami, savol id'si bo'yicha:
+#   seen    - savol testda ko'rsatilgan;
+#   correct - oxirgi javob to'g'ri bo'lgan.
+# Ular `question_exposure` jadvalida BLOB sifatida saqlanadi: 100 000
+# savollik bank uchun ham ~12.5 KB, bizning bankda esa 13 bayt.
+#
+# sample() savollarni "yangi" (ko'rilmagan yoki oxirgi marta xato javob
+# berilgan) savollarni afzal ko'rib tanlaydi. Tasodifiy indekslar
+# sinab ko'riladi (ko'pi bilan k * PROBE_FACTOR marta; bundan kichik
+# guruh to'liq ko'riladi), shuning uchun bitta so'rov guruh hajmidan
+# qat'i nazar O(k).
+import random
+
+PROBE_FACTOR = 8
+
+
+def _test(bits, index):
+    byte = index >> 3
+    return byte < len(bits) and bool(bits[byte] & (1 << (index & 7)))
+
+
+def _assign(bits, index, value):
+    byte = index >> 3
+    if byte >= len(bits):
+        if not value:
+            return
+        bits.extend(bytes(byte + 1 - len(bits)))
+    if value:
+        bits[byte] |= 1 << (index & 7)
+    else:
+        bits[byte] &= ~(1 << (index & 7)) & 0xFF
+
+
+def _blob(bits):
+    """Oxiridagi nol baytlarsiz BLOB"""
+    return bytes(bits).rstrip(b'\x00')
+
+
+def _question_id(question):
+    question_id = question.get('id') if isinstance(question, dict) else question
+    return question_id if isinstance(question_id, int) and question_id >= 0 else None
+
+
+class Exposure:
+    """Bitta foydalanuvchining savollar bitset'lari"""
+
+    def __init__(self, seen=b'', correct=b''):
+        self.seen = bytearray(seen or b'')
+        self.correct = bytearray(correct or b'')
+
+    def has_seen(self, question_id):
+        return _test(self.seen, question_id)
+
+    def answered_correctly(self, question_id):
+        return _test(self.correct, question_id)
+
+    def is_fresh(self, question):
+        """Ko'rilmagan yoki oxirgi marta xato javob berilgan savol"""
+        question_id = _question_id(question)
+        if question_id is None:
+            return True
+        return not (self.has_seen(question_id) and self.answered_correctly(question_id))
+
+    def record(self, question_id, is_correct):
+        _assign(self.seen, question_id, True)
+        _assign(self.correct, question_id, is_correct)
+
+    def blobs(self):
+        return _blob(self.seen), _blob(self.correct)
+
+    def seen_count(self):
+        return sum(bin(byte).count('1') for byte in self.seen)
+
+    def sample(self, candidates, k, rng=random):
+        """`candidates` dan k ta savol: avval yangilari, yetmasa qolganlari"""
+        n = len(candidates)
+        k = min(k, n)
+        picked, stale, taken = [], [], set()
+
+        budget = k * PROBE_FACTOR
+        # Kichik guruh (<= budget) to'liq, tasodifiy tartibda ko'rib chiqiladi
+        probes = rng.sample(range(n), n) if n <= budget else (rng.randrange(n) for _ in range(budget))
+        for index in probes:
+            if len(picked) >= k:
+                break
+            if index in taken:
+                continue
+            taken.add(index)
+            (picked if self.is_fresh(candidates[index]) else stale).append(index)
+
+        picked.extend(stale[:k - len(picked)])
+        if len(picked) < k:
+            # Yetarli yangi savol yo'q: hali olinmagan tasodifiy indekslar
+            chosen = set(picked)
+            for index in rng.sample(range(n), min(n, k + len(taken))):
+                if len(picked) >= k:
+                    break
+                if index not in chosen:
+                    picked.append(index)
+                    chosen.add(index)
+
+        return [candidates[index] for index in picked[:k]]
@@ -0,0 +1,317 @@
+# grading.py - ERKIN JAVOBLARNI TO'PLAB BAHOLASH (PROCESS POOL)
+#
+# ML/ml.py dagi AnswerMatcher sof Python va CPU'ga bog'liq, shuning uchun
+# minglab (foydalanuvchi, javob) juftlari ProcessPoolExecutor orqali
+# baholanadi:
+#   - mos yozuvlar to'plami (eco_roots.json) har bir worker jarayonida
+#     bir marta yuklanadi: fork'da ota jarayondagi tayyor indeks meros
+#     qilib olinadi (copy-on-write), spawn'da initializer quradi;
+#   - javoblar `chunk_size` talik bo'laklarda yuboriladi (IPC kam) va
+#     navbatda bir vaqtda ko'pi bilan workers * 2 bo'lak turadi - katta
+#     JSONL fayl xotiraga to'liq o'qilmaydi;
+#   - natijalar bo'lak tugashi bilan (tartib kafolatlanmaydi) chiqariladi.
+# GradingStats o'tkazuvchanlikni (javob/soniya) beradi - tungi qayta
+# baholash ishlarini rejalash uchun.
+#
+# Kirish: JSONL, har bir qator {"user_id": 1, "answer": "..."}; ixtiyoriy
+# "id" maydoni natijaga o'zgarishsiz o'tkaziladi.
+#
+# GradingJobs - admin API uchun: yuklangan fayl diskka yoziladi va
+# baholash alohida jarayonda (`flask grade-answers`) ishlaydi. Web
+# worker'i baholashni kutmaydi va o'zidan process pool fork qilmaydi.
+# Bir vaqtda ko'pi bilan `max_running` ta ish ishlaydi; fon jarayoni
+# natijasiz o'lsa (OOM, deploy, import xatosi) ish `failed` bo'ladi.
+import fcntl
+import json
+import os
+import re
+import subprocess
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from ML.ml import DEFAULT_VARIANTS_PATH, AnswerMatcher
+
+DEFAULT_CHUNK_SIZE = 200
+
+_worker_matcher = None
+_worker_path = None
+
+
+def _init_worker(variants_path):
+    global _worker_matcher, _worker_path
+    if _worker_matcher is None or _worker_path != variants_path:
+        _worker_matcher = AnswerMatcher.from_json(variants_path)
+        _worker_path = variants_path
+
+
+def _grade_chunk(chunk):
+    results = []
+    for record in chunk:
+        match = _worker_matcher.match(record['answer'])
+        result = {key: record[key] for key in ('id', 'user_id') if key in record}
+        result.update(match)
+        results.append(result)
+    return results
+
+
+def parse_jsonl(lines):
+    """JSONL qatorlari -> (yozuvlar, xatolar) oqimi: har biri ('ok'|'error', dict)"""
+    for number, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield 'error', {'line': number, 'error': f'JSON xato: {e.msg}'}
+            continue
+        if not isinstance(record, dict) or not isinstance(record.get('answer'), str):
+            yield 'error', {'line': number, 'error': '"answer" matn maydoni kerak'}
+            continue
+        yield 'ok', record
+
+
+class GradingStats:
+    def __init__(self, workers, chunk_size):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.answers = 0
+        self.errors = 0
+        self.chunks = 0
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.started
+
+    @property
+    def answers_per_second(self):
+        return round(self.answers / self.seconds, 1) if self.seconds else 0.0
+
+    def as_dict(self):
+        return {
+            'answers': self.answers,
+            'errors': self.errors,
+            'chunks': self.chunks,
+            'workers': self.workers,
+            'chunk_size': self.chunk_size,
+            'seconds': round(self.seconds, 3),
+            'answers_per_second': self.answers_per_second,
+        }
+
+
+def _chunks(records, size, stats):
+    chunk = []
+    for kind, record in records:
+        if kind == 'error':
+            stats.errors += 1
+            yield 'error', record
+            continue
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield 'chunk', chunk
+            chunk = []
+    if chunk:
+        yield 'chunk', chunk
+
+
+def _collect(pending, stats):
+    """Kamida bitta bo'lak tugashini kutib, natijalarini chiqarish"""
+    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        results = future.result()
+        stats.answers += len(results)
+        yield from results
+    return pending
+
+
+def grade_stream(lines, workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 variants_path=DEFAULT_VARIANTS_PATH, stats=None):
+    """JSONL qatorlarini baholash; natija dict'lari tayyor bo'lishi bilan chiqariladi.
+
+    Yaroqsiz qatorlar {"line": n, "error": "..."} ko'rinishida qaytadi.
+    `stats` (GradingStats) berilsa, oqim tugagach to'ldiriladi.
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = stats or GradingStats(workers, chunk_size)
+    stats.workers, stats.chunk_size = workers, chunk_size
+
+    # Fork bo'lsa worker'lar tayyor indeksni ota jarayondan oladi
+    _init_worker(variants_path)
+    max_pending = workers * 2
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(variants_path,)) as pool:
+        pending = set()
+        try:
+            for kind, item in _chunks(parse_jsonl(lines), chunk_size, stats):
+                if kind == 'error':
+                    yield item
+                    continue
+                pending.add(pool.submit(_grade_chunk, item))
+                stats.chunks += 1
+                if len(pending) >= max_pending:
+                    pending = yield from _collect(pending, stats)
+
+            while pending:
+                pending = yield from _collect(pending, stats)
+        finally:
+            for future in pending:
+                future.cancel()
+            stats.finish()
+
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class TooManyJobs(Exception):
+    pass
+
+
+def _job_process_alive(pid, job_id):
+    """Jarayon tirikmi va aynan shu ishnikimi (PID qayta ishlatilgan bo'lishi mumkin)"""
+    try:
+        # O'zimizning farzand jarayonimiz bo'lsa zombini yig'ib olamiz
+        if os.waitpid(pid, os.WNOHANG)[0] == pid:
+            return False
+    except ChildProcessError:
+        pass
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as f:
+            # Zombi jarayonning cmdline'i bo'sh
+            return job_id.encode() in f.read()
+    except FileNotFoundError:
+        return not os.path.isdir('/proc')
+    except OSError:
+        return True
+
+
+class GradingJobs:
+    """Diskdagi baholash ishlari: {id}.jsonl -> {id}.out.jsonl + {id}.summary.json.
+
+    {id}.pid - fon jarayoni; u summary yozmasdan tugasa ish `failed`
+    bo'ladi va xato {id}.log oxiridan olinadi.
+    """
+
+    def __init__(self, directory, max_running=2):
+        self.directory = directory
+        self.max_running = max_running
+
+    def path(self, job_id, suffix):
+        if not re.fullmatch(r'[0-9a-f]{32}', job_id or ''):
+            raise KeyError(job_id)
+        return os.path.join(self.directory, f'{job_id}.{suffix}')
+
+    def create(self, stream, max_bytes, block_size=64 * 1024):
+        """Yuklamani bo'laklab diskka yozish; `max_bytes` dan oshsa UploadTooLarge"""
+        os.makedirs(self.directory, exist_ok=True)
+        job_id = uuid.uuid4().hex
+        path = self.path(job_id, 'jsonl')
+        size = 0
+        try:
+            with open(path, 'wb') as f:
+                while True:
+                    block = stream.read(block_size)
+                    if not block:
+                        break
+                    size += len(block)
+                    if size > max_bytes:
+                        raise UploadTooLarge(max_bytes)
+                    f.write(block)
+        except BaseException:
+            os.remove(path)
+            raise
+        return job_id, size
+
+    def discard(self, job_id):
+        for suffix in ('jsonl', 'log', 'pid'):
+            try:
+                os.remove(self.path(job_id, suffix))
+            except FileNotFoundError:
+                pass
+
+    def running(self):
+        """Hozir ishlayotgan ishlar id'lari"""
+        running = []
+        for name in os.listdir(self.directory) if os.path.isdir(self.directory) else ():
+            job_id = name[:-len('.pid')]
+            if name.endswith('.pid') and re.fullmatch(r'[0-9a-f]{32}', job_id):
+                if self._state(job_id)[0] == 'running':
+                    running.append(job_id)
+        return running
+
+    def start(self, job_id, command):
+        """`command` ni (ro'yxat) fon jarayoni sifatida ishga tushirish.
+
+        Bir vaqtda `max_running` tadan ko'p ish bo'lsa TooManyJobs. Tekshiruv
+        va ishga tushirish worker'lar orasida flock bilan ketma-ket.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, '.jobs.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if len(self.running()) >= self.max_running:
+                    raise TooManyJobs(self.max_running)
+                with open(self.path(job_id, 'log'), 'wb') as log:
+                    process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                               stderr=log, start_new_session=True)
+                with open(self.path(job_id, 'pid'), 'w') as f:
+                    f.write(str(process.pid))
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read_summary(self, job_id):
+        try:
+            with open(self.path(job_id, 'summary.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _log_tail(self, job_id, size=2000):
+        try:
+            with open(self.path(job_id, 'log'), 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - size))
+                return f.read().decode('utf-8', 'replace').strip()
+        except FileNotFoundError:
+            return ''
+
+    def _state(self, job_id):
+        summary = self._read_summary(job_id)
+        if summary is not None:
+            return ('failed' if 'error' in summary else 'done'), summary
+        try:
+            with open(self.path(job_id, 'pid'), 'r') as f:
+                pid = int(f.read())
+        except (FileNotFoundError, ValueError):
+            return 'failed', None
+        if _job_process_alive(pid, job_id):
+            return 'running', None
+        # Jarayon tugashi bilan summary yozilgan bo'lishi mumkin - qayta o'qiymiz
+        summary = self._read_summary(job_id)
+        if summary is not None:
+            return ('failed' if 'error' in summary else 'done'), summary
+        return 'failed', None
+
+    def status(self, job_id):
+        """{'status': 'running'|'done'|'failed', ...}; ish topilmasa KeyError"""
+        if not os.path.exists(self.path(job_id, 'jsonl')):
+            raise KeyError(job_id)
+        state, summary = self._state(job_id)
+        if state == 'running':
+            return {'job_id': job_id, 'status': 'running'}
+        if state == 'done':
+            return {'job_id': job_id, 'status': 'done', 'summary': summary}
+        error = summary['error'] if summary else 'Baholash jarayoni natijasiz tugadi'
+        return {'job_id': job_id, 'status': 'failed', 'error': error, 'log': self._log_tail(job_id)}
@@ -0,0 +1,67 @@
+# http_cache.py - SO'RALADIGAN JSON ENDPOINT'LAR UCHUN ETAG / 304
+#
+# Har bir foydalanuvchida `user.state_version` hisoblagichi bor: coin,
+# energiya, daraja, kunlik progress yoki bildirishnomalari o'zgarganda u
+# oshiriladi (ledger.apply, notifications va app.py dagi after_flush
+# hodisasi). ETag shu versiya, joriy energiya va sanadan
+# hosil qilinadi: energiya vaqt bo'yicha tiklanadi (energy_regen.py) va
+# bunda state_version o'zgarmaydi.
+#
+# user_etag() dekoratori @login_required dan OLDIN ishlaydi: foydalanuvchi
+# id'si imzolangan sessiyadan (session['_user_id']) olinadi va bitta
+# `SELECT state_version, <joriy energiya>` bajariladi. If-None-Match mos
+# kelsa, 304 qaytariladi - User obyekti umuman yuklanmaydi (ORM hydration yo'q).
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, request, session
+from sqlalchemy import text
+
+import energy_regen
+
+_VERSION_SQL = text(f'''
+    SELECT state_version, {energy_regen.CURRENT_SQL} AS energy
+    FROM user WHERE id = :user_id
+''')
+
+
+def session_user_id():
+    """Flask-Login sessiyasidagi foydalanuvchi id'si (yoki None)"""
+    try:
+        return int(session.get('_user_id'))
+    except (TypeError, ValueError):
+        return None
+
+
+def user_etag(db, kind):
+    """Foydalanuvchi holati versiyasi bo'yicha shartli GET dekoratori"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            user_id = session_user_id()
+            if user_id is None:
+                return view(*args, **kwargs)
+
+            now = datetime.utcnow()
+            row = db.session.execute(_VERSION_SQL, {
+                'user_id': user_id,
+                **energy_regen.params(now, current_app.config.get('MAX_ENERGY', energy_regen.MAX_ENERGY),
+                                      current_app.config.get('ENERGY_REGEN_SECONDS', energy_regen.REGEN_SECONDS)),
+            }).first()
+            if row is None or row.state_version is None:
+                return view(*args, **kwargs)
+
+            etag = f'{kind}-{user_id}-{row.state_version}-{row.energy}-{now.date().isoformat()}'
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = view(*args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+
+        return wrapper
+    return decorator
+
@@ -0,0 +1,52 @@
+# inventory.py - HERO SAHIFASI UCHUN INVENTAR O'QISH MODELI
+#
+# hero() avval barcha Inventory qatorlarini yuklab, keyin sakkizta ro'yxat
+# ichida `item.item.item_type` ga murojaat qilardi - har bir murojaat
+# Item'ni alohida (lazy) yuklardi: N ta buyum -> N+1 so'rov.
+#
+# Endi inventar Item bilan bitta JOIN so'rovida olinadi (app.py dagi
+# load_hero_inventory), o'zgarmas InventoryEntry yozuvlariga aylantiriladi
+# va slotlar bo'yicha bir o'tishda guruhlanadi. Foydalanuvchi
+# statistikasi (load_user_stats) ham bitta so'rov va /profile bilan umumiy.
+from collections import namedtuple
+
+from cache import freeze
+
+SLOTS = ('clothes', 'hat', 'shoes', 'accessory')
+
+# item - Item'ning o'zgarmas nusxasi (cache.freeze)
+InventoryEntry = namedtuple('InventoryEntry', ['id', 'item_id', 'equipped', 'purchased_at', 'item'])
+
+
+class HeroInventory:
+    """Foydalanuvchi inventari: barcha buyumlar va slotlar bo'yicha guruhlar"""
+
+    def __init__(self, entries):
+        self.items = tuple(entries)
+        by_slot = {slot: [] for slot in SLOTS}
+        equipped_by_slot = {slot: [] for slot in SLOTS}
+        equipped = []
+        for entry in self.items:
+            slot = by_slot.get(entry.item.item_type)
+            if slot is not None:
+                slot.append(entry)
+            if entry.equipped:
+                equipped.append(entry)
+                if entry.item.item_type in equipped_by_slot:
+                    equipped_by_slot[entry.item.item_type].append(entry)
+
+        self.equipped = tuple(equipped)
+        self.by_slot = {slot: tuple(entries) for slot, entries in by_slot.items()}
+        self.equipped_by_slot = {slot: tuple(entries) for slot, entries in equipped_by_slot.items()}
+
+    @classmethod
+    def from_rows(cls, rows):
+        """[(Inventory, Item)] JOIN natijasidan"""
+        return cls(
+            InventoryEntry(inventory.id, inventory.item_id, bool(inventory.equipped),
+                           inventory.purchased_at, freeze(item))
+            for inventory, item in rows
+        )
+
+    def __len__(self):
+        return len(self.items)
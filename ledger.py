@@ -0,0 +1,145 @@
+# ledger.py - COIN VA ENERGIYA BALANSI: ATOMAR YOZUVLAR VA JURNAL
+#
+# Balans endi Python'da "o'qi - tekshir - yoz" qilinmaydi. apply() bitta
+# shartli UPDATE bajaradi:
+#
+#     UPDATE user SET coins = coins + :coins, energy = ...
+#     WHERE id = :user_id AND coins >= :need_coins AND <joriy energiya> >= :need_energy
+#     RETURNING coins, energy, role, last_energy_update
+#
+# Yetarli balans bo'lmasa hech qanday qator o'zgarmaydi va None qaytadi,
+# shuning uchun parallel so'rovlar bir-birining yozuvini yo'qotmaydi.
+# Har bir o'zgarish shu tranzaksiyada `balance_ledger` jadvaliga
+# (delta + yangi mutlaq qiymat) qo'shiladi; ranking.py shu jurnalni
+# worker'lar o'rtasidagi o'zgarishlar lentasi sifatida o'qiydi.
+#
+# compact() eski jurnal qatorlarini foydalanuvchi bo'yicha
+# `balance_summary` ga yig'ib o'chiradi: jurnal kichik qoladi, tekshiruv
+# esa (verify) user.coins == summary + qolgan deltalar ekanini ko'rsatadi.
+# Joriy energiya vaqt bo'yicha tiklangan qiymat (energy_regen.py): u shu
+# UPDATE'da bazaga yoziladi. Tiklanish jurnalga yozilmaydi, shuning uchun
+# tekshiruv faqat coin bo'yicha.
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import DateTime, text
+
+import energy_regen
+
+MAX_ENERGY = energy_regen.MAX_ENERGY
+
+BalanceResult = namedtuple('BalanceResult', ['coins', 'energy', 'role', 'ledger_id', 'energy_updated_at'])
+
+
+def apply(conn, user_id, coins=0, energy=0, reason='', max_energy=MAX_ENERGY,
+          regen_seconds=energy_regen.REGEN_SECONDS):
+    """Balansni atomar o'zgartirish va jurnalga yozish.
+
+    Manfiy coins/energy - sarflash: joriy (tiklangan) qiymat yetarli
+    bo'lsagina bajariladi. Musbat energiya `max_energy` bilan cheklanadi.
+    Yetmasa None, aks holda BalanceResult qaytaradi. Commit chaqiruvchida.
+    """
+    current_sql = energy_regen.CURRENT_SQL
+    conditions = ['id = :user_id']
+    if coins < 0:
+        conditions.append('COALESCE(coins, 0) >= :need_coins')
+    if energy < 0:
+        conditions.append(f'{current_sql} >= :need_energy')
+
+    if energy > 0:
+        energy_sql = f'MIN(:max_energy, {current_sql} + :energy)'
+    else:
+        energy_sql = f'{current_sql} + :energy'
+
+    statement = text(f"""
+        UPDATE user SET
+            coins = COALESCE(coins, 0) + :coins,
+            energy = {energy_sql},
+            last_energy_update = {energy_regen.anchor_sql(energy_sql)},
+            state_version = COALESCE(state_version, 0) + 1
+        WHERE {' AND '.join(conditions)}
+        RETURNING coins, energy, role, last_energy_update
+    """).columns(last_energy_update=DateTime)
+    row = conn.execute(statement, {
+        'user_id': user_id,
+        'coins': coins,
+        'energy': energy,
+        'need_coins': -coins,
+        'need_energy': -energy,
+        **energy_regen.params(datetime.utcnow(), max_energy, regen_seconds),
+    }).first()
+    if row is None:
+        return None
+
+    ledger_id = record(conn, user_id, row.coins, row.energy, row.role,
+                       coins_delta=coins, energy_delta=energy, reason=reason)
+    return BalanceResult(row.coins, row.energy, row.role, ledger_id, row.last_energy_update)
+
+
+def record(conn, user_id, coins, energy, role, coins_delta=0, energy_delta=0, reason=''):
+    """Jurnalga bitta qator qo'shish (apply() va boshlang'ich balanslar uchun)"""
+    return conn.execute(text("""
+        INSERT INTO balance_ledger
+            (user_id, coins_delta, energy_delta, coins, energy, role, reason, created_at)
+        VALUES (:user_id, :coins_delta, :energy_delta, :coins, :energy, :role, :reason, :created_at)
+        RETURNING id
+    """), {
+        'user_id': user_id,
+        'coins_delta': coins_delta,
+        'energy_delta': energy_delta,
+        'coins': coins or 0,
+        'energy': energy or 0,
+        'role': role,
+        'reason': reason[:50],
+        'created_at': datetime.utcnow(),
+    }).scalar()
+
+
+def compact(conn, keep=10000):
+    """Oxirgi `keep` tadan eskiroq jurnal qatorlarini balance_summary ga yig'ish.
+
+    `keep` ta oxirgi qator qoldiriladi: orqada qolgan worker'lar reytingni
+    shulardan sinxronlaydi. Statistika lug'atini qaytaradi.
+    """
+    started = time.monotonic()
+    upto = conn.execute(text(
+        'SELECT COALESCE(MAX(id), 0) - :keep FROM balance_ledger'
+    ), {'keep': keep}).scalar()
+    if upto <= 0:
+        return {'rows': 0, 'users': 0, 'seconds': 0.0}
+
+    users = conn.execute(text("""
+        INSERT INTO balance_summary
+            (user_id, coins_delta, energy_delta, entries, last_ledger_id, compacted_at)
+        SELECT user_id, SUM(coins_delta), SUM(energy_delta), COUNT(*), MAX(id), :now
+        FROM balance_ledger
+        WHERE id <= :upto
+        GROUP BY user_id
+        ON CONFLICT(user_id) DO UPDATE SET
+            coins_delta = coins_delta + excluded.coins_delta,
+            energy_delta = energy_delta + excluded.energy_delta,
+            entries = entries + excluded.entries,
+            last_ledger_id = excluded.last_ledger_id,
+            compacted_at = excluded.compacted_at
+    """), {'upto': upto, 'now': datetime.utcnow()}).rowcount
+    rows = conn.execute(text('DELETE FROM balance_ledger WHERE id <= :upto'), {'upto': upto}).rowcount
+
+    return {'rows': rows, 'users': users, 'seconds': round(time.monotonic() - started, 3)}
+
+
+def verify(conn, limit=20):
+    """Coin balansi jurnal bilan mos kelmaydigan foydalanuvchilar: [(user_id, coins, ledger_coins)]"""
+    return conn.execute(text("""
+        SELECT u.id, COALESCE(u.coins, 0) AS coins,
+               COALESCE(s.coins_delta, 0) + COALESCE(l.coins_delta, 0) AS ledger_coins
+        FROM user u
+        LEFT JOIN balance_summary s ON s.user_id = u.id
+        LEFT JOIN (
+            SELECT user_id, SUM(coins_delta) AS coins_delta
+            FROM balance_ledger GROUP BY user_id
+        ) l ON l.user_id = u.id
+        WHERE COALESCE(u.coins, 0) != COALESCE(s.coins_delta, 0) + COALESCE(l.coins_delta, 0)
+        ORDER BY u.id
+        LIMIT :limit
+    """), {'limit': limit}).fetchall()
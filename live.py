@@ -0,0 +1,199 @@
+# live.py - JONLI STATISTIKA VA BILDIRISHNOMALAR UCHUN SSE OQIMI
+#
+# Har bir ochiq tab 30 soniyada so'rov yuborish o'rniga /stream ga bitta
+# EventSource ulanishini ochadi. Jarayon ichida bitta fon oqimi (poller)
+# har `LIVE_POLL_INTERVAL` soniyada faqat yangi qatorlarni o'qiydi:
+#
+#     balance_ledger.id > :last   (coin/energiya o'zgarishlari, ledger.py)
+#     notification.id > :last     (yangi bildirishnomalar)
+#
+# va shu foydalanuvchilarning ulanishlarini uyg'otadi. Ulanish faqat
+# uyg'otilganda foydalanuvchi holatini bitta so'rov bilan o'qiydi va
+# o'zgargan bo'lsa `stats` hodisasini yuboradi (energiya - vaqt bo'yicha
+# tiklangan joriy qiymat, energy_regen.py). Boshqa paytda ulanish
+# bo'sh turadi (faqat heartbeat izohi). Adminlar har qanday faollikda
+# `activity` hodisasini oladi.
+#
+# Oqim sukut bo'yicha O'CHIQ (`LIVE_STREAM_ENABLED = False`): gunicorn'ning
+# sync worker'larida har bir ochiq tab butun worker'ni band qiladi. Shunda
+# brauzer /get_user_stats ni 30 soniyada so'raydi va /stream 404 qaytaradi.
+# Oqimni faqat gevent yoki gthread worker'lari bilan yoqing, masalan:
+#
+#     gunicorn --worker-class gthread --threads 32 app:app
+#
+# Ulanish `LIVE_MAX_STREAM_SECONDS` dan keyin yopiladi va brauzer o'zi
+# qayta ulanadi; bu qiymat gunicorn `--timeout` (sukut bo'yicha 30 s) dan
+# kichik bo'lishi kerak.
+import json
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+
+import energy_regen
+
+DEFAULT_CONFIG = {
+    'LIVE_STREAM_ENABLED': False,
+    'LIVE_POLL_INTERVAL': 1.0,
+    'LIVE_HEARTBEAT_SECONDS': 10,
+    'LIVE_MAX_STREAM_SECONDS': 25,
+}
+
+_STATE_SQL = text(f"""
+    SELECT coins, {energy_regen.CURRENT_SQL} AS energy, level, experience, streak,
+           (SELECT COUNT(*) FROM notification
+            WHERE user_id = :user_id AND is_read = 0) AS unread_notifications
+    FROM user WHERE id = :user_id
+""")
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class Subscription:
+    def __init__(self, user_id, is_admin):
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.wakeup = threading.Event()
+
+
+class LiveHub:
+    """Jarayon ichidagi obunachilar ro'yxati va o'zgarishlarni kuzatuvchi"""
+
+    def __init__(self, app=None, db=None):
+        self.engine = None
+        self._subscribers = {}
+        self._admins = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._cursors = None
+        if app is not None and db is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        for key, value in DEFAULT_CONFIG.items():
+            app.config.setdefault(key, value)
+        self.enabled = app.config['LIVE_STREAM_ENABLED']
+        self.poll_interval = app.config['LIVE_POLL_INTERVAL']
+        self.heartbeat = app.config['LIVE_HEARTBEAT_SECONDS']
+        self.max_stream_seconds = app.config['LIVE_MAX_STREAM_SECONDS']
+        self.max_energy = app.config.get('MAX_ENERGY', energy_regen.MAX_ENERGY)
+        self.regen_seconds = app.config.get('ENERGY_REGEN_SECONDS', energy_regen.REGEN_SECONDS)
+        with app.app_context():
+            self.engine = db.engine
+
+    # --- Obunalar ---
+    def subscribe(self, user_id, is_admin=False):
+        subscription = Subscription(user_id, is_admin)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+            if is_admin:
+                self._admins.add(subscription)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='live-hub', daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscribers.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscribers[subscription.user_id]
+            self._admins.discard(subscription)
+
+    def connections(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscribers.values())
+
+    def publish(self, user_ids, activity=True):
+        """Berilgan foydalanuvchilarning ulanishlarini uyg'otish"""
+        with self._lock:
+            targets = [s for user_id in user_ids for s in self._subscribers.get(user_id, ())]
+            if activity:
+                targets.extend(self._admins)
+        for subscription in targets:
+            subscription.wakeup.set()
+
+    # --- Poller ---
+    def _max_ids(self, conn):
+        return (
+            conn.execute(text('SELECT COALESCE(MAX(id), 0) FROM balance_ledger')).scalar(),
+            conn.execute(text('SELECT COALESCE(MAX(id), 0) FROM notification')).scalar(),
+        )
+
+    def poll(self):
+        """Oxirgi tekshiruvdan keyin o'zgargan foydalanuvchilarni topib uyg'otish"""
+        with self._lock:
+            idle = not self._subscribers
+        if idle:
+            # Obunachi yo'q - kursorlar keyingi obunada yangidan o'rnatiladi
+            self._cursors = None
+            return set()
+
+        with self.engine.connect() as conn:
+            if self._cursors is None:
+                self._cursors = self._max_ids(conn)
+                return set()
+            last_ledger_id, last_notification_id = self._cursors
+            ledger_rows = conn.execute(text(
+                'SELECT id, user_id FROM balance_ledger WHERE id > :last ORDER BY id'
+            ), {'last': last_ledger_id}).fetchall()
+            notification_rows = conn.execute(text(
+                'SELECT id, user_id FROM notification WHERE id > :last ORDER BY id'
+            ), {'last': last_notification_id}).fetchall()
+
+        if ledger_rows:
+            last_ledger_id = ledger_rows[-1].id
+        if notification_rows:
+            last_notification_id = notification_rows[-1].id
+        self._cursors = (last_ledger_id, last_notification_id)
+
+        changed = {row.user_id for row in ledger_rows} | {row.user_id for row in notification_rows}
+        if changed:
+            self.publish(changed)
+        return changed
+
+    def _run(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"⚠️  Jonli oqim poller xatosi: {e}")
+
+    # --- Oqim ---
+    def load_state(self, user_id):
+        with self.engine.connect() as conn:
+            row = conn.execute(_STATE_SQL, {
+                'user_id': user_id,
+                **energy_regen.params(datetime.utcnow(), self.max_energy, self.regen_seconds),
+            }).first()
+        return dict(row._mapping) if row is not None else None
+
+    def stream(self, user_id, is_admin=False):
+        """SSE generatori: boshlang'ich holat, keyin faqat o'zgarishlar"""
+        subscription = self.subscribe(user_id, is_admin)
+        deadline = time.monotonic() + self.max_stream_seconds
+        try:
+            yield 'retry: 5000\n\n'
+            last_state = self.load_state(user_id)
+            yield format_event('stats', last_state)
+
+            while time.monotonic() < deadline:
+                if not subscription.wakeup.wait(self.heartbeat):
+                    yield ': ping\n\n'
+                    continue
+                subscription.wakeup.clear()
+
+                state = self.load_state(user_id)
+                if state != last_state:
+                    last_state = state
+                    yield format_event('stats', state)
+                if is_admin:
+                    yield format_event('activity', {'at': time.time()})
+        finally:
+            self.unsubscribe(subscription)
@@ -0,0 +1,253 @@
+# migrations.py - SQLITE SXEMASINI JOYIDA YANGILASH (VERSIYALANGAN MIGRATSIYALAR)
+#
+# Har bir migratsiya (versiya, tavsif, funksiya) ko'rinishida MIGRATIONS
+# ro'yxatiga qo'shiladi. Qo'llangan versiyalar `schema_version` jadvalida
+# saqlanadi, shuning uchun har bir migratsiya faqat bir marta bajariladi.
+# Yangi migratsiya qo'shganda ro'yxat oxiriga keyingi raqam bilan yozing,
+# eskilarini hech qachon o'zgartirmang.
+#
+# Ishga tushirish:  python migrations.py
+from datetime import datetime
+
+from sqlalchemy import text
+
+import admin_stats
+
+
+def _table_exists(conn, table):
+    row = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {'name': table}
+    ).first()
+    return row is not None
+
+
+def _column_exists(conn, table, column):
+    rows = conn.execute(text(f'PRAGMA table_info("{table}")')).fetchall()
+    return any(row[1] == column for row in rows)
+
+
+def _add_column(conn, table, column, ddl):
+    """Ustun yo'q bo'lsa qo'shish (ALTER TABLE ... ADD COLUMN)"""
+    if _table_exists(conn, table) and not _column_exists(conn, table, column):
+        conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN {column} {ddl}'))
+
+
+def _drop_column(conn, table, column):
+    """Ustun bo'lsa olib tashlash (SQLite 3.35+: ALTER TABLE ... DROP COLUMN)"""
+    if _table_exists(conn, table) and _column_exists(conn, table, column):
+        conn.execute(text(f'ALTER TABLE "{table}" DROP COLUMN {column}'))
+
+
+def _create_index(conn, name, table, columns, unique=False):
+    if not _table_exists(conn, table):
+        return
+    unique_sql = 'UNIQUE ' if unique else ''
+    conn.execute(text(
+        f'CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON "{table}" ({", ".join(columns)})'
+    ))
+
+
+# MIGRATSIYALAR
+def _m001_hot_indexes(conn):
+    """Issiq so'rovlar uchun kompozit va unikal indekslar"""
+    # Unikal indeks qo'yishdan oldin takroriy qatorlarni tozalash.
+    # UserTask: bajarilgan nusxa saqlanadi
+    if _table_exists(conn, 'user_task'):
+        conn.execute(text("""
+            DELETE FROM user_task WHERE id NOT IN (
+                SELECT id FROM (
+                    SELECT id, ROW_NUMBER() OVER (
+                        PARTITION BY user_id, task_id
+                        ORDER BY completed DESC, id
+                    ) AS rn
+                    FROM user_task
+                ) WHERE rn = 1
+            )
+        """))
+
+    # DailyProgress: hisoblagichlar birinchi qatorga yig'iladi
+    if _table_exists(conn, 'daily_progress'):
+        conn.execute(text("""
+            UPDATE daily_progress SET
+                tasks_completed = (SELECT SUM(COALESCE(d.tasks_completed, 0)) FROM daily_progress d
+                                   WHERE d.user_id = daily_progress.user_id AND d.date = daily_progress.date),
+                quizzes_completed = (SELECT SUM(COALESCE(d.quizzes_completed, 0)) FROM daily_progress d
+                                     WHERE d.user_id = daily_progress.user_id AND d.date = daily_progress.date),
+                coins_earned = (SELECT SUM(COALESCE(d.coins_earned, 0)) FROM daily_progress d
+                                WHERE d.user_id = daily_progress.user_id AND d.date = daily_progress.date)
+            WHERE id IN (SELECT MIN(id) FROM daily_progress GROUP BY user_id, date HAVING COUNT(*) > 1)
+        """))
+        conn.execute(text("""
+            DELETE FROM daily_progress
+            WHERE id NOT IN (SELECT MIN(id) FROM daily_progress GROUP BY user_id, date)
+        """))
+
+    # Inventory: kiyilgan nusxa saqlanadi
+    if _table_exists(conn, 'inventory'):
+        conn.execute(text("""
+            DELETE FROM inventory WHERE id NOT IN (
+                SELECT id FROM (
+                    SELECT id, ROW_NUMBER() OVER (
+                        PARTITION BY user_id, item_id
+                        ORDER BY equipped DESC, id
+                    ) AS rn
+                    FROM inventory
+                ) WHERE rn = 1
+            )
+        """))
+
+    _create_index(conn, 'uq_user_task_user_task', 'user_task', ['user_id', 'task_id'], unique=True)
+    _create_index(conn, 'uq_daily_progress_user_date', 'daily_progress', ['user_id', 'date'], unique=True)
+    _create_index(conn, 'ix_daily_progress_date', 'daily_progress', ['date'])
+    _create_index(conn, 'ix_notification_user_read_created', 'notification',
+                  ['user_id', 'is_read', 'created_at'])
+    _create_index(conn, 'uq_inventory_user_item', 'inventory', ['user_id', 'item_id'], unique=True)
+    _create_index(conn, 'ix_quiz_result_user', 'quiz_result', ['user_id'])
+    _create_index(conn, 'ix_news_status_created', 'news', ['status', 'created_at'])
+    _create_index(conn, 'ix_user_role_coins', 'user', ['role', 'coins'])
+
+
+def _m002_daily_reset_run(conn):
+    """Kunlik yangilanishning bo'laklar bo'yicha holati (davom ettirish uchun)"""
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS daily_reset_run (
+            date DATE PRIMARY KEY,
+            last_user_id INTEGER NOT NULL DEFAULT 0,
+            users_done INTEGER NOT NULL DEFAULT 0,
+            progress_rows INTEGER NOT NULL DEFAULT 0,
+            started_at DATETIME NOT NULL,
+            finished_at DATETIME
+        )
+    """))
+
+
+def _m003_balance_ledger(conn):
+    """Mavjud foydalanuvchilar uchun boshlang'ich balans yozuvlari (ledger.py)"""
+    if _table_exists(conn, 'balance_ledger') and _table_exists(conn, 'user'):
+        conn.execute(text("""
+            INSERT INTO balance_ledger
+                (user_id, coins_delta, energy_delta, coins, energy, role, reason, created_at)
+            SELECT id, COALESCE(coins, 0), 0, COALESCE(coins, 0), COALESCE(energy, 0),
+                   COALESCE(role, ''), 'opening', :now
+            FROM user
+            WHERE id NOT IN (SELECT user_id FROM balance_ledger)
+            ORDER BY id
+        """), {'now': datetime.utcnow()})
+    # Reyting endi balance_ledger'dan sinxronlanadi
+    conn.execute(text('DROP TABLE IF EXISTS coin_change'))
+
+
+def _m004_user_state_version(conn):
+    """ETag uchun foydalanuvchi holati versiyasi (http_cache.py)"""
+    _add_column(conn, 'user', 'state_version', 'INTEGER NOT NULL DEFAULT 0')
+
+
+def _m005_admin_stats(conn):
+    """admin_stats hisoblagichlarini mavjud ma'lumotlardan to'ldirish"""
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS admin_stats (
+            scope VARCHAR(10) NOT NULL,
+            name VARCHAR(40) NOT NULL,
+            value INTEGER NOT NULL,
+            PRIMARY KEY (scope, name)
+        )
+    """))
+    admin_stats.rebuild(conn)
+
+
+def _m006_admin_listing_indexes(conn):
+    """Admin ro'yxatlarini keyset bo'yicha sahifalash uchun indekslar"""
+    _create_index(conn, 'ix_user_role_id', 'user', ['role', 'id'])
+    _create_index(conn, 'ix_news_created', 'news', ['created_at'])
+    _create_index(conn, 'ix_announcement_created', 'announcement', ['created_at'])
+
+
+def _m007_user_energy_regen(conn):
+    """Energiyaning vaqt bo'yicha tiklanishi uchun vaqt belgisi (energy_regen.py)"""
+    _add_column(conn, 'user', 'last_energy_update', 'DATETIME')
+    if _table_exists(conn, 'user'):
+        conn.execute(text('UPDATE user SET last_energy_update = :now WHERE last_energy_update IS NULL'),
+                     {'now': datetime.utcnow()})
+
+
+def _m008_user_daily_tasks_date(conn):
+    """Kunlik topshiriqlar tayyorlangan sana (app.reset_daily_tasks)"""
+    _add_column(conn, 'user', 'daily_tasks_date', 'DATE')
+
+
+
+def _m009_daily_reset_run_slim(conn):
+    """Kunlik yangilanish foydalanuvchilarni bo'laklab yurmaydi (daily_reset.py)"""
+    for column in ('last_user_id', 'users_done', 'progress_rows'):
+        _drop_column(conn, 'daily_reset_run', column)
+
+
+MIGRATIONS = [
+    (1, "Issiq so'rovlar uchun indekslar", _m001_hot_indexes),
+    (2, "Kunlik yangilanish holati jadvali", _m002_daily_reset_run),
+    (3, "Coin va energiya jurnali", _m003_balance_ledger),
+    (4, "Foydalanuvchi holati versiyasi", _m004_user_state_version),
+    (5, "Admin statistikasi jadvali", _m005_admin_stats),
+    (6, "Admin ro'yxatlari uchun indekslar", _m006_admin_listing_indexes),
+    (7, "Energiya tiklanishi vaqt belgisi", _m007_user_energy_regen),
+    (8, "Kunlik topshiriqlar tayyorlangan sana", _m008_user_daily_tasks_date),
+    (9, "Kunlik yangilanish jadvalidan bo'lak ustunlari olib tashlandi", _m009_daily_reset_run_slim),
+]
+
+
+def _ensure_version_table(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description VARCHAR(200) NOT NULL,
+            applied_at DATETIME NOT NULL
+        )
+    """))
+
+
+def current_version(conn):
+    """Bazada qo'llangan eng oxirgi migratsiya raqami"""
+    _ensure_version_table(conn)
+    return conn.execute(text('SELECT COALESCE(MAX(version), 0) FROM schema_version')).scalar()
+
+
+def upgrade(engine, target=None):
+    """Qo'llanmagan migratsiyalarni tartib bilan bajarish.
+
+    Har bir migratsiya alohida tranzaksiyada ishlaydi: xatolik bo'lsa faqat
+    o'sha migratsiya orqaga qaytariladi va keyingilari bajarilmaydi.
+    Qo'llangan migratsiyalar ro'yxatini qaytaradi.
+    """
+    applied = []
+    with engine.begin() as conn:
+        version = current_version(conn)
+
+    for number, description, migrate in MIGRATIONS:
+        if number <= version or (target is not None and number > target):
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(
+                text('INSERT INTO schema_version (version, description, applied_at) '
+                     'VALUES (:version, :description, :applied_at)'),
+                {'version': number, 'description': description, 'applied_at': datetime.utcnow()}
+            )
+        applied.append(number)
+        print(f"🧱 Migratsiya {number:03d} qo'llandi: {description}")
+
+    return applied
+
+
+if __name__ == '__main__':
+    from app import app, db
+
+    with app.app_context():
+        db.create_all()
+        applied = upgrade(db.engine)
+        with db.engine.connect() as conn:
+            version = current_version(conn)
+        if applied:
+            print(f"✅ Sxema yangilandi, joriy versiya: {version}")
+        else:
+            print(f"✅ Sxema allaqachon yangi, joriy versiya: {version}")
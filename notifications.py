@@ -0,0 +1,296 @@
+# notifications.py - BILDIRISHNOMALARNI KECHIKTIRIB (WRITE-BEHIND) YOZISH
+#
+# Route'lar Notification qatorini o'z tranzaksiyasida qo'shmaydi. Commit'dan
+# keyin dispatcher.emit() chaqiriladi: hodisa xotiradagi buferga va
+# worker'ning spool fayliga (JSON qatorlar) yoziladi. Fon oqimi buferni
+# `batch_size` ga yetganda yoki har `flush_interval` soniyada bitta
+# executemany INSERT bilan bazaga yozadi.
+#
+# Ishonchlilik:
+#  - flush paytida spool fayl `.flushing` segmentiga aylantiriladi va faqat
+#    INSERT commit qilingandan keyin o'chiriladi;
+#  - jarayon to'xtaganda (atexit) bufer yoziladi;
+#  - jarayon yiqilsa, keyingi ishga tushishda egasi tirik bo'lmagan spool
+#    fayllar qayta o'qiladi va bazaga yoziladi (kamida bir marta yetkazish).
+#
+# Spool fayllar `notifications-{pid}-{nonce}.*` deb nomlanadi: PID qayta
+# ishlatilsa ham yangi jarayon eski fayllarga yozmaydi. Har bir jarayon
+# umri davomida o'zining `.lock` faylida eksklyuziv flock ushlab turadi;
+# jarayon o'lganda OS qulfni bo'shatadi. recover() PID tirikligini emas,
+# qulfni olish mumkinligini tekshiradi. Qulf fayli vaqtinchalik nom ostida
+# yaratilib, qulflangandan keyin joyiga ko'chiriladi - `.lock` fayli hech
+# qachon qulfsiz ko'rinmaydi. Qulf fayli yo'q token fayllariga tegilmaydi.
+import atexit
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import bindparam, text
+
+DEFAULT_CONFIG = {
+    'NOTIFICATION_BATCH_SIZE': 100,
+    'NOTIFICATION_FLUSH_INTERVAL': 1.0,
+}
+
+_INSERT_SQL = text("""
+    INSERT INTO notification (user_id, title, message, notification_type, is_read, created_at)
+    VALUES (:user_id, :title, :message, :notification_type, 0, :created_at)
+""")
+
+# ETag'lar eskirishi uchun (http_cache.py)
+_BUMP_STATE_SQL = text(
+    'UPDATE user SET state_version = COALESCE(state_version, 0) + 1 WHERE id IN :user_ids'
+).bindparams(bindparam('user_ids', expanding=True))
+
+
+def _spool_token(path):
+    """`notifications-{token}.{suffix}` -> token"""
+    return os.path.basename(path)[len('notifications-'):].split('.', 1)[0]
+
+
+def _read_spool(path):
+    events = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Yiqilish paytida chala yozilgan oxirgi qator
+                    continue
+    except FileNotFoundError:
+        pass
+    return events
+
+
+class NotificationDispatcher:
+    """Bildirishnomalarni buferlab, to'plam bilan yozuvchi dispatcher"""
+
+    def __init__(self, app=None, db=None):
+        self.engine = None
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._spool = None
+        self._lock_file = None
+        self._pid = None
+        self._token = None
+        self.flushed = 0
+        self.batches = 0
+        if app is not None and db is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        for key, value in DEFAULT_CONFIG.items():
+            app.config.setdefault(key, value)
+        app.config.setdefault('NOTIFICATION_SPOOL_DIR', app.instance_path)
+        self.batch_size = app.config['NOTIFICATION_BATCH_SIZE']
+        self.flush_interval = app.config['NOTIFICATION_FLUSH_INTERVAL']
+        self.spool_dir = app.config['NOTIFICATION_SPOOL_DIR']
+        os.makedirs(self.spool_dir, exist_ok=True)
+
+        with app.app_context():
+            self.engine = db.engine
+        atexit.register(self.shutdown)
+
+    # --- Spool fayllar ---
+    def _spool_path(self, token, suffix='spool'):
+        return os.path.join(self.spool_dir, f'notifications-{token}.{suffix}')
+
+    def _ensure_started(self):
+        """Fon oqimi va spool faylni birinchi emit() da ochish (fork'dan keyin ham)"""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        # fork'dan meros qolgan deskriptorlar ota jarayon qulfini ushlab turmasin
+        for inherited in (self._spool, self._lock_file):
+            if inherited is not None:
+                inherited.close()
+        self._pid = pid
+        self._token = f'{pid}-{uuid.uuid4().hex[:12]}'
+        self._buffer = []
+        # Qulf spool fayldan OLDIN olinadi. Fayl glob'ga tushmaydigan nom
+        # ostida yaratilib qulflanadi va shundan keyingina joyiga ko'chiriladi
+        tmp_path = os.path.join(self.spool_dir, f'.notifications-{self._token}.lock-tmp')
+        self._lock_file = open(tmp_path, 'a')
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        os.replace(tmp_path, self._spool_path(self._token, 'lock'))
+        self._spool = open(self._spool_path(self._token), 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._run, name='notification-dispatcher', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            self.recover()
+        except Exception as e:
+            print(f"⚠️  Spool fayllarni tiklashda xatolik: {e}")
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️  Bildirishnomalarni yozishda xatolik: {e}")
+
+    # --- Ommaviy API ---
+    def emit(self, user_id, title, message, notification_type):
+        """Bildirishnomani navbatga qo'yish. Route commit'idan KEYIN chaqiriladi."""
+        event = {
+            'user_id': user_id,
+            'title': title,
+            'message': message,
+            'notification_type': notification_type,
+            'created_at': datetime.utcnow().isoformat(),
+        }
+        with self._lock:
+            self._ensure_started()
+            self._spool.write(json.dumps(event, ensure_ascii=False) + '\n')
+            self._spool.flush()
+            self._buffer.append(event)
+            pending = len(self._buffer)
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def pending(self):
+        return len(self._buffer)
+
+    def flush(self):
+        """Buferdagi hodisalarni bazaga yozish. Yozilgan qatorlar sonini qaytaradi."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._buffer or self._pid != os.getpid():
+                    return 0
+                batch, self._buffer = self._buffer, []
+                # Joriy spool'ni segmentga aylantirib, yangisini ochamiz
+                segment = self._spool_path(self._token, f'{time.time_ns()}.flushing')
+                self._spool.close()
+                try:
+                    os.replace(self._spool_path(self._token), segment)
+                except FileNotFoundError:
+                    # Spool yo'qolgan - hodisalar baribir buferda
+                    segment = None
+                finally:
+                    self._spool = open(self._spool_path(self._token), 'a', encoding='utf-8')
+
+            try:
+                self._insert(batch)
+            except Exception:
+                # Hodisalar buferga va yangi spool faylga qaytariladi (keyingi
+                # flush'da qayta yoziladi), segment esa o'chiriladi
+                with self._lock:
+                    self._buffer = batch + self._buffer
+                    for event in batch:
+                        self._spool.write(json.dumps(event, ensure_ascii=False) + '\n')
+                    self._spool.flush()
+                if segment is not None:
+                    os.remove(segment)
+                raise
+
+            if segment is not None:
+                os.remove(segment)
+            return len(batch)
+
+    def shutdown(self):
+        """Jarayon to'xtashida: buferni yozish va bo'sh spool faylni o'chirish"""
+        if self._pid != os.getpid():
+            return
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"⚠️  Bildirishnomalar spool faylda qoldi: {e}")
+            return
+        with self._lock:
+            if not self._buffer and self._spool is not None:
+                self._spool.close()
+                self._spool = None
+                os.remove(self._spool_path(self._token))
+                os.remove(self._spool_path(self._token, 'lock'))
+                self._lock_file.close()
+                self._lock_file = None
+                self._pid = None
+
+    def _insert(self, events):
+        rows = [{
+            'user_id': event['user_id'],
+            'title': event['title'],
+            'message': event['message'],
+            'notification_type': event['notification_type'],
+            'created_at': datetime.fromisoformat(event['created_at']),
+        } for event in events]
+        with self.engine.begin() as conn:
+            conn.execute(_INSERT_SQL, rows)
+            conn.execute(_BUMP_STATE_SQL, {'user_ids': sorted({row['user_id'] for row in rows})})
+        self.flushed += len(rows)
+        self.batches += 1
+
+    def recover(self):
+        """Yiqilgan jarayonlardan qolgan spool fayllarni bazaga yozish"""
+        tokens = {}
+        for path in glob.glob(os.path.join(self.spool_dir, 'notifications-*')):
+            tokens.setdefault(_spool_token(path), []).append(path)
+
+        recovered = 0
+        for token, paths in sorted(tokens.items()):
+            if token == self._token:
+                continue
+            for claimed in self._claim(token, paths):
+                events = _read_spool(claimed)
+                if events:
+                    self._insert(events)
+                    recovered += len(events)
+                os.remove(claimed)
+
+        if recovered:
+            print(f"📨 Spool fayllardan {recovered} ta bildirishnoma tiklandi")
+        return recovered
+
+    def _claim(self, token, paths):
+        """Egasi o'lgan `token` fayllarini o'z nomimizga ko'chirish.
+
+        Ko'chirilgan fayllar joriy jarayon qulfi ostida turadi: tiklash
+        o'rtasida yiqilsak, ular keyingi recover() da qayta olinadi.
+        """
+        lock_path = self._spool_path(token, 'lock')
+        try:
+            # O_CREAT'siz: qulf faylini faqat egasi yaratadi. Qulf fayli
+            # yo'q bo'lsa token boshqa worker tomonidan tiklangan - tegmaymiz
+            lock_fd = os.open(lock_path, os.O_RDWR)
+        except FileNotFoundError:
+            return []
+
+        claimed = []
+        try:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Egasi tirik (yoki boshqa worker tiklayapti)
+                return []
+            # Qulf olinguncha boshqa worker faylni tiklab o'chirgan bo'lishi mumkin
+            try:
+                current = os.stat(lock_path)
+            except FileNotFoundError:
+                return []
+            locked = os.fstat(lock_fd)
+            if (current.st_dev, current.st_ino) != (locked.st_dev, locked.st_ino):
+                return []
+
+            for path in sorted(paths):
+                if path == lock_path:
+                    continue
+                target = self._spool_path(self._token, f'{time.time_ns()}.recovering')
+                try:
+                    os.replace(path, target)
+                except FileNotFoundError:
+                    continue
+                claimed.append(target)
+            os.remove(lock_path)
+        finally:
+            os.close(lock_fd)
+        return claimed
@@ -0,0 +1,141 @@
+# pagination.py - ADMIN RO'YXATLARI UCHUN KEYSET (SEEK) SAHIFALASH
+#
+# OFFSET ishlatilmaydi: keyingi sahifa oxirgi qatorning kalitidan boshlanadi
+#
+#     WHERE (created_at, id) < (:last_created_at, :last_id)
+#     ORDER BY created_at DESC, id DESC LIMIT :per_page + 1
+#
+# shuning uchun har qanday sahifa indeks bo'yicha bitta diapazon o'qish
+# va xotirada faqat `per_page` ta obyekt. Kursor - kalit qiymatlarining
+# URL-xavfsiz base64 ko'rinishi (?after=... / ?before=...).
+#
+# prefix_filter() - `LIKE 'abc%'` o'rniga diapazon (>= 'abc' AND < 'abd'),
+# SQLite uni oddiy (BINARY) indeks bilan bajara oladi.
+import base64
+import json
+from datetime import date, datetime
+
+from sqlalchemy import and_, tuple_
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+
+
+class Page:
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(values):
+    raw = json.dumps([_encode_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """Kursorni ustun turlariga mos qiymatlarga qaytarish. Yaroqsiz bo'lsa None."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != len(columns):
+        return None
+
+    decoded = []
+    for column, value in zip(columns, values):
+        python_type = column.type.python_type
+        try:
+            if value is None:
+                decoded.append(None)
+            elif python_type is datetime:
+                decoded.append(datetime.fromisoformat(value))
+            elif python_type is date:
+                decoded.append(date.fromisoformat(value))
+            else:
+                decoded.append(python_type(value))
+        except (TypeError, ValueError):
+            return None
+    return decoded
+
+
+def prefix_filter(column, prefix):
+    """`column` `prefix` bilan boshlanadi (indeksdan foydalanadigan diapazon)"""
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(column >= prefix, column < upper)
+
+
+def per_page_arg(value, default=DEFAULT_PER_PAGE):
+    try:
+        return max(1, min(MAX_PER_PAGE, int(value)))
+    except (TypeError, ValueError):
+        return default
+
+
+def paginate(query, columns, descending=False, after=None, before=None, per_page=DEFAULT_PER_PAGE):
+    """Keyset bo'yicha bitta sahifa.
+
+    columns - tartiblash kaliti (oxirgisi unikal bo'lishi kerak, odatda id);
+    barcha ustunlar bir xil yo'nalishda tartiblanadi.
+    after/before - oldingi sahifadagi next_cursor / prev_cursor.
+    """
+    key = tuple_(*columns) if len(columns) > 1 else columns[0]
+
+    def bound(values):
+        return tuple_(*values) if len(columns) > 1 else values[0]
+
+    after_values = decode_cursor(after, columns)
+    before_values = decode_cursor(before, columns) if after_values is None else None
+    backwards = before_values is not None
+
+    if after_values is not None:
+        query = query.filter(key < bound(after_values) if descending else key > bound(after_values))
+    elif backwards:
+        query = query.filter(key > bound(before_values) if descending else key < bound(before_values))
+
+    # Orqaga yurishda tartib teskari, natija keyin qayta aylantiriladi
+    reverse_order = descending != backwards
+    order_by = [column.desc() if reverse_order else column.asc() for column in columns]
+    rows = query.order_by(*order_by).limit(per_page + 1).all()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    def cursor_of(item):
+        return encode_cursor([getattr(item, column.key) for column in columns])
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if backwards:
+            next_cursor = cursor_of(rows[-1])
+            prev_cursor = cursor_of(rows[0]) if has_more else None
+        else:
+            next_cursor = cursor_of(rows[-1]) if has_more else None
+            prev_cursor = cursor_of(rows[0]) if after_values is not None else None
+    return Page(rows, per_page, next_cursor, prev_cursor)
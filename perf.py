@@ -0,0 +1,265 @@
+# perf.py - SO'ROVLAR UNUMDORLIGI: VAQT, SQL, SHABLON VA JAVOB HAJMI
+#
+# PerfMonitor har bir so'rov uchun quyidagilarni yig'adi:
+#   - umumiy (wall) vaqt: before_request .. after_request;
+#   - SQL so'rovlari soni va ularga ketgan vaqt - engine'ning
+#     before/after_cursor_execute hodisalari orqali (faqat so'rov
+#     kontekstidagi oqimda; fon oqimlari hisobga olinmaydi);
+#   - shablon render vaqti - Flask'ning before_render_template /
+#     template_rendered signallari;
+#   - javob hajmi (bayt; oqimli javoblarda noma'lum).
+# Natijalar endpoint bo'yicha gistogrammalarga (log-shkala chegaralari)
+# yoziladi; p50/p95/p99 gistogrammadan chiziqli interpolatsiya bilan
+# hisoblanadi, shuning uchun xotira so'rovlar soniga bog'liq emas.
+# `PERF_SLOW_REQUEST_MS` dan sekin so'rovlar SQL'lari bilan birga oxirgi
+# `PERF_SLOW_LOG_SIZE` talik jurnalda saqlanadi va chop etiladi.
+# Xato javoblar (status >= 400 yoki {"success": false}) alohida sanaladi.
+#
+# Statistika jarayon ichida: har bir gunicorn worker o'zinikini ko'rsatadi.
+import bisect
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from flask import before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+
+DEFAULT_CONFIG = {
+    'PERF_ENABLED': True,
+    'PERF_SLOW_REQUEST_MS': 500,
+    'PERF_SLOW_LOG_SIZE': 50,
+    'PERF_MAX_STATEMENTS': 50,
+    'PERF_IGNORE_ENDPOINTS': ('static',),
+}
+
+# Gistogramma chegaralari (ms); oxirgi bo'lak - cheksiz
+BUCKETS_MS = (1, 2, 3, 5, 7.5, 10, 15, 20, 30, 50, 75, 100, 150, 200, 300,
+              500, 750, 1000, 1500, 2000, 3000, 5000, 10000)
+
+# {"success": false} ni tekshirish uchun o'qiladigan JSON javobining eng katta hajmi
+_MAX_JSON_CHECK_BYTES = 64 * 1024
+
+
+class Histogram:
+    """Qat'iy chegarali gistogramma: count, sum, max va taxminiy kvantillar"""
+
+    def __init__(self, bounds=BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else self.max
+                value = lower + (upper - lower) * (rank - seen) / bucket_count
+                return round(min(value, self.max), 2)
+            seen += bucket_count
+        return round(self.max, 2)
+
+    @property
+    def mean(self):
+        return round(self.total / self.count, 2) if self.count else 0.0
+
+
+class EndpointStats:
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.wall = Histogram()
+        self.sql_ms = Histogram()
+        self.sql_count = 0
+        self.template_ms = 0.0
+        self.bytes = 0
+        self.errors = 0
+
+    def as_dict(self):
+        count = self.wall.count
+        return {
+            'endpoint': self.endpoint,
+            'count': count,
+            'errors': self.errors,
+            'p50_ms': self.wall.quantile(0.50),
+            'p95_ms': self.wall.quantile(0.95),
+            'p99_ms': self.wall.quantile(0.99),
+            'max_ms': round(self.wall.max, 2),
+            'mean_ms': self.wall.mean,
+            'sql_per_request': round(self.sql_count / count, 2) if count else 0.0,
+            'sql_p95_ms': self.sql_ms.quantile(0.95),
+            'sql_mean_ms': self.sql_ms.mean,
+            'template_mean_ms': round(self.template_ms / count, 2) if count else 0.0,
+            'bytes_mean': round(self.bytes / count) if count else 0,
+        }
+
+
+class RequestPerf:
+    """Bitta so'rovning o'lchovlari (flask.g da)"""
+
+    def __init__(self, max_statements):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.template_started = None
+        self.statements = []
+        self.max_statements = max_statements
+
+    def add_statement(self, statement, ms):
+        self.sql_count += 1
+        self.sql_ms += ms
+        if len(self.statements) < self.max_statements:
+            self.statements.append((round(ms, 2), ' '.join(statement.split())[:300]))
+
+
+def _current():
+    return g.get('_perf') if has_request_context() else None
+
+
+class PerfMonitor:
+    """Endpoint bo'yicha vaqt/SQL gistogrammalari va sekin so'rovlar jurnali"""
+
+    def __init__(self, app=None, db=None):
+        self.endpoints = {}
+        self.slow_log = deque()
+        self.since = datetime.utcnow()
+        self._lock = threading.Lock()
+        if app is not None and db is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        for key, value in DEFAULT_CONFIG.items():
+            app.config.setdefault(key, value)
+        self.enabled = app.config['PERF_ENABLED']
+        self.slow_ms = app.config['PERF_SLOW_REQUEST_MS']
+        self.max_statements = app.config['PERF_MAX_STATEMENTS']
+        self.ignore = set(app.config['PERF_IGNORE_ENDPOINTS'])
+        self.slow_log = deque(maxlen=app.config['PERF_SLOW_LOG_SIZE'])
+        if not self.enabled:
+            return
+
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(db.engine, 'after_cursor_execute', self._after_cursor_execute)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    # --- Hodisalar ---
+    def _before_request(self):
+        g._perf = RequestPerf(self.max_statements)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if _current() is not None and context is not None:
+            context._perf_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        perf = _current()
+        started = getattr(context, '_perf_started', None)
+        if perf is None or started is None:
+            return
+        perf.add_statement(statement, (time.perf_counter() - started) * 1000)
+
+    def _before_render(self, sender, template, context, **extra):
+        perf = _current()
+        if perf is not None:
+            perf.template_started = time.perf_counter()
+
+    def _after_render(self, sender, template, context, **extra):
+        perf = _current()
+        if perf is not None and perf.template_started is not None:
+            perf.template_ms += (time.perf_counter() - perf.template_started) * 1000
+            perf.template_started = None
+
+    def _after_request(self, response):
+        perf = g.pop('_perf', None)
+        endpoint = request.endpoint or 'not_found'
+        if perf is None or endpoint in self.ignore:
+            return response
+
+        wall_ms = (time.perf_counter() - perf.started) * 1000
+        size = response.content_length
+        if size is None and not (response.is_streamed or response.direct_passthrough):
+            size = len(response.get_data())
+        self.record(endpoint, wall_ms, perf, size or 0, _is_error(response))
+        if wall_ms >= self.slow_ms:
+            self._log_slow(endpoint, wall_ms, perf, response.status_code, size)
+        response.headers['Server-Timing'] = (
+            f'app;dur={wall_ms:.1f}, sql;dur={perf.sql_ms:.1f}, tpl;dur={perf.template_ms:.1f}'
+        )
+        return response
+
+    # --- Yig'ish ---
+    def record(self, endpoint, wall_ms, perf, size, error=False):
+        with self._lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = EndpointStats(endpoint)
+            stats.wall.add(wall_ms)
+            stats.sql_ms.add(perf.sql_ms)
+            stats.sql_count += perf.sql_count
+            stats.template_ms += perf.template_ms
+            stats.bytes += size
+            stats.errors += int(error)
+
+    def _log_slow(self, endpoint, wall_ms, perf, status, size):
+        entry = {
+            'at': datetime.utcnow().isoformat(timespec='seconds'),
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': endpoint,
+            'status': status,
+            'ms': round(wall_ms, 1),
+            'sql_count': perf.sql_count,
+            'sql_ms': round(perf.sql_ms, 1),
+            'template_ms': round(perf.template_ms, 1),
+            'bytes': size,
+            'statements': sorted(perf.statements, reverse=True)[:10],
+        }
+        with self._lock:
+            self.slow_log.append(entry)
+        print(f"🐢 Sekin so'rov: {entry['method']} {entry['path']} - {entry['ms']} ms, "
+              f"SQL {entry['sql_count']} ta / {entry['sql_ms']} ms, shablon {entry['template_ms']} ms")
+
+    # --- Hisobot ---
+    def report(self, sort='p95_ms'):
+        with self._lock:
+            rows = [stats.as_dict() for stats in self.endpoints.values()]
+            slow = list(reversed(self.slow_log))
+        rows.sort(key=lambda row: row.get(sort, 0), reverse=True)
+        return {
+            'since': self.since.isoformat(timespec='seconds'),
+            'requests': sum(row['count'] for row in rows),
+            'slow_request_ms': self.slow_ms,
+            'endpoints': rows,
+            'slow_log': slow,
+        }
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = {}
+            self.slow_log.clear()
+            self.since = datetime.utcnow()
+
+
+def _is_error(response):
+    if response.status_code >= 400:
+        return True
+    if (response.is_json and not (response.is_streamed or response.direct_passthrough)
+            and (response.content_length or 0) <= _MAX_JSON_CHECK_BYTES):
+        data = response.get_json(silent=True)
+        return isinstance(data, dict) and data.get('success') is False
+    return False
@@ -0,0 +1,91 @@
+# query_counts.py - SAHIFALAR SO'ROVLAR SONINING DOIMIYLIGINI TEKSHIRISH
+#
+# /hero va /profile bajaradigan SQL so'rovlari soni foydalanuvchidagi
+# buyumlar soniga bog'liq bo'lmasligi kerak (N+1 yo'q). Skript
+# vaqtinchalik bazada foydalanuvchiga 0, 4, 16, ... ta buyum berib,
+# har bir sahifa uchun so'rovlarni sanaydi va farq bo'lsa 1 kodi bilan
+# chiqadi (CI uchun).
+#
+# Ishga tushirish:
+#   python query_counts.py
+#   python query_counts.py --items 0 10 100
+import argparse
+import os
+import sys
+import tempfile
+
+PAGES = ['/hero', '/profile']
+ITEM_TYPES = ('clothes', 'hat', 'shoes', 'accessory')
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def give_items(db, Item, Inventory, user_id, count):
+    """Foydalanuvchi inventarini aynan `count` ta buyumga keltirish"""
+    Inventory.query.filter_by(user_id=user_id).delete()
+    items = Item.query.order_by(Item.id).all()
+    for i in range(len(items), count):
+        item = Item(name=f'Sinov buyumi {i}', price=10, item_type=ITEM_TYPES[i % len(ITEM_TYPES)],
+                    image_path='images/hat_green.png')
+        db.session.add(item)
+        items.append(item)
+    db.session.flush()
+    for i, item in enumerate(items[:count]):
+        db.session.add(Inventory(user_id=user_id, item_id=item.id, equipped=i < len(ITEM_TYPES)))
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sahifalar so'rovlar sonini tekshirish")
+    parser.add_argument('--items', type=int, nargs='+', default=[0, 4, 16, 64],
+                        help="foydalanuvchiga beriladigan buyumlar soni")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix='ecoverse-queries-')
+    os.environ['ECOVERSE_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp_dir, 'queries.db')}"
+
+    from sqlalchemy import event
+
+    from app import Inventory, Item, User, app, db, init_database
+
+    init_database()
+    client = app.test_client()
+    client.post('/login', data={'username': 'eco_bola', 'password': 'bola123'})
+
+    counter = QueryCounter()
+    with app.app_context():
+        user_id = User.query.filter_by(username='eco_bola').first().id
+        event.listen(db.engine, 'before_cursor_execute', counter)
+
+    counts = {page: {} for page in PAGES}
+    for item_count in args.items:
+        with app.app_context():
+            give_items(db, Item, Inventory, user_id, item_count)
+        for page in PAGES:
+            client.get(page)  # issiq kesh (katalog, sessiya)
+            counter.count = 0
+            response = client.get(page)
+            if response.status_code != 200:
+                print(f"❌ {page}: status {response.status_code}")
+                return 1
+            counts[page][item_count] = counter.count
+
+    failed = False
+    for page, by_items in counts.items():
+        summary = ', '.join(f'{items} buyum: {queries}' for items, queries in by_items.items())
+        if len(set(by_items.values())) == 1:
+            print(f"✅ {page}: {summary}")
+        else:
+            print(f"❌ {page}: so'rovlar soni buyumlar soniga bog'liq ({summary})")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
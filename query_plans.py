@@ -0,0 +1,166 @@
+# query_plans.py - ISSIQ SO'ROVLAR UCHUN EXPLAIN QUERY PLAN TEKSHIRUVI
+#
+# dashboard(), complete_task(), get_notifications(), buy_item() va boshqa
+# issiq route'lar bajaradigan so'rovlarning rejasini chiqaradi. Agar biror
+# so'rov katta jadvalni to'liq skanerlasa (SCAN), skript 1 kod bilan tugaydi.
+#
+# Ishga tushirish:
+#   python query_plans.py                 # joriy baza bo'yicha
+#   python query_plans.py --users 100000  # vaqtinchalik bazani to'ldirib tekshirish
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+# (nomi, SQL, parametrlar) - ORM so'rovlariga mos keladigan SQL
+HOT_QUERIES = [
+    ('complete_task: UserTask(user_id, task_id)',
+     'SELECT * FROM user_task WHERE user_id = :user_id AND task_id = :task_id LIMIT 1',
+     {'user_id': 2, 'task_id': 1}),
+    ('dashboard: bajarilgan UserTask',
+     'SELECT * FROM user_task WHERE user_id = :user_id AND completed = 1',
+     {'user_id': 2}),
+    ('dashboard/complete_task: DailyProgress(user_id, date)',
+     'SELECT * FROM daily_progress WHERE user_id = :user_id AND date = :date LIMIT 1',
+     {'user_id': 2, 'date': '2024-01-01'}),
+    ('admin_dashboard: bugungi DailyProgress',
+     'SELECT * FROM daily_progress WHERE date = :date',
+     {'date': '2024-01-01'}),
+    ('get_notifications: o\'qilmagan xabarlar',
+     'SELECT * FROM notification WHERE user_id = :user_id AND is_read = 0 '
+     'ORDER BY created_at DESC LIMIT 10',
+     {'user_id': 2}),
+    ('buy_item: Inventory(user_id, item_id)',
+     'SELECT * FROM inventory WHERE user_id = :user_id AND item_id = :item_id LIMIT 1',
+     {'user_id': 2, 'item_id': 1}),
+    ('hero/profile: QuizResult(user_id)',
+     'SELECT COUNT(*), SUM(coins_earned) FROM quiz_result WHERE user_id = :user_id',
+     {'user_id': 2}),
+    ('dashboard/news: faol yangiliklar',
+     "SELECT * FROM news WHERE status = 'active' ORDER BY created_at DESC LIMIT 3",
+     {}),
+    ('leaderboard: eng ko\'p coin',
+     "SELECT * FROM user WHERE role = 'child' ORDER BY coins DESC LIMIT 20",
+     {}),
+    ('admin_child: keyset sahifa (role, id)',
+     "SELECT * FROM user WHERE role = 'child' AND id > :after_id ORDER BY id LIMIT 51",
+     {'after_id': 100}),
+    ('admin_users: username prefiks qidiruvi',
+     'SELECT * FROM user WHERE username >= :prefix AND username < :upper ORDER BY username LIMIT 51',
+     {'prefix': 'bench_1', 'upper': 'bench_2'}),
+    ('admin_news: keyset sahifa (created_at, id)',
+     'SELECT * FROM news WHERE (created_at, id) < (:created_at, :id) '
+     'ORDER BY created_at DESC, id DESC LIMIT 51',
+     {'created_at': '2024-01-01 00:00:00.000000', 'id': 100}),
+    ('hero: inventar + buyum (JOIN)',
+     'SELECT inventory.*, item.* FROM inventory JOIN item ON inventory.item_id = item.id '
+     'WHERE inventory.user_id = :user_id ORDER BY inventory.id',
+     {'user_id': 1}),
+    ('get_news_feed: faol yangiliklar keyset sahifasi',
+     "SELECT * FROM news WHERE status = 'active' AND (created_at, id) < (:created_at, :id) "
+     'ORDER BY created_at DESC, id DESC LIMIT 21',
+     {'created_at': '2024-01-01 00:00:00.000000', 'id': 100}),
+]
+
+# Bu jadvallar foydalanuvchilar soni bilan o'sadi - ularda SCAN bo'lmasligi kerak
+LARGE_TABLES = {'user', 'user_task', 'daily_progress', 'notification', 'inventory', 'quiz_result', 'news'}
+
+
+def explain(conn, sql, params):
+    rows = conn.execute(text(f'EXPLAIN QUERY PLAN {sql}'), params).fetchall()
+    return [row[-1] for row in rows]
+
+
+def full_scans(plan):
+    scans = []
+    for detail in plan:
+        words = detail.split()
+        if len(words) >= 2 and words[0] == 'SCAN' and words[1] in LARGE_TABLES:
+            # "SCAN user USING INDEX ..." ham butun indeksni o'qiydi
+            scans.append(detail)
+    return scans
+
+
+def check_query_plans(conn):
+    """Har bir issiq so'rov rejasini chiqarish; SCAN topilganlar ro'yxatini qaytarish"""
+    failures = []
+    for name, sql, params in HOT_QUERIES:
+        plan = explain(conn, sql, params)
+        scans = full_scans(plan)
+        status = '❌' if scans else '✅'
+        print(f"{status} {name}")
+        for detail in plan:
+            print(f"      {detail}")
+        if scans:
+            failures.append(name)
+    return failures
+
+
+def seed_users(conn, user_count):
+    """Rejalarni real hajmda ko'rish uchun foydalanuvchilar va ularning qatorlarini qo'shish"""
+    now = datetime.utcnow()
+    today = now.date()
+    start_id = (conn.execute(text('SELECT COALESCE(MAX(id), 0) FROM user')).scalar() or 0) + 1
+    ids = range(start_id, start_id + user_count)
+
+    conn.execute(text(
+        'INSERT INTO user (id, username, email, password_hash, role, coins, energy, streak, '
+        'created_at, is_admin, level, experience) '
+        "VALUES (:id, :username, :email, '-', 'child', :coins, 100, 0, :created_at, 0, 1, 0)"
+    ), [{'id': i, 'username': f'bench_{i}', 'email': f'bench_{i}@ecoverse.com',
+         'coins': i % 5000, 'created_at': now} for i in ids])
+    conn.execute(text(
+        'INSERT INTO daily_progress (user_id, date, tasks_completed, quizzes_completed, coins_earned, created_at) '
+        'VALUES (:user_id, :date, 0, 0, 0, :created_at)'
+    ), [{'user_id': i, 'date': today - timedelta(days=d), 'created_at': now} for i in ids for d in range(3)])
+    conn.execute(text(
+        'INSERT INTO user_task (user_id, task_id, completed, created_at) '
+        'VALUES (:user_id, :task_id, :completed, :created_at)'
+    ), [{'user_id': i, 'task_id': t, 'completed': (i + t) % 2, 'created_at': now} for i in ids for t in (1, 2, 3)])
+    conn.execute(text(
+        'INSERT INTO notification (user_id, title, message, notification_type, is_read, created_at) '
+        "VALUES (:user_id, 'bench', 'bench', 'task', :is_read, :created_at)"
+    ), [{'user_id': i, 'is_read': n % 2, 'created_at': now} for i in ids for n in range(3)])
+    conn.execute(text(
+        'INSERT INTO quiz_result (user_id, score, correct_answers, total_questions, coins_earned, completed_at) '
+        'VALUES (:user_id, 80, 4, 5, 30, :completed_at)'
+    ), [{'user_id': i, 'completed_at': now} for i in ids])
+    conn.execute(text('ANALYZE'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Issiq so'rovlar rejasini tekshirish")
+    parser.add_argument('--users', type=int, default=0,
+                        help="vaqtinchalik bazaga shuncha foydalanuvchi qo'shib tekshirish")
+    args = parser.parse_args()
+
+    if args.users:
+        tmp_dir = tempfile.mkdtemp(prefix='ecoverse-plans-')
+        os.environ['ECOVERSE_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp_dir, 'plans.db')}"
+
+    from app import app, db, create_demo_data
+    import migrations
+
+    with app.app_context():
+        db.create_all()
+        migrations.upgrade(db.engine)
+        if args.users:
+            create_demo_data()
+            with db.engine.begin() as conn:
+                seed_users(conn, args.users)
+            print(f"📦 Vaqtinchalik baza: {args.users} ta foydalanuvchi qo'shildi")
+
+        with db.engine.connect() as conn:
+            failures = check_query_plans(conn)
+
+    if failures:
+        print(f"\n❌ {len(failures)} ta so'rov to'liq skanerlaydi")
+        sys.exit(1)
+    print("\n✅ Barcha issiq so'rovlar indeksdan foydalanadi")
+
+
+if __name__ == '__main__':
+    main()
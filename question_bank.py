@@ -0,0 +1,134 @@
+# question_bank.py - ML SAVOLLARI UCHUN INDEKSLANGAN XOTIRADAGI BANK
+#
+# ml_questions.json bir marta o'qiladi va fayl o'zgarganda (mtime) qayta
+# yuklanadi. Savollar qiyinlik (sinonimlar bilan normallashtirilgan),
+# kategoriya va id bo'yicha oldindan indekslanadi, shuning uchun har bir
+# so'rovda butun ro'yxatni filtrlash kerak emas: tanlash O(k).
+import json
+import os
+import random
+import threading
+from collections import defaultdict
+from types import MappingProxyType
+
+DIFFICULTY_MAPPING = {
+    'easy': ['easy', 'oson', 'oddiy'],
+    'medium': ['medium', 'o\'rta', 'ortacha', 'middle'],
+    'hard': ['hard', 'qiyin', 'murakkab', 'difficult']
+}
+
+_CANONICAL_DIFFICULTY = {
+    synonym: canonical
+    for canonical, synonyms in DIFFICULTY_MAPPING.items()
+    for synonym in synonyms
+}
+
+QUIZ_SIZE = 5
+
+
+def normalize_difficulty(value):
+    """Qiyinlik nomini asosiy ko'rinishga keltirish ('oson' -> 'easy')"""
+    value = (value or '').strip().lower()
+    return _CANONICAL_DIFFICULTY.get(value, value)
+
+
+class QuestionIndex:
+    """Bir fayl versiyasi uchun o'zgarmas indekslar"""
+
+    def __init__(self, questions):
+        self.questions = tuple(questions)
+
+        by_difficulty = defaultdict(list)
+        by_category = defaultdict(list)
+        for question in self.questions:
+            by_difficulty[normalize_difficulty(question.get('difficulty'))].append(question)
+            by_category[(question.get('category') or '').strip().lower()].append(question)
+
+        self.by_id = MappingProxyType({q['id']: q for q in self.questions if 'id' in q})
+        # submit_quiz natijalarida id bo'lmasa (eski klient), savol matni bo'yicha
+        self.id_by_text = MappingProxyType({
+            q['question']: q['id'] for q in self.questions if 'id' in q and 'question' in q
+        })
+        self.by_difficulty = MappingProxyType({k: tuple(v) for k, v in by_difficulty.items()})
+        self.by_category = MappingProxyType({k: tuple(v) for k, v in by_category.items()})
+
+    def difficulty(self, name):
+        return self.by_difficulty.get(normalize_difficulty(name), ())
+
+    def candidates(self, difficulty_filter):
+        """get_questions() dagi qiyinlik bo'yicha zaxira qoidalari.
+
+        Asosiy guruhda QUIZ_SIZE dan kam savol bo'lsa, qo'shni qiyinlikdan
+        to'ldiriladi; umuman savol bo'lmasa, barcha savollar qaytariladi.
+        """
+        main_questions = self.difficulty(difficulty_filter)
+
+        if len(main_questions) < QUIZ_SIZE:
+            remaining_needed = QUIZ_SIZE - len(main_questions)
+            difficulty = normalize_difficulty(difficulty_filter)
+
+            if difficulty in ('easy', 'hard'):
+                main_questions = main_questions + self.difficulty('medium')[:remaining_needed]
+            elif difficulty == 'medium':
+                medium_count = min(4, len(main_questions))
+                main_questions = (main_questions[:medium_count]
+                                  + self.difficulty('easy')[:1]
+                                  + self.difficulty('hard')[:1])
+
+        if len(main_questions) == 0:
+            return self.questions
+        return main_questions
+
+    def sample(self, difficulty_filter, k=QUIZ_SIZE, rng=random, exposure=None):
+        """exposure (exposure.Exposure) berilsa, yangi savollar afzal ko'riladi"""
+        candidates = self.candidates(difficulty_filter)
+        if exposure is not None:
+            return exposure.sample(candidates, k, rng)
+        return rng.sample(candidates, min(k, len(candidates)))
+
+
+class QuestionBank:
+    """JSON faylni kuzatib turuvchi savollar banki"""
+
+    def __init__(self, path, fallback):
+        # fallback() -> {'eco_questions': [...]} - fayl bo'lmasa ishlatiladi
+        self.path = path
+        self.fallback = fallback
+        self._mtime = None
+        self._index = None
+        self._lock = threading.Lock()
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _read(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data.get('eco_questions', [])
+        except FileNotFoundError:
+            print("⚠️  ml_questions.json fayli topilmadi! Demo savollar ishlatiladi.")
+        except json.JSONDecodeError as e:
+            print(f"⚠️  JSON faylini o'qishda xatolik: {e}")
+        except Exception as e:
+            print(f"⚠️  Xatolik: {e}")
+
+        # Oxirgi yaroqli versiya bo'lsa, o'shani saqlab qolamiz
+        if self._index is not None:
+            return self._index.questions
+        return self.fallback().get('eco_questions', [])
+
+    def index(self):
+        mtime = self._file_mtime()
+        index = self._index
+        if index is not None and mtime == self._mtime:
+            return index
+
+        with self._lock:
+            if self._index is None or mtime != self._mtime:
+                self._index = QuestionIndex(self._read())
+                self._mtime = mtime
+            return self._index
@@ -0,0 +1,125 @@
+# ranking.py - XOTIRADAGI TARTIBLANGAN REYTING (BOLALAR, COIN BO'YICHA)
+#
+# Reyting (-coins, user_id) kalitlari bo'yicha SortedList'da saqlanadi:
+# top-N, "mening o'rnim" va "r-o'rin atrofidagilar" O(log n).
+#
+# Worker'lar o'rtasida moslik: balansni o'zgartiruvchi har bir yo'l shu
+# tranzaksiyada `balance_ledger` jadvaliga (user_id, yangi coins, role)
+# qator qo'shadi (ledger.py). Har bir o'qishdan oldin sync() faqat oxirgi
+# ko'rilgan id'dan keyingi qatorlarni qo'llaydi (PK bo'yicha diapazon,
+# odatda 0 qator). Eski qatorlar ledger.compact() bilan yig'iladi; orqada
+# qolgan worker id'lardagi bo'shliqni ko'rib, reytingni bazadan qayta quradi.
+#
+# sync() tuzilmani `_lock` ostida o'zgartiradi (set() qatorni olib tashlab
+# qayta qo'shadi, load() ikkala atributni almashtiradi), shuning uchun
+# o'qish metodlari ham shu qulfni oladi - threaded worker'larda chala
+# holat ko'rinmaydi.
+import threading
+
+from sortedcontainers import SortedList
+from sqlalchemy import text
+
+LEADERBOARD_ROLE = 'child'
+
+
+class Leaderboard:
+    def __init__(self, stamp=None):
+        # stamp - majburiy qayta qurish uchun VersionStamp (rebuild-leaderboard buyrug'i)
+        self.stamp = stamp
+        self._entries = SortedList()
+        self._coins = {}
+        self._lock = threading.Lock()
+        self.last_change_id = None
+        self.stamp_version = None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    # --- Tuzilmani o'zgartirish ---
+    def set(self, user_id, coins):
+        coins = coins or 0
+        old = self._coins.get(user_id)
+        if old == coins:
+            return
+        if old is not None:
+            self._entries.remove((-old, user_id))
+        self._entries.add((-coins, user_id))
+        self._coins[user_id] = coins
+
+    def remove(self, user_id):
+        old = self._coins.pop(user_id, None)
+        if old is not None:
+            self._entries.remove((-old, user_id))
+
+    def load(self, rows):
+        self._coins = {user_id: coins or 0 for user_id, coins in rows}
+        self._entries = SortedList((-coins, user_id) for user_id, coins in self._coins.items())
+
+    # --- O'qish ---
+    def rank(self, user_id):
+        """1 dan boshlanuvchi o'rin yoki reytingda bo'lmasa None"""
+        with self._lock:
+            coins = self._coins.get(user_id)
+            if coins is None:
+                return None
+            return self._entries.bisect_left((-coins, user_id)) + 1
+
+    def coins(self, user_id):
+        with self._lock:
+            return self._coins.get(user_id)
+
+    def page(self, offset, limit):
+        """[(rank, user_id, coins), ...] - offset 0 dan boshlanadi"""
+        offset = max(0, offset)
+        with self._lock:
+            entries = self._entries[offset:offset + max(0, limit)]
+        return [(offset + i + 1, user_id, -neg_coins) for i, (neg_coins, user_id) in enumerate(entries)]
+
+    def top(self, n):
+        return self.page(0, n)
+
+    def around(self, rank, radius):
+        """r-o'rin va uning atrofidagi `radius` tadan foydalanuvchi"""
+        start = max(1, rank - radius)
+        return self.page(start - 1, rank + radius - start + 1)
+
+    # --- Baza bilan moslash ---
+    def rebuild(self, conn):
+        """Reytingni bazadan to'liq qurish (sovuq start)"""
+        # Avval oxirgi o'zgarish id'si olinadi: undan keyingi o'zgarishlar
+        # sync() da qayta qo'llanadi (qiymatlar mutlaq, shuning uchun xavfsiz)
+        last_change_id = conn.execute(text('SELECT COALESCE(MAX(id), 0) FROM balance_ledger')).scalar()
+        rows = conn.execute(
+            text('SELECT id, coins FROM user WHERE role = :role'), {'role': LEADERBOARD_ROLE}
+        ).fetchall()
+        self.load(rows)
+        self.last_change_id = last_change_id
+
+    def sync(self, conn):
+        """Boshqa worker'lar (va shu worker) qilgan o'zgarishlarni qo'llash"""
+        with self._lock:
+            version = self.stamp.get() if self.stamp is not None else None
+            if self.last_change_id is None or version != self.stamp_version:
+                self.rebuild(conn)
+                self.stamp_version = version
+                return
+
+            rows = conn.execute(text("""
+                SELECT id, user_id, coins, role FROM balance_ledger
+                WHERE id > :last_id ORDER BY id
+            """), {'last_id': self.last_change_id}).fetchall()
+            if not rows:
+                return
+            if rows[0].id != self.last_change_id + 1:
+                # Kerakli qatorlar prune qilingan - to'liq qayta qurish
+                self.rebuild(conn)
+                return
+
+            for row in rows:
+                if row.role == LEADERBOARD_ROLE:
+                    self.set(row.user_id, row.coins)
+                else:
+                    self.remove(row.user_id)
+            self.last_change_id = rows[-1].id
+
@@ -0,0 +1,207 @@
+# scheduler.py - KUNLIK ISHNI BITTA JARAYONDA ISHONCHLI BAJARISH
+#
+# Eski start_daily_scheduler() har 30 soniyada uyg'onib, faqat 00:00 da
+# ishlardi: to'xtab qolsa daqiqani o'tkazib yuborardi va uni ishga
+# tushirgan har bir gunicorn worker'ida qayta bajarilardi.
+#
+# DailyScheduler:
+#   - keyingi ishga tushish vaqtigacha uxlaydi (ko'pi bilan
+#     `max_sleep` soniya - soat o'zgarishi yoki uyqu rejimidan keyin ham
+#     kechikmaslik uchun);
+#   - bajarishdan oldin `scheduler_lease` jadvalida ijara (lease) oladi:
+#     shartli UPSERT faqat ijara bo'sh yoki muddati o'tgan bo'lsa
+#     muvaffaqiyatli bo'ladi, shuning uchun ishni aynan bitta jarayon
+#     bajaradi; ish davomida ijara har kundan keyin uzaytiriladi;
+#   - har bir bajarilishni `scheduler_run` jadvaliga yozadi (job, kun,
+#     kim, qachon, natija yoki xato);
+#   - ishlamay turgan kunlarni (`catchup_days` gacha) ketma-ket, eskisidan
+#     boshlab bajaradi.
+import json
+import os
+import socket
+import threading
+import uuid
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import text
+
+DEFAULT_CONFIG = {
+    'DAILY_SCHEDULER_HOUR': 0,
+    'DAILY_SCHEDULER_MINUTE': 0,
+    'DAILY_SCHEDULER_LEASE_SECONDS': 600,
+    'DAILY_SCHEDULER_CATCHUP_DAYS': 7,
+    'DAILY_SCHEDULER_MAX_SLEEP': 300,
+    'DAILY_SCHEDULER_RETRY_SECONDS': 60,
+}
+
+_ACQUIRE_SQL = text("""
+    INSERT INTO scheduler_lease (name, owner, acquired_at, expires_at)
+    VALUES (:name, :owner, :now, :expires_at)
+    ON CONFLICT(name) DO UPDATE SET
+        owner = excluded.owner,
+        acquired_at = CASE WHEN scheduler_lease.owner = excluded.owner
+                           THEN scheduler_lease.acquired_at ELSE excluded.acquired_at END,
+        expires_at = excluded.expires_at
+    WHERE scheduler_lease.expires_at < :now OR scheduler_lease.owner = :owner
+""")
+
+_RELEASE_SQL = text("""
+    UPDATE scheduler_lease SET expires_at = :now WHERE name = :name AND owner = :owner
+""")
+
+
+class DailyScheduler:
+    """Kuniga bir marta, barcha jarayonlar orasida bitta nusxada ishlaydigan ish"""
+
+    def __init__(self, app=None, db=None, job=None, name='daily'):
+        # job(day) - `day` (date) uchun ishni bajaradi, statistikani (dict) qaytaradi
+        self.job = job
+        self.name = name
+        self.engine = None
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.clock = datetime.utcnow
+        self._stop = threading.Event()
+        self._thread = None
+        if app is not None and db is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        for key, value in DEFAULT_CONFIG.items():
+            app.config.setdefault(key, value)
+        self.fire_at = time(app.config['DAILY_SCHEDULER_HOUR'], app.config['DAILY_SCHEDULER_MINUTE'])
+        self.lease_seconds = app.config['DAILY_SCHEDULER_LEASE_SECONDS']
+        self.catchup_days = app.config['DAILY_SCHEDULER_CATCHUP_DAYS']
+        self.max_sleep = app.config['DAILY_SCHEDULER_MAX_SLEEP']
+        self.retry_seconds = app.config['DAILY_SCHEDULER_RETRY_SECONDS']
+
+        with app.app_context():
+            self.engine = db.engine
+
+    # --- Vaqt hisoblari ---
+    def fire_time(self, day):
+        return datetime.combine(day, self.fire_at)
+
+    def next_fire_time(self, now):
+        fire = self.fire_time(now.date())
+        return fire if fire > now else self.fire_time(now.date() + timedelta(days=1))
+
+    def due_days(self, conn, now):
+        """Vaqti kelgan, lekin hali bajarilmagan kunlar (eskisidan boshlab).
+
+        Oxirgi muvaffaqiyatli kundan keyingi kunlar, ko'pi bilan
+        `catchup_days` orqaga; yangi bazada faqat oxirgi kun.
+        """
+        latest = now.date() if self.fire_time(now.date()) <= now else now.date() - timedelta(days=1)
+        last_finished = conn.execute(text("""
+            SELECT MAX(day) FROM scheduler_run WHERE job = :job AND finished_at IS NOT NULL
+        """), {'job': self.name}).scalar()
+        if last_finished is None:
+            return [latest]
+
+        first = max(date.fromisoformat(last_finished) + timedelta(days=1),
+                    latest - timedelta(days=self.catchup_days))
+        return [first + timedelta(days=offset) for offset in range((latest - first).days + 1)]
+
+    # --- Ijara (lease) ---
+    def acquire(self, now):
+        with self.engine.begin() as conn:
+            return conn.execute(_ACQUIRE_SQL, {
+                'name': self.name,
+                'owner': self.owner,
+                'now': now,
+                'expires_at': now + timedelta(seconds=self.lease_seconds),
+            }).rowcount == 1
+
+    def release(self):
+        with self.engine.begin() as conn:
+            conn.execute(_RELEASE_SQL, {'name': self.name, 'owner': self.owner, 'now': self.clock()})
+
+    # --- Bajarish ---
+    def _record_start(self, day, now):
+        with self.engine.begin() as conn:
+            conn.execute(text("""
+                INSERT INTO scheduler_run (job, day, owner, attempts, started_at)
+                VALUES (:job, :day, :owner, 1, :now)
+                ON CONFLICT(job, day) DO UPDATE SET
+                    owner = excluded.owner,
+                    attempts = scheduler_run.attempts + 1,
+                    started_at = excluded.started_at,
+                    error = NULL
+            """), {'job': self.name, 'day': day.isoformat(), 'owner': self.owner, 'now': now})
+
+    def _record_finish(self, day, stats=None, error=None):
+        with self.engine.begin() as conn:
+            conn.execute(text("""
+                UPDATE scheduler_run SET
+                    finished_at = CASE WHEN :error IS NULL THEN :now END,
+                    stats = :stats,
+                    error = :error
+                WHERE job = :job AND day = :day
+            """), {
+                'job': self.name,
+                'day': day.isoformat(),
+                'now': self.clock(),
+                'stats': json.dumps(stats, default=str) if stats is not None else None,
+                'error': error,
+            })
+
+    def run_pending(self):
+        """Vaqti kelgan kunlarni bajarish. Bajarilgan kunlar ro'yxatini qaytaradi."""
+        now = self.clock()
+        with self.engine.connect() as conn:
+            if not self.due_days(conn, now):
+                return []
+        if not self.acquire(now):
+            return []
+
+        done = []
+        try:
+            # Ijarani olguncha boshqa jarayon tugatgan bo'lishi mumkin - qayta tekshiramiz
+            with self.engine.connect() as conn:
+                days = self.due_days(conn, now)
+            for day in days:
+                self._record_start(day, self.clock())
+                try:
+                    stats = self.job(day)
+                except Exception as e:
+                    self._record_finish(day, error=str(e)[:500])
+                    print(f"⚠️  {self.name} ({day}) bajarilmadi: {e}")
+                    break
+                self._record_finish(day, stats=stats)
+                done.append(day)
+                if not self.acquire(self.clock()):
+                    break
+        finally:
+            self.release()
+        return done
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_pending()
+                now = self.clock()
+                wait = (self.next_fire_time(now) - now).total_seconds()
+            except Exception as e:
+                print(f"⚠️  Scheduler xatosi: {e}")
+                wait = self.retry_seconds
+            self._stop.wait(max(1.0, min(wait, self.max_sleep)))
+
+    def start(self):
+        """Fon oqimini ishga tushirish. Har bir worker'da chaqirish xavfsiz (ijara)."""
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f'{self.name}-scheduler', daemon=True)
+        self._thread.start()
+        print(f"🕒 Kunlik scheduler ishga tushdi: {self.name}, har kuni {self.fire_at.strftime('%H:%M')} UTC")
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+
+    def history(self, limit=14):
+        with self.engine.connect() as conn:
+            return conn.execute(text("""
+                SELECT day, owner, attempts, started_at, finished_at, error
+                FROM scheduler_run WHERE job = :job ORDER BY day DESC LIMIT :limit
+            """), {'job': self.name, 'limit': limit}).fetchall()
@@ -0,0 +1,114 @@
+# view_counter.py - KO'RISHLAR HISOBLAGICHI (XOTIRADA YIG'ISH, TO'PLAB YOZISH)
+#
+# news_detail() endi har bir ko'rishda `views_count += 1; commit` qilmaydi:
+# bu SQLite'da har bir sahifa ochilishini navbatli yozuvga aylantirardi.
+# hit() faqat worker xotirasidagi Counter'ni oshiradi. Fon oqimi har
+# `flush_interval` soniyada (yoki `max_pending` ta turli kalit
+# to'planganda) yig'ilganlarni bitta executemany bilan yozadi:
+#
+#     UPDATE news SET views_count = COALESCE(views_count, 0) + :delta WHERE id = :id
+#
+# Shunday qilib o'qish so'rovlari yozish qulfini umuman olmaydi.
+# Ko'rishlar soni taxminiy statistika: jarayon yiqilsa oxirgi flush'dan
+# keyingi ko'rishlar yo'qoladi (to'xtashda esa atexit orqali yoziladi).
+import atexit
+import os
+import threading
+from collections import Counter
+
+from sqlalchemy import text
+
+DEFAULT_CONFIG = {
+    'VIEW_COUNTER_FLUSH_INTERVAL': 5.0,
+    'VIEW_COUNTER_MAX_PENDING': 500,
+}
+
+
+class ViewCounter:
+    """Jadval bo'yicha ko'rishlar hisoblagichi (masalan, `news`)"""
+
+    def __init__(self, app=None, db=None, table='news', column='views_count'):
+        self.engine = None
+        self._update_sql = text(
+            f'UPDATE {table} SET {column} = COALESCE({column}, 0) + :delta WHERE id = :id'
+        )
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pid = None
+        self.flushed = 0
+        self.batches = 0
+        if app is not None and db is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        for key, value in DEFAULT_CONFIG.items():
+            app.config.setdefault(key, value)
+        self.flush_interval = app.config['VIEW_COUNTER_FLUSH_INTERVAL']
+        self.max_pending = app.config['VIEW_COUNTER_MAX_PENDING']
+
+        with app.app_context():
+            self.engine = db.engine
+        atexit.register(self.shutdown)
+
+    def _ensure_started(self):
+        """Fon oqimini birinchi hit() da ishga tushirish (fork'dan keyin ham)"""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        self._pid = pid
+        self._pending = Counter()
+        threading.Thread(target=self._run, name='view-counter', daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️  Ko'rishlar sonini yozishda xatolik: {e}")
+
+    # --- Ommaviy API ---
+    def hit(self, object_id, count=1):
+        with self._lock:
+            self._ensure_started()
+            self._pending[object_id] += count
+            keys = len(self._pending)
+        if keys >= self.max_pending:
+            self._wakeup.set()
+
+    def pending(self, object_id):
+        """Hali bazaga yozilmagan ko'rishlar (sahifada ko'rsatish uchun)"""
+        return self._pending.get(object_id, 0)
+
+    def flush(self):
+        """Yig'ilgan ko'rishlarni bazaga yozish. Yangilangan kalitlar sonini qaytaradi."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending or self._pid != os.getpid():
+                    return 0
+                batch, self._pending = self._pending, Counter()
+
+            rows = [{'id': object_id, 'delta': delta} for object_id, delta in sorted(batch.items())]
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(self._update_sql, rows)
+            except Exception:
+                # Yozilmagan ko'rishlar keyingi flush'ga qaytariladi
+                with self._lock:
+                    self._pending.update(batch)
+                raise
+
+            self.flushed += sum(batch.values())
+            self.batches += 1
+            return len(rows)
+
+    def shutdown(self):
+        if self._pid != os.getpid():
+            return
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"⚠️  Ko'rishlar soni yozilmay qoldi: {e}")